@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+from app_config import settings
+from deadline import check_deadline, current_deadline
+
+
+class Overloaded(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("key", "event", "granted", "cancelled")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class FairLimiter:
+    """Bounded provider concurrency with weighted fair queuing across keys.
+
+    Up to ``max_concurrent`` callers hold a slot at once. Extra callers wait in
+    bounded per-key queues; when a slot frees up it goes to the waiter with the
+    smallest virtual finish tag, so a key with weight 2 is served twice as often
+    as a key with weight 1 while both are backlogged, and one campaign's spike
+    cannot starve the others. Full queues reject immediately with ``Overloaded``.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue_per_key: int,
+        max_queue_total: int,
+        weights: dict[str, float] | None = None,
+        retry_after_sec: int = 2,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue_per_key = max_queue_per_key
+        self.max_queue_total = max_queue_total
+        self.weights = dict(weights or {})
+        self.retry_after_sec = retry_after_sec
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._heap: list[tuple[float, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_tag: dict[str, float] = {}
+        self._depth: dict[str, int] = {}
+        self._queued = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    @contextmanager
+    def slot(self, key: str, timeout: float | None = None) -> Iterator[None]:
+        self.acquire(key, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, key: str, timeout: float | None = None) -> None:
+        with self._lock:
+            if self._in_flight < self.max_concurrent and self._queued == 0:
+                self._in_flight += 1
+                self._admitted += 1
+                return
+
+            if self._depth.get(key, 0) >= self.max_queue_per_key or self._queued >= self.max_queue_total:
+                self._rejected += 1
+                raise Overloaded("Chat is busy right now, please retry shortly", self.retry_after_sec)
+
+            weight = max(self.weights.get(key, 1.0), 0.01)
+            tag = max(self._virtual_time, self._last_tag.get(key, 0.0)) + 1.0 / weight
+            self._last_tag[key] = tag
+            waiter = _Waiter(key)
+            heapq.heappush(self._heap, (tag, next(self._seq), waiter))
+            self._depth[key] = self._depth.get(key, 0) + 1
+            self._queued += 1
+
+        if waiter.event.wait(timeout):
+            return
+
+        with self._lock:
+            if waiter.granted:
+                return
+            waiter.cancelled = True
+            self._dequeued(key)
+            self._timed_out += 1
+        raise Overloaded("Timed out waiting for a chat slot", self.retry_after_sec)
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without queueing; False when none is free right now."""
+        with self._lock:
+            if self._in_flight < self.max_concurrent and self._queued == 0:
+                self._in_flight += 1
+                self._admitted += 1
+                return True
+            return False
+
+    def release(self) -> None:
+        with self._lock:
+            while self._heap:
+                tag, _, waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                # Hand the slot straight to the next waiter; in-flight count is unchanged.
+                waiter.granted = True
+                self._dequeued(waiter.key)
+                self._virtual_time = tag
+                self._admitted += 1
+                waiter.event.set()
+                return
+            self._in_flight -= 1
+
+    def _dequeued(self, key: str) -> None:
+        self._queued -= 1
+        depth = self._depth.get(key, 0) - 1
+        if depth > 0:
+            self._depth[key] = depth
+        else:
+            self._depth.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "max_concurrent": self.max_concurrent,
+                "queued": self._queued,
+                "queue_depth": dict(self._depth),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+
+
+def queue_timeout() -> float:
+    """Wait no longer than the configured queue timeout or the request's remaining deadline."""
+    deadline = current_deadline()
+    if deadline is None:
+        return settings.provider_queue_timeout_sec
+    return max(0.0, min(settings.provider_queue_timeout_sec, deadline.remaining()))
+
+
+provider_limiter = FairLimiter(
+    max_concurrent=settings.provider_max_concurrency,
+    max_queue_per_key=settings.provider_queue_per_key,
+    max_queue_total=settings.provider_queue_total,
+    weights=settings.provider_queue_weights,
+    retry_after_sec=max(1, math.ceil(settings.provider_queue_timeout_sec)),
+)
+
+
+_admission_key: ContextVar[str | None] = ContextVar("admission_key", default=None)
+
+
+@contextmanager
+def admission_scope(key: str) -> Iterator[None]:
+    """Provider attempts made inside this block queue for a ``provider_limiter`` slot under ``key``."""
+    token = _admission_key.set(key)
+    try:
+        yield
+    finally:
+        _admission_key.reset(token)
+
+
+def _no_release() -> None:
+    pass
+
+
+def acquire_provider_slot(wait: bool = True) -> Callable[[], None] | None:
+    """Take a provider slot for one HTTP call and return its release callback.
+
+    Outside ``admission_scope`` this admits immediately. With ``wait=False`` it
+    returns None instead of queueing when no slot is free. A queue wait cut short
+    by the request deadline raises ``DeadlineExceeded``, not ``Overloaded``.
+    """
+    key = _admission_key.get()
+    if key is None:
+        return _no_release
+    limiter = provider_limiter
+    if not wait:
+        return limiter.release if limiter.try_acquire() else None
+    check_deadline("provider queue")
+    try:
+        limiter.acquire(key, timeout=queue_timeout())
+    except Overloaded:
+        check_deadline("provider queue")
+        raise
+    return limiter.release
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from app_config import settings
+
+
+def normalize_question(text: str) -> str:
+    """Collapse case, punctuation and whitespace so near-identical questions share a key."""
+    text = (text or "").lower()
+    text = re.sub(r"[^\w\s$%]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class AnswerCache:
+    """Thread-safe TTL + LRU cache of first-turn assistant replies.
+
+    Entries are keyed by (campaign_id, brand_id, normalized question) and indexed
+    per campaign so a single campaign can be invalidated without a full scan.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, str]] = OrderedDict()
+        self._by_campaign: dict[str, set[tuple[str, str, str]]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def make_key(campaign_id: str, brand_id: str | None, question: str) -> tuple[str, str, str]:
+        return (campaign_id, brand_id or "", normalize_question(question))
+
+    def get(self, campaign_id: str, brand_id: str | None, question: str) -> str | None:
+        key = self.make_key(campaign_id, brand_id, question)
+        if not key[2]:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, answer = entry
+            if self._clock() >= expires_at:
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return answer
+
+    def contains(self, campaign_id: str, brand_id: str | None, question: str) -> bool:
+        """Check for a live entry without touching hit/miss counters or LRU order."""
+        key = self.make_key(campaign_id, brand_id, question)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and self._clock() < entry[0]
+
+    def put(self, campaign_id: str, brand_id: str | None, question: str, answer: str) -> None:
+        key = self.make_key(campaign_id, brand_id, question)
+        if not key[2] or not answer:
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, answer)
+            self._entries.move_to_end(key)
+            self._by_campaign.setdefault(campaign_id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_campaign(self, campaign_id: str) -> int:
+        """Drop a campaign's entries, including its simulator scope ("preview-<campaign id>")."""
+        with self._lock:
+            keys = self._by_campaign.pop(campaign_id, set()) | self._by_campaign.pop(f"preview-{campaign_id}", set())
+            for key in keys:
+                self._entries.pop(key, None)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_campaign.clear()
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _remove(self, key: tuple[str, str, str]) -> None:
+        self._entries.pop(key, None)
+        campaign_keys = self._by_campaign.get(key[0])
+        if campaign_keys is not None:
+            campaign_keys.discard(key)
+            if not campaign_keys:
+                self._by_campaign.pop(key[0], None)
+
+
+answer_cache = AnswerCache(
+    max_entries=settings.answer_cache_max_entries,
+    ttl_seconds=settings.answer_cache_ttl_sec,
+)
@@ -1,3 +1,4 @@
+import json
 import os
 from dataclasses import dataclass
 from pathlib import Path
@@ -36,7 +37,35 @@ _load_dotenv(BASE_DIR / ".env")
 @dataclass(frozen=True)
 class Settings:
     app_secret: str
+    log_level: str
     database_url: str
+    db_profile: str
+    db_busy_timeout_ms: int
+    db_sqlite_cache_kib: int
+    db_sqlite_mmap_bytes: int
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_recycle_sec: int
+    db_pool_timeout_sec: float
+    db_write_queue: bool
+    db_write_batch_max: int
+    db_write_batch_wait_ms: float
+    db_write_timeout_sec: float
+    event_sink_mode: str
+    event_buffer_max: int
+    event_batch_size: int
+    event_flush_interval_sec: float
+    event_block_timeout_ms: float
+    event_retention_days: int
+    latency_flush_sec: float
+    open_flush_interval_sec: float
+    open_pending_max: int
+    retention_preview_days: float
+    retention_legacy_days: float
+    retention_real_days: float
+    retention_batch_size: int
+    retention_batch_pause_ms: float
+    retention_sweep_interval_sec: float
     openrouter_api_key: str
     openrouter_model: str
     openrouter_chat_completions_url: str
@@ -48,8 +77,37 @@ class Settings:
     smtp_use_tls: bool
     request_timeout_sec: int
     provider_retries: int
+    chat_deadline_sec: float
+    chat_dedupe_window_sec: float
+    chat_history_max_page: int
     chat_system_prompt: str
     legacy_auth_key: str
+    answer_cache_enabled: bool
+    answer_cache_ttl_sec: int
+    answer_cache_max_entries: int
+    prompt_cache_ttl_sec: float
+    prompt_cache_max_entries: int
+    warmup_on_send: bool
+    warmup_questions: tuple[str, ...]
+    warmup_max_workers: int
+    provider_fallbacks: tuple[dict, ...]
+    provider_hedge_enabled: bool
+    provider_hedge_min_ms: int
+    provider_breaker_failures: int
+    provider_breaker_reset_sec: int
+    provider_prompt_cache_hints: bool
+    provider_max_concurrency: int
+    provider_queue_per_key: int
+    provider_queue_total: int
+    provider_queue_timeout_sec: float
+    provider_queue_weights: dict[str, float]
+    knowledge_enabled: bool
+    knowledge_top_k: int
+    knowledge_chunk_chars: int
+    knowledge_refresh_sec: float
+    knowledge_mmap_bytes: int
+    token_cache_max_entries: int
+    token_negative_ttl_sec: float
 
 
 def _as_bool(value: str, default: bool = True) -> bool:
@@ -58,11 +116,62 @@ def _as_bool(value: str, default: bool = True) -> bool:
     return value.lower() in {"1", "true", "yes", "on"}
 
 
+def _as_list(value: str | None, default: str) -> tuple[str, ...]:
+    raw = default if value is None else value
+    return tuple(part.strip() for part in raw.split("|") if part.strip())
+
+
+def _as_json_list(value: str | None) -> tuple[dict, ...]:
+    if not value:
+        return ()
+    parsed = json.loads(value)
+    if not isinstance(parsed, list):
+        raise ValueError("Expected a JSON list")
+    return tuple(item for item in parsed if isinstance(item, dict))
+
+
+def _as_json_weights(value: str | None) -> dict[str, float]:
+    if not value:
+        return {}
+    parsed = json.loads(value)
+    if not isinstance(parsed, dict):
+        raise ValueError("Expected a JSON object")
+    return {str(key): float(weight) for key, weight in parsed.items()}
+
+
 def load_settings() -> Settings:
     default_db = DATA_DIR / "demo.db"
     return Settings(
         app_secret=os.environ.get("APP_SECRET", "demo-secret-change-me"),
+        log_level=os.environ.get("LOG_LEVEL", "INFO").upper(),
         database_url=os.environ.get("DATABASE_URL", f"sqlite:///{default_db}"),
+        db_profile=os.environ.get("DB_PROFILE", "auto").strip().lower() or "auto",
+        db_busy_timeout_ms=int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000")),
+        db_sqlite_cache_kib=int(os.environ.get("DB_SQLITE_CACHE_KIB", "20000")),
+        db_sqlite_mmap_bytes=int(os.environ.get("DB_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024))),
+        db_pool_size=int(os.environ.get("DB_POOL_SIZE", "10")),
+        db_max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        db_pool_recycle_sec=int(os.environ.get("DB_POOL_RECYCLE_SEC", "1800")),
+        db_pool_timeout_sec=float(os.environ.get("DB_POOL_TIMEOUT_SEC", "10")),
+        db_write_queue=_as_bool(os.environ.get("DB_WRITE_QUEUE"), default=False),
+        db_write_batch_max=int(os.environ.get("DB_WRITE_BATCH_MAX", "128")),
+        db_write_batch_wait_ms=float(os.environ.get("DB_WRITE_BATCH_WAIT_MS", "2")),
+        db_write_timeout_sec=float(os.environ.get("DB_WRITE_TIMEOUT_SEC", "10")),
+        event_sink_mode=os.environ.get("EVENT_SINK_MODE", "db").strip().lower() or "db",
+        event_buffer_max=int(os.environ.get("EVENT_BUFFER_MAX", "10000")),
+        event_batch_size=int(os.environ.get("EVENT_BATCH_SIZE", "500")),
+        event_flush_interval_sec=float(os.environ.get("EVENT_FLUSH_INTERVAL_SEC", "0.5")),
+        event_block_timeout_ms=float(os.environ.get("EVENT_BLOCK_TIMEOUT_MS", "0")),
+        event_retention_days=int(os.environ.get("EVENT_RETENTION_DAYS", "30")),
+        latency_flush_sec=float(os.environ.get("LATENCY_FLUSH_SEC", "30")),
+        open_flush_interval_sec=float(os.environ.get("OPEN_FLUSH_INTERVAL_SEC", "1.0")),
+        open_pending_max=int(os.environ.get("OPEN_PENDING_MAX", "100000")),
+        retention_preview_days=float(os.environ.get("RETENTION_PREVIEW_DAYS", "1")),
+        retention_legacy_days=float(os.environ.get("RETENTION_LEGACY_DAYS", "7")),
+        retention_real_days=float(os.environ.get("RETENTION_REAL_DAYS", "0")),
+        retention_batch_size=int(os.environ.get("RETENTION_BATCH_SIZE", "200")),
+        retention_batch_pause_ms=float(os.environ.get("RETENTION_BATCH_PAUSE_MS", "50")),
+        retention_sweep_interval_sec=float(os.environ.get("RETENTION_SWEEP_INTERVAL_SEC", "3600")),
         openrouter_api_key=os.environ.get("OPENROUTER_API_KEY", ""),
         openrouter_model=os.environ.get("OPENROUTER_MODEL", "openrouter/free"),
         openrouter_chat_completions_url=os.environ.get(
@@ -77,12 +186,44 @@ def load_settings() -> Settings:
         smtp_use_tls=_as_bool(os.environ.get("SMTP_USE_TLS"), default=True),
         request_timeout_sec=int(os.environ.get("REQUEST_TIMEOUT_SEC", "20")),
         provider_retries=int(os.environ.get("PROVIDER_RETRIES", "2")),
+        chat_deadline_sec=float(os.environ.get("CHAT_DEADLINE_SEC", "12")),
+        chat_dedupe_window_sec=float(os.environ.get("CHAT_DEDUPE_WINDOW_SEC", "5")),
+        chat_history_max_page=int(os.environ.get("CHAT_HISTORY_MAX_PAGE", "200")),
         chat_system_prompt=os.environ.get(
             "CHAT_SYSTEM_PROMPT",
             "You are a helpful and concise customer support representative. "
             "Keep replies clear, safe, and practical.",
         ),
         legacy_auth_key=os.environ.get("LEGACY_AUTH_KEY", "Pv7!n7h3W0rk"),
+        answer_cache_enabled=_as_bool(os.environ.get("ANSWER_CACHE_ENABLED"), default=True),
+        answer_cache_ttl_sec=int(os.environ.get("ANSWER_CACHE_TTL_SEC", "900")),
+        answer_cache_max_entries=int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "5000")),
+        prompt_cache_ttl_sec=float(os.environ.get("PROMPT_CACHE_TTL_SEC", "60")),
+        prompt_cache_max_entries=int(os.environ.get("PROMPT_CACHE_MAX_ENTRIES", "2000")),
+        warmup_on_send=_as_bool(os.environ.get("WARMUP_ON_SEND"), default=False),
+        warmup_questions=_as_list(
+            os.environ.get("WARMUP_QUESTIONS"),
+            "Do you offer free shipping?|How does sizing run?|Is this on sale?|What is your return policy?",
+        ),
+        warmup_max_workers=int(os.environ.get("WARMUP_MAX_WORKERS", "4")),
+        provider_fallbacks=_as_json_list(os.environ.get("PROVIDER_FALLBACKS")),
+        provider_hedge_enabled=_as_bool(os.environ.get("PROVIDER_HEDGE_ENABLED"), default=True),
+        provider_hedge_min_ms=int(os.environ.get("PROVIDER_HEDGE_MIN_MS", "500")),
+        provider_breaker_failures=int(os.environ.get("PROVIDER_BREAKER_FAILURES", "5")),
+        provider_breaker_reset_sec=int(os.environ.get("PROVIDER_BREAKER_RESET_SEC", "30")),
+        provider_prompt_cache_hints=_as_bool(os.environ.get("PROVIDER_PROMPT_CACHE_HINTS"), default=False),
+        provider_max_concurrency=int(os.environ.get("PROVIDER_MAX_CONCURRENCY", "16")),
+        provider_queue_per_key=int(os.environ.get("PROVIDER_QUEUE_PER_KEY", "32")),
+        provider_queue_total=int(os.environ.get("PROVIDER_QUEUE_TOTAL", "128")),
+        provider_queue_timeout_sec=float(os.environ.get("PROVIDER_QUEUE_TIMEOUT_SEC", "5")),
+        provider_queue_weights=_as_json_weights(os.environ.get("PROVIDER_QUEUE_WEIGHTS")),
+        knowledge_enabled=_as_bool(os.environ.get("KNOWLEDGE_ENABLED"), default=True),
+        knowledge_top_k=int(os.environ.get("KNOWLEDGE_TOP_K", "3")),
+        knowledge_chunk_chars=int(os.environ.get("KNOWLEDGE_CHUNK_CHARS", "600")),
+        knowledge_refresh_sec=float(os.environ.get("KNOWLEDGE_REFRESH_SEC", "30")),
+        knowledge_mmap_bytes=int(os.environ.get("KNOWLEDGE_MMAP_BYTES", str(64 * 1024 * 1024))),
+        token_cache_max_entries=int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", "50000")),
+        token_negative_ttl_sec=float(os.environ.get("TOKEN_NEGATIVE_TTL_SEC", "60")),
     )
 
 
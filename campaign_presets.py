@@ -50,6 +50,22 @@ _PRESETS = {
     },
 }
 
+# Likely opening questions per preset, answered ahead of time by the send-time warm-up.
+_WARMUP_QUESTIONS = {
+    "spring_drop": [
+        "What's new this season?",
+        "Which colorways are early access?",
+    ],
+    "vip_launch": [
+        "What do VIP members get?",
+        "When does the public launch start?",
+    ],
+    "clearance_event": [
+        "What is still in stock?",
+        "Are clearance items returnable?",
+    ],
+}
+
 
 def list_presets() -> list[dict[str, str]]:
     return [deepcopy(_PRESETS[key]) for key in sorted(_PRESETS.keys())]
@@ -59,3 +75,8 @@ def get_preset(preset_id: str | None) -> dict[str, str]:
     if preset_id and preset_id in _PRESETS:
         return deepcopy(_PRESETS[preset_id])
     return deepcopy(_PRESETS[DEFAULT_PRESET_ID])
+
+
+def get_warmup_questions(preset_id: str | None) -> list[str]:
+    key = preset_id if preset_id in _WARMUP_QUESTIONS else DEFAULT_PRESET_ID
+    return list(_WARMUP_QUESTIONS[key])
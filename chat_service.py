@@ -3,19 +3,31 @@ from __future__ import annotations
 import re
 import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Any
 
-import requests
-from sqlalchemy import asc
+from sqlalchemy import asc, desc, func, update
 
+from admission import admission_scope
+from answer_cache import answer_cache
 from app_config import settings
-from models import Conversation, Event, Message
+from deadline import check_deadline
+from event_sink import emit_event
+from knowledge_service import relevant_snippets
+from latency_stats import latency_scope, record_latency
+from models import Campaign, Conversation, Message
+from prompt_service import system_prompt_for
+from provider_pool import ProviderError, provider_pool
+from stats_service import record_conversation_started
+from template_service import BRAND_CONFIG_DIR, TemplateError, load_brand_config
+from write_queue import run_write
 
 
 class ChatServiceError(Exception):
     pass
 
 
+DEFAULT_FALLBACK_REPLY = "Sorry, our team is a little busy right now. Please send your question again in a moment."
 MAX_ASSISTANT_REPLY_CHARS = 560
 MAX_ASSISTANT_REPLY_LINES = 6
 
@@ -44,73 +56,145 @@ def _normalize_assistant_reply(content: str) -> str:
     return text
 
 
-def _provider_messages(db_session, conversation_id: str) -> list[dict[str, str]]:
-    history = (
-        db_session.query(Message)
-        .filter(Message.conversation_id == conversation_id)
-        .order_by(asc(Message.created_at), asc(Message.id))
-        .all()
-    )
-    messages = [{"role": "system", "content": settings.chat_system_prompt}]
+def _provider_messages(
+    db_session, conversation_id: str | None, campaign_id: str, user_message: str
+) -> list[dict[str, str]]:
+    history = []
+    if conversation_id is not None:
+        history = (
+            db_session.query(Message)
+            .filter(Message.conversation_id == conversation_id)
+            .order_by(asc(Message.created_at), asc(Message.id))
+            .all()
+        )
+    # The system prompt is the same bytes on every turn so providers can reuse the cached prefix.
+    messages = [{"role": "system", "content": system_prompt_for(db_session, campaign_id)}]
     messages.extend({"role": m.role, "content": m.content} for m in history)
+    messages.append({"role": "user", "content": user_message})
     return messages
 
 
-def _call_openrouter(messages: list[dict[str, str]]) -> tuple[str, int]:
-    if not settings.openrouter_api_key:
-        raise ChatServiceError("Missing OpenRouter API key")
+def _with_knowledge(messages: list[dict[str, str]], brand_id: str, query: str) -> list[dict[str, str]]:
+    """Insert top-k brand snippets just before the latest user turn, after the cached prefix."""
+    snippets = relevant_snippets(brand_id, query)
+    if not snippets:
+        return messages
+    notes = "Relevant product notes (use only if helpful):\n" + "\n".join(f"- {snippet}" for snippet in snippets)
+    return [*messages[:-1], {"role": "system", "content": notes}, messages[-1]]
 
-    payload = {"model": settings.openrouter_model, "messages": messages}
-    headers = {
-        "Authorization": f"Bearer {settings.openrouter_api_key}",
-        "Content-Type": "application/json",
-    }
-
-    last_error: Exception | None = None
-    for attempt in range(settings.provider_retries + 1):
-        start = time.monotonic()
-        try:
-            response = requests.post(
-                settings.openrouter_chat_completions_url,
-                headers=headers,
-                json=payload,
-                timeout=settings.request_timeout_sec,
-            )
-            latency_ms = int((time.monotonic() - start) * 1000)
 
-            if response.status_code != 200:
-                raise ChatServiceError(f"Provider returned {response.status_code}: {response.text[:500]}")
+def _first_turn_messages(user_message: str, system_prompt: str) -> list[dict[str, str]]:
+    """Provider messages for a history-free turn, identical to what the chat path sends."""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_message},
+    ]
+
 
-            body = response.json()
-            content = body["choices"][0]["message"]["content"]
-            return content, latency_ms
-        except Exception as exc:  # noqa: BLE001
-            last_error = exc
-            if attempt >= settings.provider_retries:
-                break
-            time.sleep(0.5 * (2**attempt))
+def _call_openrouter(messages: list[dict[str, str]]) -> tuple[str, int]:
+    if not provider_pool.has_credentials():
+        raise ChatServiceError("Missing OpenRouter API key")
 
-    raise ChatServiceError(f"Failed to fetch response from model provider: {last_error}")
+    try:
+        reply = provider_pool.complete(messages)
+    except ProviderError as exc:
+        raise ChatServiceError(str(exc)) from exc
+    record_latency("provider", reply.latency_ms, model=reply.model)
+    return reply.content, reply.latency_ms
+
+
+def answer_first_turn(
+    user_message: str, system_prompt: str, brand_id: str = "", campaign_id: str = ""
+) -> tuple[str, int]:
+    """Generate a normalized reply to an opening question without touching the database.
+
+    Provider latency is recorded as ``provider_warmup`` so it stays out of the chat percentiles.
+    """
+    messages = _with_knowledge(_first_turn_messages(user_message, system_prompt), brand_id, user_message)
+    with admission_scope("warmup"), latency_scope(campaign_id, metric_suffix="_warmup"):
+        reply, latency_ms = _call_openrouter(messages)
+    return _normalize_assistant_reply(reply), latency_ms
+
+
+def _campaign_brand_id(db_session, campaign_id: str) -> str:
+    # Preview scopes are "preview-<campaign id>" (simulator) or "preview-<brand id>" (gallery).
+    scoped_id = campaign_id.removeprefix("preview-")
+    brand_id = db_session.query(Campaign.brand_id).filter(Campaign.id == scoped_id).scalar()
+    if brand_id is None and scoped_id != campaign_id and (BRAND_CONFIG_DIR / f"{scoped_id}.json").exists():
+        brand_id = scoped_id
+    return brand_id or ""
+
+
+def deadline_fallback_reply(db_session, campaign_id: str) -> str:
+    """Brand-specific canned reply used when a chat turn runs out of time budget."""
+    brand_id = _campaign_brand_id(db_session, campaign_id)
+    if not brand_id:
+        return DEFAULT_FALLBACK_REPLY
+    try:
+        brand_cfg = load_brand_config(brand_id)
+    except TemplateError:
+        return DEFAULT_FALLBACK_REPLY
+    return str(brand_cfg.get("chat_fallback_reply") or DEFAULT_FALLBACK_REPLY)
+
+
+def _load_conversation(db_session, campaign_id: str, recipient_email: str, convo_id: str | None):
+    if not convo_id:
+        return None
+    convo = db_session.query(Conversation).filter_by(id=convo_id).one_or_none()
+    if convo is None:
+        raise ChatServiceError("Conversation not found")
+    if convo.campaign_id != campaign_id or convo.recipient_email != recipient_email:
+        raise ChatServiceError("Conversation ownership mismatch")
+    return convo
 
 
-def _get_or_create_conversation(db_session, campaign_id: str, recipient_email: str, token_id: str, convo_id: str | None):
-    if convo_id:
-        convo = db_session.query(Conversation).filter_by(id=convo_id).one_or_none()
+def _turn_writer(
+    convo: Conversation | None,
+    target_id: str,
+    campaign_id: str,
+    recipient_email: str,
+    token_id: str,
+    user_message: str,
+    asked_at: datetime,
+    reply: tuple[str, str, int] | None,
+):
+    """Write intent for one turn; ``reply`` is ``(content, provider, latency_ms)`` or None for the question only."""
+
+    def _persist(db) -> str:
+        answered_at = datetime.utcnow()
         if convo is None:
-            raise ChatServiceError("Conversation not found")
-        if convo.campaign_id != campaign_id or convo.recipient_email != recipient_email:
-            raise ChatServiceError("Conversation ownership mismatch")
-        return convo
-
-    convo = Conversation(
-        id=str(uuid.uuid4()),
-        campaign_id=campaign_id,
-        recipient_email=recipient_email,
-        token_id=token_id,
-    )
-    db_session.add(convo)
-    db_session.flush()
-    return convo
+            db.add(
+                Conversation(
+                    id=target_id,
+                    campaign_id=campaign_id,
+                    recipient_email=recipient_email,
+                    token_id=token_id,
+                    created_at=asked_at,
+                    last_message_at=answered_at,
+                )
+            )
+            db.flush()
+            record_conversation_started(db, campaign_id)
+        else:
+            db.execute(update(Conversation).where(Conversation.id == target_id).values(last_message_at=answered_at))
+        db.add(
+            Message(conversation_id=target_id, role="user", content=user_message, provider="inbox", created_at=asked_at)
+        )
+        if reply is not None:
+            content, provider, latency_ms = reply
+            db.add(
+                Message(
+                    conversation_id=target_id,
+                    role="assistant",
+                    content=content,
+                    provider=provider,
+                    latency_ms=latency_ms,
+                    created_at=answered_at,
+                )
+            )
+        return target_id
+
+    return _persist
 
 
 def handle_message(
@@ -120,60 +204,140 @@ def handle_message(
     token_id: str,
     user_message: str,
     convo_id: str | None = None,
+    extra_events: list[tuple[str, dict[str, Any]]] | None = None,
 ) -> tuple[str, str, int]:
-    convo = _get_or_create_conversation(db_session, campaign_id, recipient_email, token_id, convo_id)
-
-    db_session.add(
-        Message(
-            conversation_id=convo.id,
-            role="user",
-            content=user_message,
-            provider="inbox",
-            created_at=datetime.utcnow(),
+    """Answer one turn, then persist it as a single write after the provider call.
+
+    Reads use ``db_session``; the conversation and both messages are written
+    together through ``run_write`` so no write transaction is held open while the
+    provider runs. Events, including ``extra_events`` (``(event_type, payload)``
+    pairs, each with ``latency_ms`` added), go to the async event sink.
+    """
+    convo = _load_conversation(db_session, campaign_id, recipient_email, convo_id)
+    asked_at = datetime.utcnow()
+
+    # First-turn questions carry no history, so identical questions within a campaign
+    # can share one provider answer.
+    cacheable = convo is None and settings.answer_cache_enabled
+    brand_id = _campaign_brand_id(db_session, campaign_id)
+    cache_start = time.monotonic()
+    cached_reply = answer_cache.get(campaign_id, brand_id, user_message) if cacheable else None
+
+    if cached_reply is not None:
+        assistant_reply = cached_reply
+        latency_ms = int((time.monotonic() - cache_start) * 1000)
+        provider = "answer_cache"
+    else:
+        check_deadline("conversation load")
+        provider_messages = _with_knowledge(
+            _provider_messages(db_session, convo.id if convo else None, campaign_id, user_message),
+            brand_id,
+            user_message,
         )
+        with admission_scope(brand_id or campaign_id):
+            assistant_reply, latency_ms = _call_openrouter(provider_messages)
+        assistant_reply = _normalize_assistant_reply(assistant_reply)
+        provider = "openrouter"
+        if cacheable:
+            answer_cache.put(campaign_id, brand_id, user_message, assistant_reply)
+
+    target_id = convo.id if convo else str(uuid.uuid4())
+    events = [("chat_message_completed", {"latency_ms": latency_ms, "cache_hit": cached_reply is not None})]
+    events.extend((event_type, {"latency_ms": latency_ms, **payload}) for event_type, payload in extra_events or [])
+
+    reply = (assistant_reply, provider, latency_ms)
+    run_write(
+        db_session,
+        _turn_writer(convo, target_id, campaign_id, recipient_email, token_id, user_message, asked_at, reply),
     )
-    db_session.flush()
-
-    provider_messages = _provider_messages(db_session, convo.id)
-    assistant_reply, latency_ms = _call_openrouter(provider_messages)
-    assistant_reply = _normalize_assistant_reply(assistant_reply)
-
-    db_session.add(
-        Message(
-            conversation_id=convo.id,
-            role="assistant",
-            content=assistant_reply,
-            provider="openrouter",
-            latency_ms=latency_ms,
-            created_at=datetime.utcnow(),
-        )
+    for event_type, payload in events:
+        emit_event(event_type, campaign_id=campaign_id, conversation_id=target_id, payload=payload)
+    return target_id, assistant_reply, latency_ms
+
+
+def record_unanswered_turn(
+    db_session, campaign_id: str, recipient_email: str, token_id: str, user_message: str, convo_id: str | None
+) -> str:
+    """Keep the user's message when the turn ran out of time; returns the conversation id.
+
+    Only the question is stored, not the canned fallback reply, so a resend of the
+    same message is answered normally instead of being deduplicated to the fallback.
+    """
+    convo = _load_conversation(db_session, campaign_id, recipient_email, convo_id)
+    target_id = convo.id if convo else str(uuid.uuid4())
+    asked_at = datetime.utcnow()
+    return run_write(
+        db_session,
+        _turn_writer(convo, target_id, campaign_id, recipient_email, token_id, user_message, asked_at, None),
     )
-    convo.last_message_at = datetime.utcnow()
-
-    db_session.add(
-        Event(
-            campaign_id=campaign_id,
-            conversation_id=convo.id,
-            event_type="chat_message_completed",
-            payload_json=f'{{"latency_ms": {latency_ms}}}',
-        )
-    )
-    db_session.commit()
-    return convo.id, assistant_reply, latency_ms
 
 
-def get_conversation_messages(db_session, convo_id: str) -> list[dict[str, str]]:
-    rows = (
+def find_recent_reply(
+    db_session,
+    campaign_id: str,
+    recipient_email: str,
+    token_id: str,
+    user_message: str,
+    convo_id: str | None,
+    window_sec: float,
+) -> tuple[str, str] | None:
+    """Return (convo_id, reply) if this exact message was already answered within the window."""
+    cutoff = datetime.utcnow() - timedelta(seconds=window_sec)
+    if convo_id:
+        convo = db_session.query(Conversation).filter_by(id=convo_id).one_or_none()
+    else:
+        convo = (
+            db_session.query(Conversation)
+            .filter_by(campaign_id=campaign_id, recipient_email=recipient_email, token_id=token_id)
+            .filter(Conversation.created_at >= cutoff)
+            .order_by(desc(Conversation.created_at))
+            .first()
+        )
+    if convo is None or convo.campaign_id != campaign_id or convo.recipient_email != recipient_email:
+        return None
+
+    last_two = (
         db_session.query(Message)
-        .filter(Message.conversation_id == convo_id)
-        .order_by(asc(Message.created_at), asc(Message.id))
+        .filter(Message.conversation_id == convo.id)
+        .order_by(desc(Message.created_at), desc(Message.id))
+        .limit(2)
         .all()
     )
+    if len(last_two) < 2:
+        return None
+    reply, asked = last_two
+    if reply.role != "assistant" or asked.role != "user" or asked.content != user_message:
+        return None
+    if asked.created_at is None or asked.created_at < cutoff:
+        return None
+    if not convo_id:
+        # A first-turn duplicate must match a conversation that holds only that one exchange.
+        total = db_session.query(func.count(Message.id)).filter(Message.conversation_id == convo.id).scalar()
+        if total != 2:
+            return None
+    return convo.id, reply.content
+
+
+def get_conversation_messages(
+    db_session, convo_id: str, since_id: int | None = None, limit: int | None = None
+) -> list[dict[str, Any]]:
+    """Messages in insertion order, optionally only those after ``since_id`` and at most ``limit``."""
+    query = db_session.query(Message).filter(Message.conversation_id == convo_id)
+    if since_id is not None:
+        query = query.filter(Message.id > since_id)
+    query = query.order_by(asc(Message.id))
+    if limit is not None:
+        query = query.limit(limit)
     return [
         {
+            "id": row.id,
             "role": row.role,
             "content": row.content,
             "created_at": row.created_at.isoformat() if row.created_at else None,
         }
-        for row in rows
+        for row in query.all()
     ]
+
+
+def last_message_id(db_session, convo_id: str) -> int:
+    return db_session.query(func.max(Message.id)).filter(Message.conversation_id == convo_id).scalar() or 0
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import func, select, tuple_
+
+from models import Conversation, Message
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(last_message_at: datetime, convo_id: str) -> str:
+    raw = f"{last_message_at.isoformat()}|{convo_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        at, convo_id = raw.split("|", 1)
+        return datetime.fromisoformat(at), convo_id
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise CursorError("Invalid cursor") from exc
+
+
+def page_size(value: Any, default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        size = int(value) if value not in (None, "") else default
+    except (TypeError, ValueError) as exc:
+        raise CursorError("limit must be an integer") from exc
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def last_messages(db_session, convo_ids: list[str]) -> dict[str, str]:
+    """Latest message content per conversation in one windowed query."""
+    if not convo_ids:
+        return {}
+    ranked = (
+        select(
+            Message.conversation_id,
+            Message.content,
+            func.row_number()
+            .over(partition_by=Message.conversation_id, order_by=(Message.created_at.desc(), Message.id.desc()))
+            .label("rank"),
+        )
+        .where(Message.conversation_id.in_(convo_ids))
+        .subquery()
+    )
+    rows = db_session.execute(select(ranked.c.conversation_id, ranked.c.content).where(ranked.c.rank == 1))
+    return {convo_id: content for convo_id, content in rows}
+
+
+def list_conversations(
+    db_session,
+    campaign_id: str | None = None,
+    recipient_email: str | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    with_last_message: bool = True,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Newest-first page keyed on (last_message_at, id); returns the rows and the next cursor."""
+    query = db_session.query(Conversation)
+    if campaign_id:
+        query = query.filter(Conversation.campaign_id == campaign_id)
+    if recipient_email:
+        query = query.filter(Conversation.recipient_email == recipient_email)
+    if cursor:
+        cursor_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Conversation.last_message_at, Conversation.id) < tuple_(cursor_at, cursor_id))
+
+    rows = query.order_by(Conversation.last_message_at.desc(), Conversation.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].last_message_at, rows[-1].id)
+
+    previews = last_messages(db_session, [row.id for row in rows]) if with_last_message else {}
+    return [
+        {
+            "convo_id": row.id,
+            "campaign_id": row.campaign_id,
+            "recipient_email": row.recipient_email,
+            "last_message": previews.get(row.id, ""),
+            "last_message_at": row.last_message_at,
+        }
+        for row in rows
+    ], next_cursor
@@ -1,18 +1,96 @@
-from sqlalchemy import create_engine
+from typing import Any
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from app_config import settings
 
 
+ENGINE_PROFILES = ("auto", "sqlite", "server", "default")
+
+
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(settings.database_url, future=True)
+def resolve_profile(database_url: str, profile: str) -> str:
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; expected one of {', '.join(ENGINE_PROFILES)}")
+    if profile != "auto":
+        return profile
+    return "sqlite" if make_url(database_url).get_backend_name() == "sqlite" else "server"
+
+
+def sqlite_pragmas(database_url: str) -> dict[str, Any]:
+    pragmas: dict[str, Any] = {
+        "busy_timeout": settings.db_busy_timeout_ms,
+        "cache_size": -settings.db_sqlite_cache_kib,
+    }
+    database = make_url(database_url).database
+    if database and database != ":memory:":
+        # WAL lets readers run alongside the single writer; NORMAL only fsyncs at checkpoints.
+        # auto_vacuum only takes effect on a new database file; it lets retention sweeps give space back.
+        pragmas.update(
+            auto_vacuum="INCREMENTAL",
+            journal_mode="WAL",
+            synchronous="NORMAL",
+            mmap_size=settings.db_sqlite_mmap_bytes,
+        )
+    return pragmas
+
+
+def engine_options(database_url: str, profile: str) -> dict[str, Any]:
+    if profile == "sqlite":
+        return {"connect_args": {"timeout": settings.db_busy_timeout_ms / 1000, "check_same_thread": False}}
+    if profile == "server":
+        return {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout_sec,
+            "pool_recycle": settings.db_pool_recycle_sec,
+            "pool_pre_ping": True,
+        }
+    return {}
+
+
+def make_engine(database_url: str, profile: str) -> Engine:
+    """Build an engine for an already-resolved profile (see ``resolve_profile``)."""
+    new_engine = create_engine(database_url, future=True, **engine_options(database_url, profile))
+
+    if profile == "sqlite":
+        pragmas = sqlite_pragmas(database_url)
+
+        @event.listens_for(new_engine, "connect")
+        def _apply_pragmas(dbapi_connection, _record) -> None:
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return new_engine
+
+
+def describe_engine(target: Engine, profile: str) -> dict[str, Any]:
+    """Effective engine settings, read back from the database where possible."""
+    info: dict[str, Any] = {"profile": profile, "url": target.url.render_as_string()}
+    if profile == "sqlite":
+        with target.connect() as conn:
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "auto_vacuum"):
+                info[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    else:
+        info["pool"] = target.pool.status()
+    return info
+
+
+engine_profile = resolve_profile(settings.database_url, settings.db_profile)
+engine = make_engine(settings.database_url, engine_profile)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
 
 
 def init_db() -> None:
     import models  # noqa: F401
+    from migrations import run_migrations
 
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """Absolute time budget for one request, shared by DB work, provider attempts and backoff."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.budget_sec = seconds
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str) -> None:
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline of {self.budget_sec:g}s exceeded during {stage}")
+
+    def cap(self, timeout: float, stage: str = "provider call") -> float:
+        """Clamp a per-operation timeout to the remaining budget."""
+        self.check(stage)
+        return min(timeout, self.remaining())
+
+    def allows(self, seconds: float) -> bool:
+        return self.remaining() > seconds
+
+
+_current: ContextVar[Deadline | None] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Deadline | None:
+    return _current.get()
+
+
+def check_deadline(stage: str) -> None:
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[Deadline]:
+    deadline = Deadline(seconds)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import atexit
+import json
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from app_config import settings
+from database import SessionLocal
+from event_store import EVENTS_NDJSON, write_events
+from write_queue import run_write_in
+
+
+EventWriter = Callable[[list[dict[str, Any]]], None]
+
+
+def db_writer(session_factory: Callable[[], Any] = SessionLocal) -> EventWriter:
+    def write(batch: list[dict[str, Any]]) -> None:
+        run_write_in(session_factory, lambda db: write_events(db, batch))
+
+    return write
+
+
+def ndjson_writer(path: Path) -> EventWriter:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(batch: list[dict[str, Any]]) -> None:
+        lines = [json.dumps({**row, "created_at": row["created_at"].isoformat()}) for row in batch]
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write("\n".join(lines) + "\n")
+
+    return write
+
+
+class EventSink:
+    """Bounded in-memory event buffer drained by a background flusher in batches.
+
+    ``emit`` never touches the database. When the buffer is full it waits up to
+    ``block_timeout_sec`` for room (0 means drop immediately) and otherwise drops
+    the event, counting drops per event type. A batch whose write fails is retried
+    once and then dropped and counted.
+    """
+
+    def __init__(
+        self,
+        writer: EventWriter,
+        max_buffer: int = 10000,
+        batch_size: int = 500,
+        flush_interval_sec: float = 0.5,
+        block_timeout_sec: float = 0.0,
+    ):
+        self.writer = writer
+        self.max_buffer = max(1, max_buffer)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_sec = flush_interval_sec
+        self.block_timeout_sec = block_timeout_sec
+        self._buffer: deque[dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._in_flight = 0
+        self._emitted = 0
+        self._written = 0
+        self._batches = 0
+        self._write_errors = 0
+        self._dropped: Counter[str] = Counter()
+
+    def emit(
+        self,
+        event_type: str,
+        campaign_id: str | None = None,
+        conversation_id: str | None = None,
+        payload: dict[str, Any] | None = None,
+    ) -> bool:
+        """Buffer one event; returns False if it was dropped because the buffer stayed full."""
+        row = {
+            "campaign_id": campaign_id,
+            "conversation_id": conversation_id,
+            "event_type": event_type,
+            "payload_json": json.dumps(payload or {}),
+            "created_at": datetime.utcnow(),
+        }
+        self._ensure_started()
+        with self._cond:
+            if len(self._buffer) >= self.max_buffer and self.block_timeout_sec > 0:
+                self._cond.wait_for(lambda: len(self._buffer) < self.max_buffer, timeout=self.block_timeout_sec)
+            if len(self._buffer) >= self.max_buffer:
+                self._dropped[event_type] += 1
+                return False
+            self._buffer.append(row)
+            self._emitted += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything emitted so far has been written (or dropped)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._buffer or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._loop, name="event-sink", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._buffer) >= self.batch_size,
+                    timeout=self.flush_interval_sec,
+                )
+                if self._stopping and not self._buffer:
+                    return
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                self._in_flight = len(batch)
+                # Room was freed for emitters blocked on a full buffer.
+                self._cond.notify_all()
+            if batch:
+                self._write(batch)
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        for attempt in range(2):
+            try:
+                self.writer(batch)
+            except Exception:  # noqa: BLE001
+                if attempt == 0:
+                    continue
+                with self._cond:
+                    self._write_errors += 1
+                    for row in batch:
+                        self._dropped[row["event_type"]] += 1
+                return
+            with self._cond:
+                self._written += len(batch)
+                self._batches += 1
+            return
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "buffered": len(self._buffer),
+                "emitted": self._emitted,
+                "written": self._written,
+                "batches": self._batches,
+                "write_errors": self._write_errors,
+                "dropped": sum(self._dropped.values()),
+                "dropped_by_type": dict(self._dropped),
+            }
+
+
+def _default_writer() -> EventWriter:
+    if settings.event_sink_mode == "ndjson":
+        return ndjson_writer(EVENTS_NDJSON)
+    return db_writer()
+
+
+event_sink = EventSink(
+    _default_writer(),
+    max_buffer=settings.event_buffer_max,
+    batch_size=settings.event_batch_size,
+    flush_interval_sec=settings.event_flush_interval_sec,
+    block_timeout_sec=settings.event_block_timeout_ms / 1000,
+)
+atexit.register(event_sink.stop)
+
+
+def emit_event(
+    event_type: str,
+    campaign_id: str | None = None,
+    conversation_id: str | None = None,
+    payload: dict[str, Any] | None = None,
+) -> bool:
+    return event_sink.emit(event_type, campaign_id, conversation_id, payload)
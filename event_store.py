@@ -0,0 +1,199 @@
+"""Daily event partitions, hourly rollups and gzip NDJSON archival.
+
+Events land in one table per UTC day (``events_YYYYMMDD``) and are counted into
+``event_rollups`` by (hour, campaign, event type) in the same transaction.
+Analytics read the rollups; partitions older than the retention window are
+streamed to ``data/event_archive/events_YYYYMMDD.ndjson.gz`` and dropped. The
+legacy ``events`` table is archived the same way, by day, as its rows age out.
+With EVENT_SINK_MODE=ndjson events go to ``data/events.ndjson`` instead and no
+rollups are kept.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import re
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    bindparam,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+)
+
+from app_config import DATA_DIR
+from models import Event, EventRollup
+
+
+ARCHIVE_DIR = DATA_DIR / "event_archive"
+EVENTS_NDJSON = DATA_DIR / "events.ndjson"
+PARTITION_RE = re.compile(r"^events_(\d{8})$")
+_partition_metadata = MetaData()
+
+
+def partition_name(day: date) -> str:
+    return f"events_{day:%Y%m%d}"
+
+
+def partition_table(name: str) -> Table:
+    table = _partition_metadata.tables.get(name)
+    if table is None:
+        table = Table(
+            name,
+            _partition_metadata,
+            Column("id", Integer, primary_key=True),
+            Column("campaign_id", String(36), nullable=True),
+            Column("conversation_id", String(36), nullable=True),
+            Column("event_type", String(120), nullable=False),
+            Column("payload_json", Text, nullable=False),
+            Column("created_at", DateTime, nullable=False),
+            Index(f"ix_{name}_campaign", "campaign_id", "event_type"),
+        )
+    return table
+
+
+def ensure_partition(db_session, day: date) -> Table:
+    table = partition_table(partition_name(day))
+    table.create(bind=db_session.connection(), checkfirst=True)
+    return table
+
+
+def list_partitions(db_session) -> list[tuple[date, str]]:
+    partitions = []
+    for name in inspect(db_session.connection()).get_table_names():
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions.append((datetime.strptime(match.group(1), "%Y%m%d").date(), name))
+    return sorted(partitions)
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def add_rollups(db_session, counts: Counter) -> None:
+    """Upsert ``{(bucket_hour, campaign_id, event_type): n}`` into event_rollups."""
+    statement = text(
+        "INSERT INTO event_rollups (bucket_hour, campaign_id, event_type, count) "
+        "VALUES (:bucket_hour, :campaign_id, :event_type, :count) "
+        "ON CONFLICT (bucket_hour, campaign_id, event_type) DO UPDATE SET count = event_rollups.count + excluded.count"
+    ).bindparams(bindparam("bucket_hour", type_=DateTime))
+    db_session.execute(
+        statement,
+        [
+            {"bucket_hour": bucket, "campaign_id": campaign_id, "event_type": event_type, "count": count}
+            for (bucket, campaign_id, event_type), count in counts.items()
+        ],
+    )
+
+
+def write_events(db_session, batch: list[dict[str, Any]]) -> None:
+    """Insert events into their day partitions and bump the hourly rollups; callers commit."""
+    by_day: dict[date, list[dict[str, Any]]] = {}
+    counts: Counter = Counter()
+    for row in batch:
+        created_at = row["created_at"]
+        by_day.setdefault(created_at.date(), []).append(row)
+        counts[(hour_bucket(created_at), row.get("campaign_id") or "", row["event_type"])] += 1
+
+    for day, rows in by_day.items():
+        db_session.execute(insert(ensure_partition(db_session, day)), rows)
+    if counts:
+        add_rollups(db_session, counts)
+
+
+def rollup_counts(
+    db_session,
+    campaign_id: str | None = None,
+    event_types: Iterable[str] | None = None,
+    since: datetime | None = None,
+    by_hour: bool = False,
+) -> list[dict[str, Any]]:
+    columns = [EventRollup.campaign_id, EventRollup.event_type]
+    if by_hour:
+        columns.insert(0, EventRollup.bucket_hour)
+    query = db_session.query(*columns, func.sum(EventRollup.count).label("count"))
+    if campaign_id is not None:
+        query = query.filter(EventRollup.campaign_id == campaign_id)
+    if event_types is not None:
+        query = query.filter(EventRollup.event_type.in_(list(event_types)))
+    if since is not None:
+        query = query.filter(EventRollup.bucket_hour >= hour_bucket(since))
+    rows = query.group_by(*columns).order_by(*columns).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def ndjson_event_counts(event_types: Iterable[str], path: Path | None = None) -> dict[str, int]:
+    """Per-campaign counts of ``event_types`` read straight from the NDJSON event log."""
+    path = path or EVENTS_NDJSON
+    wanted = set(event_types)
+    counts: Counter = Counter()
+    if not path.exists():
+        return {}
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get("event_type") in wanted:
+                counts[row.get("campaign_id") or ""] += 1
+    return dict(counts)
+
+
+def _archive_rows(rows: Iterable[Any], path: Path) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    # Appending a gzip member keeps earlier archives for the same day readable.
+    with gzip.open(path, "at", encoding="utf-8") as handle:
+        for row in rows:
+            record = dict(row._mapping)
+            record["created_at"] = record["created_at"].isoformat()
+            handle.write(json.dumps(record) + "\n")
+            written += 1
+    return written
+
+
+def archive_expired(
+    db_session, retention_days: int, today: date | None = None, archive_dir: Path | None = None
+) -> dict[str, int]:
+    """Move partitions (and legacy ``events`` rows) older than ``retention_days`` to gzip NDJSON."""
+    archive_dir = archive_dir or ARCHIVE_DIR
+    cutoff = (today or datetime.utcnow().date()) - timedelta(days=retention_days)
+    archived: dict[str, int] = {}
+
+    for day, name in list_partitions(db_session):
+        if day >= cutoff:
+            continue
+        table = partition_table(name)
+        rows = db_session.execute(select(table).order_by(table.c.id)).yield_per(1000)
+        archived[name] = _archive_rows(rows, archive_dir / f"{name}.ndjson.gz")
+        table.drop(bind=db_session.connection())
+        db_session.commit()
+
+    cutoff_at = datetime.combine(cutoff, datetime.min.time())
+    while True:
+        oldest = db_session.query(func.min(Event.created_at)).filter(Event.created_at < cutoff_at).scalar()
+        if oldest is None:
+            break
+        day_start = datetime.combine(oldest.date(), datetime.min.time())
+        window = (Event.created_at >= day_start, Event.created_at < min(day_start + timedelta(days=1), cutoff_at))
+        rows = db_session.execute(select(Event.__table__).where(*window).order_by(Event.id)).yield_per(1000)
+        name = partition_name(oldest.date())
+        archived[f"events:{oldest.date()}"] = _archive_rows(rows, archive_dir / f"{name}.ndjson.gz")
+        db_session.query(Event).filter(*window).delete(synchronize_session=False)
+        db_session.commit()
+    return archived
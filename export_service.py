@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from sqlalchemy import select, tuple_
+
+from conversation_service import decode_cursor, encode_cursor
+from models import Conversation, Message
+
+
+EXPORT_FETCH_SIZE = 500
+# Sync-flush the gzip stream every this many conversations so readers can decode what arrived so far.
+GZIP_FLUSH_EVERY = 100
+
+
+def _iso(value) -> str | None:
+    return value.isoformat() if value else None
+
+
+def iter_campaign_conversations(
+    db_session, campaign_id: str, cursor: str | None = None
+) -> Iterator[dict[str, Any]]:
+    """Stream a campaign's conversations with their messages, oldest first.
+
+    One ordered join is read through a server-side cursor in ``EXPORT_FETCH_SIZE``
+    chunks, so memory stays bounded by the longest conversation. Each record carries
+    the ``cursor`` to resume after it. Raises ``CursorError`` for a bad cursor.
+    """
+    query = (
+        select(
+            Conversation.id,
+            Conversation.recipient_email,
+            Conversation.token_id,
+            Conversation.created_at,
+            Conversation.last_message_at,
+            Message.id,
+            Message.role,
+            Message.content,
+            Message.provider,
+            Message.latency_ms,
+            Message.created_at,
+        )
+        .outerjoin(Message, Message.conversation_id == Conversation.id)
+        .where(Conversation.campaign_id == campaign_id)
+        .order_by(Conversation.created_at, Conversation.id, Message.created_at, Message.id)
+    )
+    if cursor:
+        cursor_at, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(Conversation.created_at, Conversation.id) > tuple_(cursor_at, cursor_id))
+
+    current: dict[str, Any] | None = None
+    rows = db_session.execute(query.execution_options(yield_per=EXPORT_FETCH_SIZE))
+    for convo_id, email, token_id, created_at, last_at, msg_id, role, content, provider, latency, msg_at in rows:
+        if current is None or current["convo_id"] != convo_id:
+            if current is not None:
+                yield current
+            current = {
+                "convo_id": convo_id,
+                "campaign_id": campaign_id,
+                "recipient_email": email,
+                "token_id": token_id,
+                "created_at": _iso(created_at),
+                "last_message_at": _iso(last_at),
+                "messages": [],
+                "cursor": encode_cursor(created_at, convo_id),
+            }
+        if msg_id is not None:
+            current["messages"].append(
+                {
+                    "id": msg_id,
+                    "role": role,
+                    "content": content,
+                    "provider": provider,
+                    "latency_ms": latency,
+                    "created_at": _iso(msg_at),
+                }
+            )
+    if current is not None:
+        yield current
+
+
+def ndjson_lines(records: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    for record in records:
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def gzip_chunks(lines: Iterable[bytes], flush_every: int = GZIP_FLUSH_EVERY) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for count, line in enumerate(lines, start=1):
+        chunk = compressor.compress(line)
+        if count % flush_every == 0:
+            chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def export_stream(session_factory, campaign_id: str, cursor: str | None = None, compress: bool = False) -> Iterator[bytes]:
+    """Encoded export owning its own session, for generator responses that outlive the request handler."""
+    with session_factory() as db:
+        lines = ndjson_lines(iter_campaign_conversations(db, campaign_id, cursor))
+        yield from gzip_chunks(lines) if compress else lines
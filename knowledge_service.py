@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app_config import BASE_DIR, DATA_DIR, settings
+
+
+KNOWLEDGE_DIR = BASE_DIR / "config" / "knowledge"
+INDEX_DIR = DATA_DIR / "knowledge"
+SOURCE_SUFFIXES = {".md", ".txt"}
+
+_TERM_RE = re.compile(r"[A-Za-z0-9]{2,}")
+
+
+def chunk_text(text: str, max_chars: int) -> list[str]:
+    """Split on blank lines and pack paragraphs into chunks of at most ``max_chars``."""
+    chunks: list[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(line.strip().lstrip("#").strip() for line in paragraph.splitlines()).strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 1 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {paragraph}".strip()
+        while len(current) > max_chars:
+            chunks.append(current[:max_chars])
+            current = current[max_chars:]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _match_query(text: str) -> str:
+    terms = sorted({term.lower() for term in _TERM_RE.findall(text)})
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class KnowledgeIndex:
+    """On-disk BM25 (SQLite FTS5) index over one brand's knowledge files.
+
+    The index lives in ``data/knowledge/<brand_id>.sqlite`` and is read through a
+    memory-mapped connection. ``refresh`` re-chunks only files whose size, mtime
+    and content hash changed, and drops chunks for deleted files.
+    """
+
+    def __init__(self, brand_id: str, source_dir: Path, index_path: Path):
+        self.brand_id = brand_id
+        self.source_dir = source_dir
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(index_path), check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size={settings.knowledge_mmap_bytes}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha256 TEXT)"
+        )
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(content, path UNINDEXED, tokenize='porter')"
+        )
+        self._conn.commit()
+
+    def refresh(self, force: bool = False) -> dict[str, int]:
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_refresh < settings.knowledge_refresh_sec:
+                return stats
+            self._last_refresh = now
+
+            known = {
+                row[0]: (row[1], row[2], row[3])
+                for row in self._conn.execute("SELECT path, mtime_ns, size, sha256 FROM sources")
+            }
+            files = {}
+            if self.source_dir.is_dir():
+                files = {
+                    str(path.relative_to(self.source_dir)): path
+                    for path in sorted(self.source_dir.rglob("*"))
+                    if path.is_file() and path.suffix in SOURCE_SUFFIXES
+                }
+
+            for rel_path, path in files.items():
+                stat = path.stat()
+                previous = known.get(rel_path)
+                if previous and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+                    continue
+                raw = path.read_bytes()
+                digest = hashlib.sha256(raw).hexdigest()
+                if previous and previous[2] == digest:
+                    self._conn.execute(
+                        "UPDATE sources SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (stat.st_mtime_ns, stat.st_size, rel_path),
+                    )
+                    continue
+
+                self._conn.execute("DELETE FROM chunks WHERE path = ?", (rel_path,))
+                self._conn.executemany(
+                    "INSERT INTO chunks (content, path) VALUES (?, ?)",
+                    [
+                        (chunk, rel_path)
+                        for chunk in chunk_text(raw.decode("utf-8", "replace"), settings.knowledge_chunk_chars)
+                    ],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+                    (rel_path, stat.st_mtime_ns, stat.st_size, digest),
+                )
+                stats["updated" if previous else "added"] += 1
+
+            for rel_path in set(known) - set(files):
+                self._conn.execute("DELETE FROM chunks WHERE path = ?", (rel_path,))
+                self._conn.execute("DELETE FROM sources WHERE path = ?", (rel_path,))
+                stats["removed"] += 1
+
+            self._conn.commit()
+        return stats
+
+    def search(self, query: str, k: int) -> list[str]:
+        match = _match_query(query)
+        if not match:
+            return []
+        self.refresh()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT content FROM chunks WHERE chunks MATCH ? ORDER BY bm25(chunks) LIMIT ?",
+                (match, k),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+_indexes: dict[str, KnowledgeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(brand_id: str) -> KnowledgeIndex | None:
+    source_dir = KNOWLEDGE_DIR / brand_id
+    if not brand_id or not source_dir.is_dir():
+        return None
+    with _indexes_lock:
+        index = _indexes.get(brand_id)
+        if index is None:
+            index = KnowledgeIndex(brand_id, source_dir, INDEX_DIR / f"{brand_id}.sqlite")
+            _indexes[brand_id] = index
+    return index
+
+
+def relevant_snippets(brand_id: str, query: str, k: int | None = None) -> list[str]:
+    if not settings.knowledge_enabled:
+        return []
+    index = get_index(brand_id)
+    if index is None:
+        return []
+    return index.search(query, k or settings.knowledge_top_k)
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+
+from app_config import settings
+from database import SessionLocal
+from models import LatencyHistogram
+from write_queue import run_write_in
+
+
+# 16 buckets per doubling: each bucket spans ~4.4%, so reported percentiles are within ~2.2%.
+BUCKETS_PER_DOUBLING = 16
+_SCALE = BUCKETS_PER_DOUBLING / math.log(2)
+
+
+class LogHistogram:
+    """Mergeable log-bucketed histogram of millisecond latencies."""
+
+    __slots__ = ("buckets", "count", "sum_ms", "min_ms", "max_ms")
+
+    def __init__(self):
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.sum_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    @staticmethod
+    def bucket_index(value_ms: float) -> int:
+        return int(math.floor(math.log(max(value_ms, 1.0)) * _SCALE))
+
+    @staticmethod
+    def bucket_value(index: int) -> float:
+        return 2 ** ((index + 0.5) / BUCKETS_PER_DOUBLING)
+
+    def record(self, value_ms: float, count: int = 1) -> None:
+        value_ms = max(0.0, float(value_ms))
+        index = self.bucket_index(value_ms)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.sum_ms += value_ms * count
+        self.min_ms = min(self.min_ms, value_ms)
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def merge(self, other: LogHistogram) -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.max_ms, max(self.min_ms, self.bucket_value(index)))
+        return self.max_ms
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.sum_ms / self.count, 1) if self.count else 0.0,
+            "p50": round(self.quantile(0.50), 1),
+            "p95": round(self.quantile(0.95), 1),
+            "p99": round(self.quantile(0.99), 1),
+            "max": round(self.max_ms, 1),
+        }
+
+    def buckets_json(self) -> str:
+        return json.dumps({str(index): count for index, count in sorted(self.buckets.items())})
+
+    @classmethod
+    def from_row(cls, row: LatencyHistogram) -> LogHistogram:
+        histogram = cls()
+        histogram.buckets = {int(index): count for index, count in json.loads(row.buckets_json).items()}
+        histogram.count = row.count
+        histogram.sum_ms = row.sum_ms
+        histogram.min_ms = row.min_ms if row.count else math.inf
+        histogram.max_ms = row.max_ms
+        return histogram
+
+
+def _window_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+HistogramKey = tuple[datetime, str, str, str]
+
+
+class LatencyRegistry:
+    """Per (hour, metric, campaign, model) histograms, merged into latency_histograms on flush."""
+
+    def __init__(self, flush_interval_sec: float):
+        self.flush_interval_sec = flush_interval_sec
+        self._lock = threading.Lock()
+        self._pending: dict[HistogramKey, LogHistogram] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def record(self, metric: str, value_ms: float, campaign_id: str = "", model: str = "") -> None:
+        key = (_window_start(datetime.utcnow()), metric, campaign_id or "", model or "")
+        with self._lock:
+            histogram = self._pending.get(key)
+            if histogram is None:
+                histogram = self._pending[key] = LogHistogram()
+            histogram.record(value_ms)
+        self._ensure_started()
+
+    def pending(self) -> dict[HistogramKey, LogHistogram]:
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        """Merge pending histograms into the stored rows; returns how many rows were touched."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        def apply(db) -> None:
+            for (window_start, metric, campaign_id, model), histogram in pending.items():
+                row = db.get(LatencyHistogram, (window_start, metric, campaign_id, model))
+                if row is None:
+                    row = LatencyHistogram(
+                        window_start=window_start, metric=metric, campaign_id=campaign_id, model=model
+                    )
+                    db.add(row)
+                    merged = histogram
+                else:
+                    merged = LogHistogram.from_row(row)
+                    merged.merge(histogram)
+                row.count = merged.count
+                row.sum_ms = merged.sum_ms
+                row.min_ms = merged.min_ms
+                row.max_ms = merged.max_ms
+                row.buckets_json = merged.buckets_json()
+
+        try:
+            run_write_in(SessionLocal, apply)
+        except Exception:
+            # Put the samples back so the next flush retries them.
+            with self._lock:
+                for key, histogram in pending.items():
+                    current = self._pending.setdefault(key, LogHistogram())
+                    current.merge(histogram)
+            raise
+        return len(pending)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="latency-flush", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.flush_interval_sec):
+            try:
+                self.flush()
+            except Exception:  # noqa: BLE001
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:  # noqa: BLE001
+            pass
+
+
+latency_registry = LatencyRegistry(settings.latency_flush_sec)
+atexit.register(latency_registry.stop)
+
+
+_labels: ContextVar[dict[str, str] | None] = ContextVar("latency_labels", default=None)
+
+
+@contextmanager
+def latency_scope(campaign_id: str, metric_suffix: str = "") -> Iterator[dict[str, str]]:
+    """Label latencies recorded in this request with its campaign and the model that answered.
+
+    ``metric_suffix`` files background work (``"_warmup"``) under its own metrics.
+    """
+    labels = {"campaign_id": campaign_id, "model": "", "metric_suffix": metric_suffix}
+    token = _labels.set(labels)
+    try:
+        yield labels
+    finally:
+        _labels.reset(token)
+
+
+def record_latency(metric: str, value_ms: float, campaign_id: str | None = None, model: str | None = None) -> None:
+    labels = _labels.get() or {}
+    if model and labels:
+        labels["model"] = model
+    latency_registry.record(
+        metric + labels.get("metric_suffix", ""),
+        value_ms,
+        campaign_id if campaign_id is not None else labels.get("campaign_id", ""),
+        model if model is not None else labels.get("model", ""),
+    )
+
+
+def latency_summary(db_session, campaign_id: str | None = None, since_hours: float = 24) -> list[dict[str, Any]]:
+    """p50/p95/p99 per (metric, campaign, model) over stored windows plus unflushed samples."""
+    since = _window_start(datetime.utcnow() - timedelta(hours=since_hours))
+    merged: dict[tuple[str, str, str], LogHistogram] = {}
+
+    def _add(metric: str, row_campaign: str, model: str, histogram: LogHistogram) -> None:
+        merged.setdefault((metric, row_campaign, model), LogHistogram()).merge(histogram)
+
+    query = db_session.query(LatencyHistogram).filter(LatencyHistogram.window_start >= since)
+    if campaign_id is not None:
+        query = query.filter(LatencyHistogram.campaign_id == campaign_id)
+    for row in query:
+        _add(row.metric, row.campaign_id, row.model, LogHistogram.from_row(row))
+    for (window_start, metric, row_campaign, model), histogram in latency_registry.pending().items():
+        if window_start >= since and (campaign_id is None or row_campaign == campaign_id):
+            _add(metric, row_campaign, model, histogram)
+
+    return [
+        {"metric": metric, "campaign_id": row_campaign, "model": model, **histogram.summary()}
+        for (metric, row_campaign, model), histogram in sorted(merged.items())
+    ]
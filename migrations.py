@@ -0,0 +1,114 @@
+"""Ordered schema migrations applied on top of ``Base.metadata.create_all``.
+
+``create_all`` only creates missing tables, so columns and indexes added to
+existing tables ship as numbered steps here. Each step runs once, in its own
+transaction, and is recorded in ``schema_migrations``. Steps must be idempotent
+(``IF NOT EXISTS``) because a fresh database already gets every index declared
+in ``models`` from ``create_all``.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+
+def _hot_path_indexes(conn: Connection) -> None:
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_campaigns_created_at ON campaigns (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_campaign_recipients_lookup ON campaign_recipients (campaign_id, email, token_id)",
+        "CREATE INDEX IF NOT EXISTS ix_conversations_owner "
+        "ON conversations (campaign_id, recipient_email, token_id, last_message_at)",
+        "CREATE INDEX IF NOT EXISTS ix_conversations_recent ON conversations (last_message_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_messages_conversation_order ON messages (conversation_id, created_at, id)",
+    ):
+        conn.execute(text(statement))
+
+
+def _backfill_event_rollups(conn: Connection) -> None:
+    from collections import Counter
+
+    from event_store import add_rollups, hour_bucket
+    from models import Event
+
+    counts: Counter = Counter()
+    rows = conn.execute(select(Event.created_at, Event.campaign_id, Event.event_type)).yield_per(5000)
+    for created_at, campaign_id, event_type in rows:
+        counts[(hour_bucket(created_at), campaign_id or "", event_type)] += 1
+    if counts:
+        add_rollups(conn, counts)
+
+
+def _export_order_index(conn: Connection) -> None:
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_conversations_export ON conversations (campaign_id, created_at, id)")
+    )
+
+
+def _recipient_open_count(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("campaign_recipients")}
+    if "open_count" not in columns:
+        conn.execute(text("ALTER TABLE campaign_recipients ADD COLUMN open_count INTEGER NOT NULL DEFAULT 0"))
+
+
+def _messages_fts(conn: Connection) -> None:
+    """FTS5 index over messages.content, kept in sync by triggers (SQLite only)."""
+    if conn.dialect.name != "sqlite":
+        return
+    for statement in (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+        "content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+        "INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+        "INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+        "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+        "INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+        "INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content); END",
+        # Index messages written before the triggers existed.
+        "INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')",
+    ):
+        conn.execute(text(statement))
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "hot_path_indexes", _hot_path_indexes),
+    (2, "backfill_event_rollups", _backfill_event_rollups),
+    (3, "export_order_index", _export_order_index),
+    (4, "recipient_open_count", _recipient_open_count),
+    (5, "messages_fts", _messages_fts),
+]
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("schema_migrations"):
+            return set()
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Apply pending migrations in order; returns the versions applied."""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations "
+                "(version INTEGER PRIMARY KEY, name VARCHAR(120) NOT NULL, applied_at DATETIME NOT NULL)"
+            )
+        )
+
+    done = applied_versions(engine)
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :at)"),
+                {"version": version, "name": name, "at": datetime.utcnow()},
+            )
+        applied.append(version)
+    return applied
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database import Base
@@ -27,6 +27,7 @@ class Brand(Base):
 
 class Campaign(Base):
     __tablename__ = "campaigns"
+    __table_args__ = (Index("ix_campaigns_created_at", "created_at"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     brand_id: Mapped[str] = mapped_column(String(100), ForeignKey("brands.brand_id"))
@@ -43,6 +44,7 @@ class Campaign(Base):
 
 class CampaignRecipient(Base):
     __tablename__ = "campaign_recipients"
+    __table_args__ = (Index("ix_campaign_recipients_lookup", "campaign_id", "email", "token_id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     campaign_id: Mapped[str] = mapped_column(String(36), ForeignKey("campaigns.id"), index=True)
@@ -51,12 +53,18 @@ class CampaignRecipient(Base):
     token_id: Mapped[str] = mapped_column(String(36), index=True)
     sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     opened_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    open_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     campaign: Mapped[Campaign] = relationship(back_populates="recipients")
 
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_owner", "campaign_id", "recipient_email", "token_id", "last_message_at"),
+        Index("ix_conversations_recent", "last_message_at", "id"),
+        Index("ix_conversations_export", "campaign_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     campaign_id: Mapped[str] = mapped_column(String(36), index=True)
@@ -70,6 +78,7 @@ class Conversation(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (Index("ix_messages_conversation_order", "conversation_id", "created_at", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     conversation_id: Mapped[str] = mapped_column(String(36), ForeignKey("conversations.id"), index=True)
@@ -101,3 +110,55 @@ class TemplateRender(Base):
     brand_id: Mapped[str] = mapped_column(String(100), index=True)
     template_version: Mapped[str] = mapped_column(String(40), default="v1")
     rendered_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+
+
+class CampaignPrompt(Base):
+    __tablename__ = "campaign_prompts"
+
+    campaign_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    brand_id: Mapped[str] = mapped_column(String(100))
+    preset_id: Mapped[str] = mapped_column(String(100))
+    system_prompt: Mapped[str] = mapped_column(Text)
+    prompt_hash: Mapped[str] = mapped_column(String(64))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+
+
+class CampaignStats(Base):
+    __tablename__ = "campaign_stats"
+
+    campaign_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    recipient_count: Mapped[int] = mapped_column(Integer, default=0)
+    sent_count: Mapped[int] = mapped_column(Integer, default=0)
+    failed_count: Mapped[int] = mapped_column(Integer, default=0)
+    conversation_count: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+
+    name: Mapped[str] = mapped_column(String(80), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class EventRollup(Base):
+    __tablename__ = "event_rollups"
+
+    bucket_hour: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    campaign_id: Mapped[str] = mapped_column(String(36), primary_key=True, default="")
+    event_type: Mapped[str] = mapped_column(String(120), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class LatencyHistogram(Base):
+    __tablename__ = "latency_histograms"
+
+    window_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    metric: Mapped[str] = mapped_column(String(40), primary_key=True)
+    campaign_id: Mapped[str] = mapped_column(String(36), primary_key=True, default="")
+    model: Mapped[str] = mapped_column(String(120), primary_key=True, default="")
+    count: Mapped[int] = mapped_column(Integer, default=0)
+    sum_ms: Mapped[float] = mapped_column(Float, default=0.0)
+    min_ms: Mapped[float] = mapped_column(Float, default=0.0)
+    max_ms: Mapped[float] = mapped_column(Float, default=0.0)
+    buckets_json: Mapped[str] = mapped_column(Text, default="{}")
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import atexit
+import base64
+import threading
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy import bindparam, func, update
+
+from app_config import settings
+from database import SessionLocal
+from models import CampaignRecipient
+from token_service import sign_open_id
+from write_queue import run_write_in
+
+
+# Transparent 1x1 GIF, served from memory for every pixel request.
+PIXEL_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+OpenKey = tuple[str, str]
+
+
+def open_pixel_url(base_url: str, campaign_id: str, token_id: str) -> str:
+    return f"{base_url.rstrip('/')}/o/{sign_open_id(campaign_id, token_id)}.gif"
+
+
+class OpenTracker:
+    """Coalesces pixel hits per recipient in memory and applies them in batched UPDATEs.
+
+    Repeat opens of the same recipient between flushes collapse into one pending
+    entry holding the first open time and a hit count. A flush keeps the earliest
+    ``opened_at`` and adds the hits to ``open_count``. When ``max_pending``
+    distinct recipients are waiting, new recipients are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any],
+        flush_interval_sec: float = 1.0,
+        max_pending: int = 100000,
+        batch_size: int = 500,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval_sec = flush_interval_sec
+        self.max_pending = max(1, max_pending)
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: dict[OpenKey, list[Any]] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._hits = 0
+        self._coalesced = 0
+        self._dropped = 0
+        self._rows_updated = 0
+        self._write_errors = 0
+
+    def record(self, campaign_id: str, token_id: str, opened_at: datetime | None = None) -> bool:
+        """Note one open; returns False if it was dropped because too many recipients are pending."""
+        opened_at = opened_at or datetime.utcnow()
+        key = (campaign_id, token_id)
+        with self._lock:
+            self._hits += 1
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[0] = min(entry[0], opened_at)
+                entry[1] += 1
+                self._coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self._dropped += 1
+                return False
+            else:
+                self._pending[key] = [opened_at, 1]
+        self._ensure_started()
+        return True
+
+    def flush(self) -> int:
+        """Apply pending opens; returns how many recipient rows were updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            params = [
+                {"b_campaign_id": campaign_id, "b_token_id": token_id, "b_opened_at": opened_at, "b_hits": hits}
+                for (campaign_id, token_id), (opened_at, hits) in pending.items()
+            ]
+            statement = (
+                update(CampaignRecipient)
+                .where(CampaignRecipient.campaign_id == bindparam("b_campaign_id"))
+                .where(CampaignRecipient.token_id == bindparam("b_token_id"))
+                .values(
+                    opened_at=func.coalesce(CampaignRecipient.opened_at, bindparam("b_opened_at")),
+                    open_count=CampaignRecipient.open_count + bindparam("b_hits"),
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+            def apply(db) -> int:
+                rows = 0
+                for start in range(0, len(params), self.batch_size):
+                    result = db.connection().execute(statement, params[start : start + self.batch_size])
+                    rows += max(result.rowcount, 0)
+                return rows
+
+            try:
+                updated = run_write_in(self.session_factory, apply)
+            except Exception:
+                with self._lock:
+                    self._write_errors += 1
+                    for key, (opened_at, hits) in pending.items():
+                        entry = self._pending.setdefault(key, [opened_at, 0])
+                        entry[0] = min(entry[0], opened_at)
+                        entry[1] += hits
+                raise
+            with self._lock:
+                self._rows_updated += updated
+            return updated
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="open-tracker", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.flush_interval_sec):
+            try:
+                self.flush()
+            except Exception:  # noqa: BLE001
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:  # noqa: BLE001
+            pass
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "hits": self._hits,
+                "coalesced": self._coalesced,
+                "dropped": self._dropped,
+                "rows_updated": self._rows_updated,
+                "write_errors": self._write_errors,
+            }
+
+
+open_tracker = OpenTracker(
+    SessionLocal,
+    flush_interval_sec=settings.open_flush_interval_sec,
+    max_pending=settings.open_pending_max,
+)
+atexit.register(open_tracker.stop)
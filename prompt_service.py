@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from app_config import settings
+from campaign_presets import get_preset
+from models import Campaign, CampaignPrompt
+from template_service import TemplateError, load_brand_config
+
+
+# Preset fields rendered into the campaign section, in a fixed order so prompts stay byte-identical.
+_PRESET_PROMPT_FIELDS = [
+    ("hero_headline", "Headline"),
+    ("hero_body", "Summary"),
+    ("offer_badge", "Offer"),
+    ("feature_1", "Highlight"),
+    ("feature_2", "Highlight"),
+    ("feature_3", "Highlight"),
+]
+
+# LRU of campaign id -> (expires_at, prompt). Other workers' prompt updates only show up after the TTL.
+_prompt_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+_prompt_cache_lock = threading.Lock()
+
+
+def build_system_prompt(brand_cfg: dict[str, Any] | None, preset: dict[str, str] | None) -> str:
+    """Deterministic system prompt: base instructions, then brand, then campaign context."""
+    sections = [settings.chat_system_prompt.strip()]
+
+    if brand_cfg:
+        sections.append(
+            f"You represent {brand_cfg['brand_name']} and answer as its "
+            f"\"{brand_cfg['chat_header_title']}\" inside a marketing email."
+        )
+
+    if preset:
+        lines = [f"This email is the \"{preset.get('label', preset.get('subject', 'campaign'))}\" campaign."]
+        for field, label in _PRESET_PROMPT_FIELDS:
+            value = str(preset.get(field, "")).strip()
+            if value:
+                lines.append(f"- {label}: {value}")
+        sections.append("\n".join(lines))
+
+    return "\n\n".join(sections)
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def store_campaign_prompt(db_session, campaign_id: str, brand_id: str, preset_id: str | None) -> str:
+    """Build the campaign prompt once and persist it; callers commit, then call ``cache_campaign_prompt``."""
+    preset = get_preset(preset_id)
+    try:
+        brand_cfg = load_brand_config(brand_id)
+    except TemplateError:
+        brand_cfg = None
+    prompt = build_system_prompt(brand_cfg, preset)
+
+    row = db_session.get(CampaignPrompt, campaign_id)
+    if row is None:
+        row = CampaignPrompt(campaign_id=campaign_id)
+        db_session.add(row)
+    row.brand_id = brand_id
+    row.preset_id = preset["id"]
+    row.system_prompt = prompt
+    row.prompt_hash = prompt_hash(prompt)
+    row.updated_at = datetime.utcnow()
+    return prompt
+
+
+def cache_campaign_prompt(campaign_id: str, prompt: str) -> None:
+    """Publish a committed campaign prompt to this worker's cache and drop its stale simulator copy."""
+    _cache_put(campaign_id, prompt)
+    with _prompt_cache_lock:
+        _prompt_cache.pop(f"preview-{campaign_id}", None)
+
+
+def _cache_get(campaign_id: str) -> str | None:
+    with _prompt_cache_lock:
+        entry = _prompt_cache.get(campaign_id)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            del _prompt_cache[campaign_id]
+            return None
+        _prompt_cache.move_to_end(campaign_id)
+        return entry[1]
+
+
+def _cache_put(campaign_id: str, prompt: str) -> None:
+    with _prompt_cache_lock:
+        _prompt_cache[campaign_id] = (time.monotonic() + settings.prompt_cache_ttl_sec, prompt)
+        _prompt_cache.move_to_end(campaign_id)
+        while len(_prompt_cache) > max(1, settings.prompt_cache_max_entries):
+            _prompt_cache.popitem(last=False)
+
+
+def _load_prompt(db_session, campaign_id: str) -> str:
+    row = db_session.get(CampaignPrompt, campaign_id)
+    if row is not None:
+        return row.system_prompt
+
+    # Simulator sessions use "preview-<campaign id>"; gallery previews use "preview-<brand id>".
+    scoped_id = campaign_id.removeprefix("preview-")
+    if scoped_id != campaign_id:
+        row = db_session.get(CampaignPrompt, scoped_id)
+        if row is not None:
+            return row.system_prompt
+        try:
+            return build_system_prompt(load_brand_config(scoped_id), get_preset(None))
+        except TemplateError:
+            pass
+
+    # Campaigns created before prompts were stored still get their brand context.
+    brand_id = db_session.query(Campaign.brand_id).filter(Campaign.id == scoped_id).scalar()
+    if brand_id:
+        try:
+            return build_system_prompt(load_brand_config(brand_id), None)
+        except TemplateError:
+            pass
+    return build_system_prompt(None, None)
+
+
+def system_prompt_for(db_session, campaign_id: str) -> str:
+    cached = _cache_get(campaign_id)
+    if cached is not None:
+        return cached
+
+    prompt = _load_prompt(db_session, campaign_id)
+    _cache_put(campaign_id, prompt)
+    return prompt
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable
+
+import requests
+
+from admission import acquire_provider_slot
+from app_config import settings
+from deadline import Deadline, DeadlineExceeded, current_deadline
+
+
+class ProviderError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ProviderEndpoint:
+    name: str
+    url: str
+    model: str
+    api_key: str
+    prompt_cache_hints: bool = False
+
+
+@dataclass(frozen=True)
+class ProviderReply:
+    content: str
+    latency_ms: int
+    endpoint: str
+    model: str
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures; half-open lets one probe through after a cool-off."""
+
+    def __init__(self, failure_threshold: int, reset_timeout_sec: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_sec = reset_timeout_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout_sec:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        """Whether ``allow_request`` could succeed right now, without reserving the half-open probe."""
+        with self._lock:
+            state = self._state()
+            return state == "closed" or (state == "half_open" and not self._probe_in_flight)
+
+    def allow_request(self) -> bool:
+        """Admit one request; in half-open this reserves the single probe until success or failure is recorded."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+class LatencyWindow:
+    """Rolling window of recent successful latencies used to pick the hedge delay."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque[int] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, latency_ms: int) -> None:
+        with self._lock:
+            self._samples.append(latency_ms)
+
+    def percentile(self, q: float) -> int | None:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def with_cache_hints(messages: list[dict]) -> list[dict]:
+    """Mark the leading system prompt as a cacheable prefix (OpenRouter/Anthropic cache_control)."""
+    if not messages or messages[0].get("role") != "system" or not isinstance(messages[0].get("content"), str):
+        return messages
+    system = {
+        "role": "system",
+        "content": [{"type": "text", "text": messages[0]["content"], "cache_control": {"type": "ephemeral"}}],
+    }
+    return [system, *messages[1:]]
+
+
+def _post_chat_completion(endpoint: ProviderEndpoint, messages: list[dict], timeout: float) -> str:
+    if endpoint.prompt_cache_hints:
+        messages = with_cache_hints(messages)
+    response = requests.post(
+        endpoint.url,
+        headers={
+            "Authorization": f"Bearer {endpoint.api_key}",
+            "Content-Type": "application/json",
+        },
+        json={"model": endpoint.model, "messages": messages},
+        timeout=timeout,
+    )
+    if response.status_code != 200:
+        raise ProviderError(f"Provider returned {response.status_code}: {response.text[:500]}")
+
+    try:
+        return response.json()["choices"][0]["message"]["content"]
+    except Exception as exc:  # noqa: BLE001
+        raise ProviderError(f"Malformed provider response: {exc}") from exc
+
+
+class ProviderPool:
+    """Ordered provider endpoints with per-endpoint circuit breakers and hedged requests.
+
+    The first healthy endpoint is tried first. If it has not answered by its
+    observed p95 latency, the next healthy endpoint is raced against it and the
+    first successful reply wins. A failed endpoint hands over to the next one
+    immediately instead of waiting for a backoff.
+    """
+
+    def __init__(
+        self,
+        endpoints: list[ProviderEndpoint],
+        send: Callable[[ProviderEndpoint, list[dict], float], str] = _post_chat_completion,
+        retries: int = 2,
+        hedge_enabled: bool = True,
+        hedge_min_ms: int = 500,
+        breaker_failures: int = 5,
+        breaker_reset_sec: float = 30.0,
+        max_workers: int = 32,
+    ):
+        if not endpoints:
+            raise ValueError("ProviderPool requires at least one endpoint")
+        self.endpoints = list(endpoints)
+        self.retries = retries
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_ms = hedge_min_ms
+        self._send = send
+        self._breakers = {ep.name: CircuitBreaker(breaker_failures, breaker_reset_sec) for ep in self.endpoints}
+        self._latency = {ep.name: LatencyWindow() for ep in self.endpoints}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provider")
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._counter_lock = threading.Lock()
+
+    def has_credentials(self) -> bool:
+        return any(ep.api_key for ep in self.endpoints)
+
+    def complete(self, messages: list[dict], timeout: float | None = None) -> ProviderReply:
+        timeout = timeout if timeout is not None else settings.request_timeout_sec
+        deadline = current_deadline()
+        last_error: Exception | None = None
+
+        for attempt in range(self.retries + 1):
+            # Probes are only reserved in _race when an endpoint is actually called.
+            candidates = [ep for ep in self.endpoints if self._breakers[ep.name].available()]
+            if not candidates:
+                last_error = ProviderError("All provider circuits are open")
+            else:
+                try:
+                    return self._race(candidates, messages, timeout, deadline)
+                except ProviderError as exc:
+                    last_error = exc
+
+            if attempt >= self.retries:
+                break
+            backoff = 0.5 * (2**attempt)
+            # Only retry when the remaining budget can cover the backoff plus a typical call.
+            if deadline is not None and not deadline.allows(backoff + self._typical_call_sec()):
+                raise DeadlineExceeded(f"No budget left to retry provider call: {last_error}")
+            time.sleep(backoff)
+
+        raise ProviderError(str(last_error))
+
+    def _race(
+        self,
+        candidates: list[ProviderEndpoint],
+        messages: list[dict],
+        timeout: float,
+        deadline: Deadline | None = None,
+    ) -> ProviderReply:
+        backups = list(candidates)
+        started = self._start_next(backups, messages, timeout, deadline)
+        if started is None:
+            raise ProviderError("All provider circuits are open")
+        primary, first = started
+        pending: set[Future] = {first}
+        hedge_at = self._hedge_deadline(primary) if backups else None
+        hedged = False
+        last_error: Exception | None = None
+
+        while pending:
+            wait_for = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+            if deadline is not None:
+                wait_for = deadline.remaining() if wait_for is None else min(wait_for, deadline.remaining())
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    reply = future.result()
+                except ProviderError as exc:
+                    last_error = exc
+                    continue
+                if hedged and reply.endpoint != primary.name:
+                    with self._counter_lock:
+                        self._hedge_wins += 1
+                return reply
+
+            if deadline is not None and pending:
+                deadline.check("provider call")
+
+            hedge_due = hedge_at is not None and time.monotonic() >= hedge_at
+            if backups and (hedge_due or not pending):
+                # A hedge only runs if a slot is free right now; a failover waits in the queue like the primary.
+                started = self._start_next(backups, messages, timeout, deadline, wait=not pending)
+                if started is not None:
+                    if pending:
+                        hedged = True
+                        with self._counter_lock:
+                            self._hedges += 1
+                    pending.add(started[1])
+                hedge_at = None
+
+        raise ProviderError(f"Failed to fetch response from model provider: {last_error}")
+
+    def _start_next(
+        self,
+        candidates: list[ProviderEndpoint],
+        messages: list[dict],
+        timeout: float,
+        deadline: Deadline | None,
+        wait: bool = True,
+    ) -> tuple[ProviderEndpoint, Future] | None:
+        """Start the next admitted endpoint's call under its own admission slot.
+
+        The slot is taken before a half-open probe is reserved and is released by the
+        call itself, so calls still running after the race returns keep counting.
+        """
+        release = acquire_provider_slot(wait)
+        if release is None:
+            return None
+        try:
+            # Queueing for the slot may have used part of the budget.
+            call_timeout = deadline.cap(timeout) if deadline is not None else timeout
+            endpoint = self._admit_next(candidates)
+            if endpoint is None:
+                release()
+                return None
+            return endpoint, self._executor.submit(self._attempt, endpoint, messages, call_timeout, release)
+        except BaseException:
+            release()
+            raise
+
+    def _admit_next(self, candidates: list[ProviderEndpoint]) -> ProviderEndpoint | None:
+        """Pop candidates until one's breaker admits a request (reserving its probe if half-open)."""
+        while candidates:
+            endpoint = candidates.pop(0)
+            if self._breakers[endpoint.name].allow_request():
+                return endpoint
+        return None
+
+    def _typical_call_sec(self) -> float:
+        p50 = self._latency[self.endpoints[0].name].percentile(0.50)
+        return (p50 if p50 is not None else self.hedge_min_ms) / 1000
+
+    def _hedge_deadline(self, endpoint: ProviderEndpoint) -> float | None:
+        if not self.hedge_enabled:
+            return None
+        p95 = self._latency[endpoint.name].percentile(0.95)
+        if p95 is None:
+            return None
+        return time.monotonic() + max(p95, self.hedge_min_ms) / 1000
+
+    def _attempt(
+        self,
+        endpoint: ProviderEndpoint,
+        messages: list[dict],
+        timeout: float,
+        release: Callable[[], None] | None = None,
+    ) -> ProviderReply:
+        breaker = self._breakers[endpoint.name]
+        start = time.monotonic()
+        try:
+            content = self._send(endpoint, messages, timeout)
+        except Exception as exc:  # noqa: BLE001
+            breaker.record_failure()
+            raise ProviderError(f"{endpoint.name}: {exc}") from exc
+        finally:
+            # Free the admission slot before the future resolves, so waiters see it released.
+            if release is not None:
+                release()
+
+        latency_ms = int((time.monotonic() - start) * 1000)
+        breaker.record_success()
+        self._latency[endpoint.name].observe(latency_ms)
+        return ProviderReply(content=content, latency_ms=latency_ms, endpoint=endpoint.name, model=endpoint.model)
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            hedges, hedge_wins = self._hedges, self._hedge_wins
+        return {
+            "hedges": hedges,
+            "hedge_wins": hedge_wins,
+            "endpoints": [
+                {
+                    "name": ep.name,
+                    "model": ep.model,
+                    "circuit": self._breakers[ep.name].state,
+                    "p50_ms": self._latency[ep.name].percentile(0.50),
+                    "p95_ms": self._latency[ep.name].percentile(0.95),
+                }
+                for ep in self.endpoints
+            ],
+        }
+
+
+def load_endpoints() -> list[ProviderEndpoint]:
+    """Primary OpenRouter endpoint followed by PROVIDER_FALLBACKS, which inherit unset fields."""
+    primary = ProviderEndpoint(
+        name="primary",
+        url=settings.openrouter_chat_completions_url,
+        model=settings.openrouter_model,
+        api_key=settings.openrouter_api_key,
+        prompt_cache_hints=settings.provider_prompt_cache_hints,
+    )
+    endpoints = [primary]
+    for index, raw in enumerate(settings.provider_fallbacks, start=1):
+        endpoints.append(
+            ProviderEndpoint(
+                name=str(raw.get("name") or f"fallback-{index}"),
+                url=str(raw.get("url") or primary.url),
+                model=str(raw.get("model") or primary.model),
+                api_key=str(raw.get("api_key") or primary.api_key),
+                prompt_cache_hints=bool(raw.get("prompt_cache_hints", primary.prompt_cache_hints)),
+            )
+        )
+    return endpoints
+
+
+provider_pool = ProviderPool(
+    load_endpoints(),
+    retries=settings.provider_retries,
+    hedge_enabled=settings.provider_hedge_enabled,
+    hedge_min_ms=settings.provider_hedge_min_ms,
+    breaker_failures=settings.provider_breaker_failures,
+    breaker_reset_sec=settings.provider_breaker_reset_sec,
+)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy import and_, delete, not_, or_, text
+
+from app_config import settings
+from database import SessionLocal
+from models import Conversation, Message
+from stats_service import record_conversations_deleted
+from write_queue import run_write
+
+
+LEGACY_CAMPAIGN_ID = "legacy"  # campaign id the /ganggang shim writes under
+RETENTION_CLASSES = ("preview", "legacy", "real")
+
+# A range instead of LIKE 'preview-%' so SQLite can walk the campaign_id index ("." sorts right after "-").
+_PREVIEW = and_(Conversation.campaign_id >= "preview-", Conversation.campaign_id < "preview.")
+
+
+def class_filter(campaign_class: str):
+    if campaign_class == "preview":
+        return _PREVIEW
+    if campaign_class == "legacy":
+        return Conversation.campaign_id == LEGACY_CAMPAIGN_ID
+    if campaign_class == "real":
+        return not_(or_(_PREVIEW, Conversation.campaign_id == LEGACY_CAMPAIGN_ID))
+    raise ValueError(f"Unknown campaign class {campaign_class!r}")
+
+
+def retention_days() -> dict[str, float]:
+    return {
+        "preview": settings.retention_preview_days,
+        "legacy": settings.retention_legacy_days,
+        "real": settings.retention_real_days,
+    }
+
+
+def _delete_batch(campaign_class: str, cutoff: datetime, batch_size: int) -> Callable[[Any], tuple[int, int]]:
+    def intent(db) -> tuple[int, int]:
+        rows = (
+            db.query(Conversation.id, Conversation.campaign_id)
+            .filter(class_filter(campaign_class), Conversation.last_message_at < cutoff)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return 0, 0
+        convo_ids = [convo_id for convo_id, _ in rows]
+        messages = db.execute(
+            delete(Message).where(Message.conversation_id.in_(convo_ids)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.execute(
+            delete(Conversation).where(Conversation.id.in_(convo_ids)).execution_options(synchronize_session=False)
+        )
+        for campaign_id, count in Counter(campaign_id for _, campaign_id in rows).items():
+            record_conversations_deleted(db, campaign_id, count)
+        return len(rows), messages
+
+    return intent
+
+
+def sweep_class(
+    db_session, campaign_class: str, cutoff: datetime, batch_size: int = 200, pause_sec: float = 0.0
+) -> dict[str, int]:
+    """Delete a class's conversations idle since before ``cutoff``, one short transaction per batch."""
+    result = {"conversations": 0, "messages": 0, "batches": 0}
+    intent = _delete_batch(campaign_class, cutoff, max(1, batch_size))
+    while True:
+        conversations, messages = run_write(db_session, intent)
+        if not conversations:
+            return result
+        result["conversations"] += conversations
+        result["messages"] += messages
+        result["batches"] += 1
+        if conversations < batch_size:
+            return result
+        if pause_sec:
+            time.sleep(pause_sec)
+
+
+def compact_database(db_session) -> list[str]:
+    """Refresh planner stats and return freed pages where the database allows it; returns what ran."""
+    ran = []
+    if db_session.get_bind().dialect.name == "sqlite":
+        if db_session.execute(text("PRAGMA auto_vacuum")).scalar() == 2:  # INCREMENTAL
+            # Returns no rows; exec_driver_sql runs it to completion without a result to fetch.
+            db_session.connection().exec_driver_sql("PRAGMA incremental_vacuum")
+            ran.append("incremental_vacuum")
+        db_session.execute(text("PRAGMA optimize"))
+        ran.append("optimize")
+    else:
+        db_session.execute(text("ANALYZE conversations"))
+        db_session.execute(text("ANALYZE messages"))
+        ran.append("analyze")
+    db_session.commit()
+    return ran
+
+
+def sweep(
+    db_session,
+    now: datetime | None = None,
+    days: dict[str, float] | None = None,
+    batch_size: int | None = None,
+    pause_sec: float | None = None,
+) -> dict[str, Any]:
+    """One retention pass over every class with a TTL, followed by vacuum/analyze if anything was deleted."""
+    now = now or datetime.utcnow()
+    days = days if days is not None else retention_days()
+    batch_size = batch_size or settings.retention_batch_size
+    pause_sec = settings.retention_batch_pause_ms / 1000 if pause_sec is None else pause_sec
+
+    started = time.perf_counter()
+    classes: dict[str, dict[str, Any]] = {}
+    for campaign_class in RETENTION_CLASSES:
+        ttl_days = days.get(campaign_class, 0)
+        if ttl_days <= 0:
+            continue
+        cutoff = now - timedelta(days=ttl_days)
+        classes[campaign_class] = {
+            "cutoff": cutoff.isoformat(),
+            **sweep_class(db_session, campaign_class, cutoff, batch_size, pause_sec),
+        }
+
+    deleted = sum(stats["conversations"] for stats in classes.values())
+    return {
+        "started_at": now.isoformat(),
+        "classes": classes,
+        "conversations": deleted,
+        "messages": sum(stats["messages"] for stats in classes.values()),
+        "maintenance": compact_database(db_session) if deleted else [],
+        "duration_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+class RetentionSweeper:
+    """Runs ``sweep`` every ``interval_sec`` on a background thread and keeps totals for the stats endpoint."""
+
+    def __init__(self, session_factory: Callable[[], Any], interval_sec: float):
+        self.session_factory = session_factory
+        self.interval_sec = interval_sec
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._runs = 0
+        self._errors = 0
+        self._deleted: Counter[str] = Counter()
+        self._last: dict[str, Any] | None = None
+        self._last_error = ""
+
+    def start(self) -> None:
+        if self.interval_sec <= 0:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="retention-sweep", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> dict[str, Any]:
+        try:
+            with self.session_factory() as db:
+                result = sweep(db)
+        except Exception as exc:
+            with self._lock:
+                self._errors += 1
+                self._last_error = str(exc)
+            raise
+        with self._lock:
+            self._runs += 1
+            self._last = result
+            self._deleted["conversations"] += result["conversations"]
+            self._deleted["messages"] += result["messages"]
+        return result
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            try:
+                self.run_once()
+            except Exception:  # noqa: BLE001
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "interval_sec": self.interval_sec,
+                "retention_days": retention_days(),
+                "runs": self._runs,
+                "errors": self._errors,
+                "last_error": self._last_error,
+                "deleted": dict(self._deleted),
+                "last_sweep": self._last,
+            }
+
+
+retention_sweeper = RetentionSweeper(SessionLocal, settings.retention_sweep_interval_sec)
+atexit.register(retention_sweeper.stop)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Archive event partitions past EVENT_RETENTION_DAYS to data/event_archive/*.ndjson.gz."""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+
+from app_config import settings
+from database import SessionLocal, init_db
+from event_store import archive_expired
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Move expired event partitions to compressed NDJSON")
+    parser.add_argument("--retention-days", type=int, default=settings.event_retention_days)
+    args = parser.parse_args()
+
+    init_db()
+    with SessionLocal() as db:
+        archived = archive_expired(db, args.retention_days)
+    print(json.dumps({"archived": archived, "total": sum(archived.values())}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
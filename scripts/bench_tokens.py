@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Time batch token signing for a campaign-sized recipient list."""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import time
+import uuid
+
+from token_service import sign_token, sign_tokens_batch, verify_token
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sign_tokens_batch against per-recipient sign_token")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--single-sample", type=int, default=50_000, help="Recipients to time with sign_token")
+    args = parser.parse_args()
+
+    campaign_id = str(uuid.uuid4())
+    recipients = [(f"recipient-{index}@example.com", str(uuid.uuid4())) for index in range(args.count)]
+
+    start = time.perf_counter()
+    tokens = sign_tokens_batch(campaign_id, recipients)
+    batch_sec = time.perf_counter() - start
+
+    sample = recipients[: args.single_sample]
+    start = time.perf_counter()
+    for email, token_id in sample:
+        sign_token(campaign_id, email, token_id=token_id)
+    single_sec = time.perf_counter() - start
+
+    assert verify_token(tokens[-1])["token_id"] == recipients[-1][1]
+    print(f"sign_tokens_batch: {args.count} tokens in {batch_sec:.2f}s ({args.count / batch_sec:,.0f}/s)")
+    if sample:
+        print(f"sign_token:        {len(sample)} tokens in {single_sec:.2f}s ({len(sample) / single_sec:,.0f}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,13 @@ from datetime import datetime
 
 from app_config import settings
 from database import SessionLocal, init_db
+from event_sink import emit_event, event_sink
 from mailer_service import MailerError, send_campaign_email
-from models import Campaign, CampaignRecipient, Event, TemplateRender
+from models import Campaign, CampaignRecipient, TemplateRender
+from open_tracker import open_pixel_url
+from stats_service import ensure_stats, record_campaign_created, record_campaign_send
 from template_service import load_brand_config, render_campaign_templates, sync_brands_table
-from token_service import sign_token
+from token_service import sign_tokens_batch
 
 
 def parse_recipient(value: str) -> tuple[str, str]:
@@ -35,6 +38,7 @@ def main() -> int:
     init_db()
     with SessionLocal() as db:
         sync_brands_table(db)
+        ensure_stats(db)
         brand_cfg = load_brand_config(args.brand_id)
 
         campaign = Campaign(
@@ -61,6 +65,7 @@ def main() -> int:
             db.add(row)
             recipients.append(row)
 
+        record_campaign_created(db, campaign.id, len(recipients))
         db.add(TemplateRender(campaign_id=campaign.id, brand_id=args.brand_id, template_version="v1"))
         db.commit()
 
@@ -73,14 +78,15 @@ def main() -> int:
             "reply_to": campaign.reply_to,
         }
 
-        for row in recipients:
-            token = sign_token(campaign.id, row.email, token_id=row.token_id)
+        tokens = sign_tokens_batch(campaign.id, [(row.email, row.token_id) for row in recipients])
+        for row, token in zip(recipients, tokens):
             rendered = render_campaign_templates(
                 brand_cfg,
                 campaign={"subject": campaign.subject},
                 recipient={"email": row.email, "first_name": row.first_name or "there"},
                 chat_endpoint=chat_endpoint,
                 token=token,
+                open_pixel_url=open_pixel_url(args.base_url, campaign.id, row.token_id),
             )
 
             try:
@@ -92,26 +98,16 @@ def main() -> int:
                     rendered["text_body"],
                 )
                 row.sent_at = datetime.utcnow()
-                db.add(
-                    Event(
-                        campaign_id=campaign.id,
-                        event_type="campaign_send_success",
-                        payload_json=json.dumps({"email": row.email, "message_id": message_id}),
-                    )
-                )
+                emit_event("campaign_send_success", campaign_id=campaign.id, payload={"email": row.email, "message_id": message_id})
                 sent += 1
             except MailerError as exc:
                 failed.append({"email": row.email, "error": str(exc)})
-                db.add(
-                    Event(
-                        campaign_id=campaign.id,
-                        event_type="campaign_send_failure",
-                        payload_json=json.dumps({"email": row.email, "error": str(exc)}),
-                    )
-                )
+                emit_event("campaign_send_failure", campaign_id=campaign.id, payload={"email": row.email, "error": str(exc)})
 
         campaign.status = "sent" if sent else "failed"
+        record_campaign_send(db, campaign.id, "draft", campaign.status, sent, len(failed))
         db.commit()
+        event_sink.flush()
 
         print(
             json.dumps(
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Stream a campaign's conversations and messages to NDJSON (optionally gzip)."""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+
+from database import SessionLocal, init_db
+from export_service import gzip_chunks, iter_campaign_conversations, ndjson_lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export a campaign's conversations as NDJSON")
+    parser.add_argument("campaign_id")
+    parser.add_argument("--cursor", default=None, help="resume after the conversation with this cursor")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--output", default="-", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    init_db()
+    exported = 0
+    last_cursor = args.cursor
+
+    def _records(db):
+        nonlocal exported, last_cursor
+        for record in iter_campaign_conversations(db, args.campaign_id, args.cursor):
+            yield record
+            exported += 1
+            last_cursor = record["cursor"]
+
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "ab" if args.cursor else "wb")
+    try:
+        with SessionLocal() as db:
+            chunks = ndjson_lines(_records(db))
+            for chunk in gzip_chunks(chunks) if args.gzip else chunks:
+                out.write(chunk)
+    finally:
+        out.flush()
+        if out is not sys.stdout.buffer:
+            out.close()
+        # Rerun with --cursor <last_cursor> to continue an interrupted export.
+        print(json.dumps({"exported": exported, "last_cursor": last_cursor}), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Local OpenAI-compatible chat-completions stub for load tests.
+
+Point the app at it with:
+    OPENROUTER_CHAT_COMPLETIONS_URL=http://127.0.0.1:9009/api/v1/chat/completions
+    OPENROUTER_API_KEY=fake
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class FakeProviderConfig:
+    latency: str = "lognormal:400:0.5"
+    error_rate: float = 0.0
+    error_codes: tuple[int, ...] = (500, 429, 503)
+    stream_chunk_chars: int = 24
+    reply: str = ""
+
+
+def sample_latency_ms(spec: str, rng: random.Random) -> float:
+    """Parse ``fixed:MS``, ``uniform:LOW:HIGH`` or ``lognormal:MEDIAN_MS:SIGMA`` and draw one sample."""
+    kind, *args = spec.split(":")
+    values = [float(arg) for arg in args]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return median * rng.lognormvariate(0.0, sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _reply_text(config: FakeProviderConfig, messages: list[dict]) -> str:
+    if config.reply:
+        return config.reply
+    question = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"Thanks for asking about \"{str(question)[:80]}\". Our most popular pick ships free and runs true to size."
+
+
+def make_handler(config: FakeProviderConfig, rng: random.Random):
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # noqa: A002
+            pass
+
+        def _send_json(self, status: int, body: dict) -> None:
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_POST(self):  # noqa: N802
+            length = int(self.headers.get("Content-Length", "0"))
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "invalid JSON"}})
+                return
+
+            with rng_lock:
+                delay_ms = sample_latency_ms(config.latency, rng)
+                fail = rng.random() < config.error_rate
+                error_code = rng.choice(config.error_codes)
+
+            model = payload.get("model", "fake/model")
+            content = _reply_text(config, payload.get("messages") or [])
+
+            if not payload.get("stream"):
+                time.sleep(delay_ms / 1000)
+                if fail:
+                    self._send_json(error_code, {"error": {"message": "injected failure", "code": error_code}})
+                    return
+                self._send_json(
+                    200,
+                    {
+                        "id": f"fake-{uuid.uuid4()}",
+                        "object": "chat.completion",
+                        "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                    },
+                )
+                return
+
+            if fail:
+                time.sleep(delay_ms / 1000)
+                self._send_json(error_code, {"error": {"message": "injected failure", "code": error_code}})
+                return
+
+            # Streaming: first token after half the latency, the rest spread over the remainder.
+            pieces = [
+                content[i : i + config.stream_chunk_chars] for i in range(0, len(content), config.stream_chunk_chars)
+            ]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            time.sleep(delay_ms / 2000)
+            for piece in pieces:
+                chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": piece}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(delay_ms / 2000 / max(1, len(pieces)))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return Handler
+
+
+def make_server(host: str, port: int, config: FakeProviderConfig, seed: int | None = None) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(config, random.Random(seed)))
+    server.daemon_threads = True
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run a fake chat-completions provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9009)
+    parser.add_argument("--latency", default="lognormal:400:0.5", help="fixed:MS | uniform:LOW:HIGH | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-codes", default="500,429,503")
+    parser.add_argument("--reply", default="", help="Fixed reply text (default echoes the question)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeProviderConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_codes=tuple(int(code) for code in args.error_codes.split(",") if code.strip()),
+        reply=args.reply,
+    )
+    sample_latency_ms(config.latency, random.Random(0))
+
+    server = make_server(args.host, args.port, config, seed=args.seed)
+    print(f"Fake provider on http://{args.host}:{args.port}/api/v1/chat/completions ({config.latency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Replay chat conversations against /api/v1/chat/message at a target request rate.
+
+Typical run against the fake provider:
+    ./scripts/fake_provider.py --latency lognormal:400:0.5 --error-rate 0.02 &
+    OPENROUTER_CHAT_COMPLETIONS_URL=http://127.0.0.1:9009/api/v1/chat/completions \
+        OPENROUTER_API_KEY=fake ./venv/bin/python server.py &
+    ./scripts/load_chat.py --rps 50 --duration 60
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app_config import settings
+from database import SessionLocal, init_db
+from models import Campaign, CampaignRecipient
+from stats_service import ensure_stats, record_campaign_created
+from token_service import sign_token
+
+
+SYNTHETIC_QUESTIONS = [
+    "Do you offer free shipping?",
+    "How does sizing run?",
+    "Is this on sale?",
+    "What is your return policy?",
+    "Do you ship to Canada?",
+    "Which one is best for rainy weather?",
+    "How long does delivery take?",
+    "Can I exchange for a different size?",
+]
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def seed_campaign(brand_id: str, recipient_count: int) -> list[str]:
+    """Create a throwaway campaign and return one signed token per recipient."""
+    init_db()
+    campaign_id = str(uuid.uuid4())
+    tokens = []
+    with SessionLocal() as db:
+        ensure_stats(db)
+        db.add(
+            Campaign(
+                id=campaign_id,
+                brand_id=brand_id,
+                name=f"Load test {time.strftime('%Y-%m-%d %H:%M:%S')}",
+                subject="Load test",
+                from_email="load@example.com",
+                reply_to="load@example.com",
+                status="sent",
+            )
+        )
+        for index in range(recipient_count):
+            email = f"load-{index}@example.com"
+            token_id = str(uuid.uuid4())
+            db.add(CampaignRecipient(campaign_id=campaign_id, email=email, first_name="Load", token_id=token_id))
+            tokens.append(sign_token(campaign_id, email, token_id=token_id, ttl_seconds=86400))
+        record_campaign_created(db, campaign_id, recipient_count, status="sent")
+        db.commit()
+    return tokens
+
+
+def load_conversations(path: str | None, turns: int, rng: random.Random) -> list[list[str]]:
+    """Recorded conversations are JSONL lines of user-message lists; otherwise synthesize."""
+    if path:
+        with open(path, encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+    return [rng.sample(SYNTHETIC_QUESTIONS, k=min(turns, len(SYNTHETIC_QUESTIONS))) for _ in range(200)]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies_ms: list[float] = []
+        self.outcomes: Counter[str] = Counter()
+
+    def record(self, outcome: str, latency_ms: float) -> None:
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if outcome == "ok":
+                self.latencies_ms.append(latency_ms)
+
+    def report(self, elapsed_sec: float) -> dict:
+        with self._lock:
+            latencies = sorted(self.latencies_ms)
+            outcomes = dict(self.outcomes)
+        total = sum(outcomes.values())
+        return {
+            "requests": total,
+            "ok": outcomes.get("ok", 0),
+            "elapsed_sec": round(elapsed_sec, 2),
+            "throughput_rps": round(total / elapsed_sec, 2) if elapsed_sec else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50), 1),
+                "p95": round(percentile(latencies, 0.95), 1),
+                "p99": round(percentile(latencies, 0.99), 1),
+                "max": round(latencies[-1], 1) if latencies else 0.0,
+            },
+            "errors": {key: value for key, value in sorted(outcomes.items()) if key != "ok"},
+        }
+
+
+def run_conversation(session: requests.Session, url: str, token: str, turns: list[str], recorder: Recorder, timeout: float) -> None:
+    convo_id = ""
+    for message in turns:
+        start = time.monotonic()
+        try:
+            response = session.post(url, json={"token": token, "message": message, "convo_id": convo_id}, timeout=timeout)
+            latency_ms = (time.monotonic() - start) * 1000
+        except requests.RequestException as exc:
+            recorder.record(f"exception:{type(exc).__name__}", 0.0)
+            return
+
+        if response.status_code != 200:
+            recorder.record(f"http_{response.status_code}", latency_ms)
+            return
+        body = response.json()
+        recorder.record("degraded" if body.get("degraded") else "ok", latency_ms)
+        convo_id = body.get("convo_id") or convo_id
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the chat endpoint")
+    parser.add_argument("--base-url", default=settings.base_url)
+    parser.add_argument("--rps", type=float, default=10.0, help="Target chat requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep starting conversations")
+    parser.add_argument("--turns", type=int, default=2, help="Turns per synthetic conversation")
+    parser.add_argument("--recipients", type=int, default=200)
+    parser.add_argument("--brand-id", default="acme")
+    parser.add_argument("--conversations", help="JSONL file of recorded user-message lists to replay")
+    parser.add_argument("--max-workers", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tokens = seed_campaign(args.brand_id, args.recipients)
+    conversations = load_conversations(args.conversations, args.turns, rng)
+    avg_turns = sum(len(c) for c in conversations) / max(1, len(conversations))
+    url = f"{args.base_url.rstrip('/')}/api/v1/chat/message"
+
+    recorder = Recorder()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=args.max_workers, pool_maxsize=args.max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # Open-loop arrivals: start conversations at rps / avg_turns so requests land near the target rate.
+    interval = avg_turns / args.rps
+    start = time.monotonic()
+    next_start = start
+    with ThreadPoolExecutor(max_workers=args.max_workers) as pool:
+        index = 0
+        while time.monotonic() - start < args.duration:
+            pool.submit(
+                run_conversation,
+                session,
+                url,
+                tokens[index % len(tokens)],
+                conversations[index % len(conversations)],
+                recorder,
+                args.timeout,
+            )
+            index += 1
+            next_start += interval
+            time.sleep(max(0.0, next_start - time.monotonic()))
+
+    print(json.dumps(recorder.report(time.monotonic() - start), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
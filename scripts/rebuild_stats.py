@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Recompute campaign_stats and stat_counters from the base tables."""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+
+from database import SessionLocal, init_db
+from stats_service import dashboard_totals, rebuild_stats
+
+
+def main() -> int:
+    init_db()
+    with SessionLocal() as db:
+        before = dashboard_totals(db)
+        after = rebuild_stats(db)
+        db.commit()
+    drift = {name: after[name] - before[name] for name in after if after[name] != before[name]}
+    print(json.dumps({"totals": after, "drift": drift}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Delete preview, legacy and (optionally) real conversations past their RETENTION_*_DAYS."""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+
+from app_config import settings
+from database import SessionLocal, init_db
+from retention_service import retention_days, sweep
+
+
+def main() -> int:
+    defaults = retention_days()
+    parser = argparse.ArgumentParser(description="Run one conversation retention sweep")
+    parser.add_argument("--preview-days", type=float, default=defaults["preview"])
+    parser.add_argument("--legacy-days", type=float, default=defaults["legacy"])
+    parser.add_argument("--real-days", type=float, default=defaults["real"], help="0 keeps real campaigns forever")
+    parser.add_argument("--batch-size", type=int, default=settings.retention_batch_size)
+    args = parser.parse_args()
+
+    init_db()
+    days = {"preview": args.preview_days, "legacy": args.legacy_days, "real": args.real_days}
+    with SessionLocal() as db:
+        result = sweep(db, days=days, batch_size=args.batch_size)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
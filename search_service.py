@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import html
+import re
+from typing import Any
+
+from sqlalchemy import DateTime, Float, text
+
+from conversation_service import DEFAULT_PAGE_SIZE
+
+
+# Control characters never appear in chat text, so they are safe snippet markers to escape around.
+_MARK_OPEN = "\x02"
+_MARK_CLOSE = "\x03"
+_TERM_RE = re.compile(r"\w+\*?", re.UNICODE)
+# Shorter prefixes expand to a large share of the vocabulary and turn a ~10ms query into seconds.
+MIN_PREFIX_CHARS = 3
+
+
+class SearchError(ValueError):
+    pass
+
+
+def fts_query(raw: str) -> str:
+    """Turn free text into an FTS5 query: every word must match; a trailing ``*`` keeps prefix search.
+
+    Words are quoted, so operators and punctuation in user input can never make MATCH fail.
+    """
+    terms = []
+    for term in _TERM_RE.findall(raw):
+        word = term.rstrip("*")
+        prefix = term.endswith("*") and len(word) >= MIN_PREFIX_CHARS
+        terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    if not terms:
+        raise SearchError("Query has no searchable words")
+    return " ".join(terms)
+
+
+def _snippet_html(snippet: str) -> str:
+    return html.escape(snippet).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def search_messages(
+    db_session,
+    query: str,
+    campaign_id: str | None = None,
+    brand_id: str | None = None,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> tuple[list[dict[str, Any]], int | None]:
+    """Best-matching messages first (BM25); returns the page and the offset of the next one."""
+    if db_session.get_bind().dialect.name != "sqlite":
+        raise SearchError("Full-text search needs the SQLite messages_fts index")
+
+    filters = ""
+    params: dict[str, Any] = {
+        "match": fts_query(query),
+        "open": _MARK_OPEN,
+        "close": _MARK_CLOSE,
+        "limit": limit + 1,
+        "offset": max(0, offset),
+    }
+    if campaign_id:
+        filters += " AND c.campaign_id = :campaign_id"
+        params["campaign_id"] = campaign_id
+    if brand_id:
+        filters += " AND cp.brand_id = :brand_id"
+        params["brand_id"] = brand_id
+
+    # Rank and page on ids first; snippets are then built for the page only, not every match.
+    statement = text(
+        "SELECT m.id AS message_id, m.conversation_id, m.role, m.created_at, "
+        "c.campaign_id, c.recipient_email, cp.brand_id, "
+        "snippet(messages_fts, 0, :open, :close, '…', 16) AS snippet, hits.score "
+        "FROM ("
+        "SELECT messages_fts.rowid AS message_id, bm25(messages_fts) AS score FROM messages_fts "
+        "JOIN messages m ON m.id = messages_fts.rowid "
+        "JOIN conversations c ON c.id = m.conversation_id "
+        "LEFT JOIN campaigns cp ON cp.id = c.campaign_id "
+        f"WHERE messages_fts MATCH :match{filters} "
+        "ORDER BY score, message_id DESC LIMIT :limit OFFSET :offset"
+        ") hits "
+        "JOIN messages_fts ON messages_fts.rowid = hits.message_id AND messages_fts MATCH :match "
+        "JOIN messages m ON m.id = hits.message_id "
+        "JOIN conversations c ON c.id = m.conversation_id "
+        "LEFT JOIN campaigns cp ON cp.id = c.campaign_id "
+        "ORDER BY hits.score, hits.message_id DESC"
+    ).columns(created_at=DateTime, score=Float)
+
+    rows = db_session.execute(statement, params).mappings().all()
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = params["offset"] + limit
+    return [
+        {
+            "message_id": row["message_id"],
+            "convo_id": row["conversation_id"],
+            "campaign_id": row["campaign_id"],
+            "brand_id": row["brand_id"],
+            "recipient_email": row["recipient_email"],
+            "role": row["role"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+            "snippet_html": _snippet_html(row["snippet"]),
+            # bm25() is lower-is-better; flip it so larger means more relevant.
+            "score": round(-row["score"], 4),
+        }
+        for row in rows
+    ], next_offset
@@ -1,19 +1,42 @@
 from __future__ import annotations
 
-import json
+import time
 import uuid
 from datetime import datetime
 
-from flask import Flask, g, jsonify, make_response, redirect, render_template, request, url_for
+from flask import Flask, Response, g, jsonify, make_response, redirect, render_template, request, url_for
 from flask_cors import CORS
-from sqlalchemy import func
+from sqlalchemy import func, update
 
+from admission import Overloaded, provider_limiter
+from answer_cache import answer_cache
 from app_config import settings
 from campaign_presets import DEFAULT_PRESET_ID, get_preset, list_presets
-from chat_service import ChatServiceError, get_conversation_messages, handle_message
-from database import SessionLocal, init_db
+from chat_service import (
+    ChatServiceError,
+    deadline_fallback_reply,
+    find_recent_reply,
+    get_conversation_messages,
+    handle_message,
+    last_message_id,
+    record_unanswered_turn,
+)
+from conversation_service import CursorError, decode_cursor, list_conversations as list_conversation_page, page_size
+from database import SessionLocal, describe_engine, engine, engine_profile, init_db
+from deadline import DeadlineExceeded, check_deadline, deadline_scope
+from event_sink import emit_event, event_sink
+from event_store import rollup_counts
+from export_service import export_stream
+from latency_stats import latency_scope, latency_summary, record_latency
 from mailer_service import MailerError, send_campaign_email
-from models import Campaign, CampaignRecipient, Conversation, Event, Message, TemplateRender
+from models import Campaign, CampaignRecipient, CampaignStats, Conversation, TemplateRender
+from open_tracker import PIXEL_GIF, open_pixel_url, open_tracker
+from prompt_service import cache_campaign_prompt, store_campaign_prompt, system_prompt_for
+from provider_pool import provider_pool
+from retention_service import LEGACY_CAMPAIGN_ID, retention_sweeper
+from search_service import SearchError, search_messages
+from singleflight import SingleFlight, request_key
+from stats_service import dashboard_totals, ensure_stats, record_campaign_created, record_campaign_send
 from template_service import (
     TemplateError,
     load_all_brand_configs,
@@ -21,17 +44,37 @@ from template_service import (
     render_campaign_templates,
     sync_brands_table,
 )
-from token_service import TokenError, sign_token, verify_token
+from token_service import (
+    TokenError,
+    cached_recipient_exists,
+    remember_recipient_exists,
+    sign_token,
+    sign_tokens_batch,
+    token_cache_stats,
+    verify_open_id,
+    verify_token,
+)
+from warmup_service import campaign_warmup_questions, start_campaign_warmup, warm_campaign_answers
+from write_queue import WriteTimeout, run_write
 
 
 app = Flask(__name__)
+# Flask's logger inherits WARNING from the root logger, which would hide the startup info lines.
+app.logger.setLevel(settings.log_level)
 CORS(app, supports_credentials=True)
 
+# Coalesces AMP resubmits and double taps of the same (token, convo_id, message).
+chat_singleflight = SingleFlight(settings.chat_dedupe_window_sec)
+
 
 def _bootstrap() -> None:
     init_db()
+    app.logger.info("Database engine: %s", describe_engine(engine, engine_profile))
     with SessionLocal() as db:
         sync_brands_table(db)
+        ensure_stats(db)
+        db.commit()
+    retention_sweeper.start()
 
 
 _bootstrap()
@@ -47,6 +90,28 @@ def _error(message: str, status_code: int):
     return jsonify({"error": message, "request_id": g.request_id}), status_code
 
 
+def _overloaded(exc: Overloaded):
+    # Same {"error": ...} body as other failures so the AMP submit-error template renders it.
+    response, status_code = _error(str(exc), 503)
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response, status_code
+
+
+def _keep_unanswered_turn(db, campaign_id, recipient_email, token_id, message, convo_id):
+    """Store the user message of a turn that ran out of time; returns its conversation id, or None."""
+    try:
+        return record_unanswered_turn(db, campaign_id, recipient_email, token_id, message, convo_id)
+    except (ChatServiceError, WriteTimeout):
+        db.rollback()
+        return None
+
+
+def _write_busy(exc: WriteTimeout):
+    response, status_code = _error(f"Database busy, please retry: {exc}", 503)
+    response.headers["Retry-After"] = "1"
+    return response, status_code
+
+
 def _parse_recipients_from_text(raw: str) -> list[dict[str, str]]:
     recipients: list[dict[str, str]] = []
     for line in [ln.strip() for ln in raw.splitlines() if ln.strip()]:
@@ -71,6 +136,14 @@ def _campaign_payload_with_preset(
     return payload
 
 
+def _warmup_requested(value) -> bool:
+    if value is None or value == "":
+        return settings.warmup_on_send
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "yes", "on"}
+
+
 @app.before_request
 def _attach_request_id() -> None:
     g.request_id = request.headers.get("X-Request-Id", str(uuid.uuid4()))
@@ -126,13 +199,8 @@ def admin_dashboard():
     with SessionLocal() as db:
         brands = load_all_brand_configs()
         presets = list_presets()
-        stats = {
-            "campaign_count": db.query(func.count(Campaign.id)).scalar() or 0,
-            "draft_count": db.query(func.count(Campaign.id)).filter(Campaign.status == "draft").scalar() or 0,
-            "sent_count": db.query(func.count(Campaign.id)).filter(Campaign.status == "sent").scalar() or 0,
-            "failed_count": db.query(func.count(Campaign.id)).filter(Campaign.status == "failed").scalar() or 0,
-            "conversation_count": db.query(func.count(Conversation.id)).scalar() or 0,
-        }
+        stats = dashboard_totals(db)
+        latency = latency_summary(db)
         campaigns = (
             db.query(
                 Campaign.id,
@@ -141,22 +209,19 @@ def admin_dashboard():
                 Campaign.subject,
                 Campaign.status,
                 Campaign.created_at,
-                func.count(CampaignRecipient.id).label("recipient_count"),
-            )
-            .outerjoin(CampaignRecipient, CampaignRecipient.campaign_id == Campaign.id)
-            .group_by(
-                Campaign.id,
-                Campaign.brand_id,
-                Campaign.name,
-                Campaign.subject,
-                Campaign.status,
-                Campaign.created_at,
+                func.coalesce(CampaignStats.recipient_count, 0).label("recipient_count"),
             )
+            .outerjoin(CampaignStats, CampaignStats.campaign_id == Campaign.id)
             .order_by(Campaign.created_at.desc())
             .limit(25)
             .all()
         )
-        conversations = db.query(Conversation).order_by(Conversation.last_message_at.desc()).limit(25).all()
+        try:
+            conversations, next_conversations_cursor = list_conversation_page(
+                db, cursor=request.args.get("conversations_cursor") or None, limit=25, with_last_message=False
+            )
+        except CursorError:
+            conversations, next_conversations_cursor = list_conversation_page(db, limit=25, with_last_message=False)
 
         if preview_campaign_id:
             campaign = db.query(Campaign).filter_by(id=preview_campaign_id).one_or_none()
@@ -209,8 +274,10 @@ def admin_dashboard():
         presets=presets,
         selected_preview_preset=preview_preset_id,
         stats=stats,
+        latency=latency,
         campaigns=campaigns,
         conversations=conversations,
+        next_conversations_cursor=next_conversations_cursor,
         base_url=settings.base_url,
         amp_simulation=amp_simulation,
         message=message,
@@ -218,6 +285,55 @@ def admin_dashboard():
     )
 
 
+def _campaign_creator(
+    fields: dict[str, str], recipients: list[dict[str, str]], preset_id: str, sync_brands: bool = False
+):
+    """Write intent for a new draft campaign: its row, recipients, stored prompt and counters; returns the prompt."""
+
+    def _create(db) -> str:
+        if sync_brands:
+            sync_brands_table(db)
+        db.add(Campaign(**fields, status="draft"))
+        for recipient in recipients:
+            db.add(
+                CampaignRecipient(
+                    campaign_id=fields["id"],
+                    email=recipient["email"],
+                    first_name=recipient["first_name"],
+                    token_id=str(uuid.uuid4()),
+                )
+            )
+        prompt = store_campaign_prompt(db, fields["id"], fields["brand_id"], preset_id)
+        record_campaign_created(db, fields["id"], len(recipients))
+        return prompt
+
+    return _create
+
+
+def _campaign_send_recorder(
+    campaign: Campaign, status: str, sent_at: dict[int, datetime], newly_sent: int, failed: int
+):
+    """Write intent for the end of a send: sent_at stamps, campaign status, counters and the render log."""
+    campaign_id, brand_id, previous_status = campaign.id, campaign.brand_id, campaign.status
+
+    def _record(db) -> None:
+        if sent_at:
+            db.execute(update(CampaignRecipient), [{"id": key, "sent_at": value} for key, value in sent_at.items()])
+        db.execute(update(Campaign).where(Campaign.id == campaign_id).values(status=status))
+        record_campaign_send(db, campaign_id, previous_status, status, newly_sent, failed)
+        db.add(TemplateRender(campaign_id=campaign_id, brand_id=brand_id, template_version="v1"))
+
+    return _record
+
+
+def _store_prompt(db, campaign: Campaign, preset_id: str) -> str:
+    """Persist the campaign prompt through the writer, then cache it once it is committed."""
+    campaign_id, brand_id = campaign.id, campaign.brand_id
+    prompt = run_write(db, lambda session: store_campaign_prompt(session, campaign_id, brand_id, preset_id))
+    cache_campaign_prompt(campaign_id, prompt)
+    return prompt
+
+
 @app.post("/demo/admin/campaigns/create")
 def admin_create_campaign():
     brand_id = request.form.get("brand_id", "").strip()
@@ -241,36 +357,22 @@ def admin_create_campaign():
         return redirect(url_for("admin_dashboard", error=f"Invalid brand config: {exc}"))
 
     campaign_id = str(uuid.uuid4())
+    fields = {
+        "id": campaign_id,
+        "brand_id": brand_id,
+        "name": name,
+        "subject": subject,
+        "from_email": from_email,
+        "reply_to": reply_to,
+    }
     with SessionLocal() as db:
-        campaign = Campaign(
-            id=campaign_id,
-            brand_id=brand_id,
-            name=name,
-            subject=subject,
-            from_email=from_email,
-            reply_to=reply_to,
-            status="draft",
-        )
-        db.add(campaign)
-        for recipient in recipients:
-            db.add(
-                CampaignRecipient(
-                    campaign_id=campaign_id,
-                    email=recipient["email"],
-                    first_name=recipient["first_name"],
-                    token_id=str(uuid.uuid4()),
-                )
-            )
-        db.add(
-            Event(
-                campaign_id=campaign_id,
-                event_type="campaign_created",
-                payload_json=json.dumps(
-                    {"name": name, "recipient_count": len(recipients), "preset_id": preset_id}
-                ),
-            )
-        )
-        db.commit()
+        prompt = run_write(db, _campaign_creator(fields, recipients, preset_id))
+    cache_campaign_prompt(campaign_id, prompt)
+    emit_event(
+        "campaign_created",
+        campaign_id=campaign_id,
+        payload={"name": name, "recipient_count": len(recipients), "preset_id": preset_id},
+    )
 
     return redirect(url_for("admin_dashboard", message=f"Campaign created: {campaign_id}"))
 
@@ -294,12 +396,24 @@ def admin_send_campaign(campaign_id: str):
         except TemplateError as exc:
             return redirect(url_for("admin_dashboard", error=f"Invalid theme: {exc}"))
 
+        answer_cache.invalidate_campaign(campaign.id)
+        system_prompt = _store_prompt(db, campaign, preset_id)
+        if _warmup_requested(request.form.get("warmup")):
+            start_campaign_warmup(
+                campaign.id,
+                campaign.brand_id,
+                campaign_warmup_questions(preset_id),
+                system_prompt,
+            )
         recipients = db.query(CampaignRecipient).filter_by(campaign_id=campaign.id).all()
         campaign_payload = {"subject": campaign.subject, "from_email": campaign.from_email, "reply_to": campaign.reply_to}
 
-        for recipient in recipients:
-            token = sign_token(campaign_id=campaign.id, recipient=recipient.email, token_id=recipient.token_id)
+        newly_sent = 0
+        sent_at: dict[int, datetime] = {}
+        tokens = sign_tokens_batch(campaign.id, [(recipient.email, recipient.token_id) for recipient in recipients])
+        for recipient, token in zip(recipients, tokens):
             try:
+                render_start = time.perf_counter()
                 rendered = render_campaign_templates(
                     brand_cfg,
                     campaign=_campaign_payload_with_preset(
@@ -309,7 +423,9 @@ def admin_send_campaign(campaign_id: str):
                     recipient={"email": recipient.email, "first_name": recipient.first_name or "there"},
                     chat_endpoint=chat_endpoint,
                     token=token,
+                    open_pixel_url=open_pixel_url(base_url, campaign.id, recipient.token_id),
                 )
+                record_latency("render", (time.perf_counter() - render_start) * 1000, campaign.id, "template")
                 message_id = send_campaign_email(
                     campaign_payload,
                     recipient.email,
@@ -317,28 +433,25 @@ def admin_send_campaign(campaign_id: str):
                     rendered["html_html"],
                     rendered["text_body"],
                 )
-                recipient.sent_at = datetime.utcnow()
+                if recipient.sent_at is None:
+                    newly_sent += 1
+                sent_at[recipient.id] = datetime.utcnow()
                 sent += 1
-                db.add(
-                    Event(
-                        campaign_id=campaign.id,
-                        event_type="campaign_send_success",
-                        payload_json=json.dumps({"email": recipient.email, "message_id": message_id}),
-                    )
+                emit_event(
+                    "campaign_send_success",
+                    campaign_id=campaign.id,
+                    payload={"email": recipient.email, "message_id": message_id},
                 )
             except (TemplateError, MailerError) as exc:
                 failures.append({"email": recipient.email, "error": str(exc)})
-                db.add(
-                    Event(
-                        campaign_id=campaign.id,
-                        event_type="campaign_send_failure",
-                        payload_json=json.dumps({"email": recipient.email, "error": str(exc)}),
-                    )
+                emit_event(
+                    "campaign_send_failure",
+                    campaign_id=campaign.id,
+                    payload={"email": recipient.email, "error": str(exc)},
                 )
 
-        campaign.status = "sent" if sent else "failed"
-        db.add(TemplateRender(campaign_id=campaign.id, brand_id=campaign.brand_id, template_version="v1"))
-        db.commit()
+        status = "sent" if sent else "failed"
+        run_write(db, _campaign_send_recorder(campaign, status, sent_at, newly_sent, len(failures)))
 
     if failures:
         return redirect(url_for("admin_dashboard", error=f"Sent {sent}, failed {len(failures)}"))
@@ -351,15 +464,62 @@ def admin_conversation_detail(convo_id: str):
         convo = db.query(Conversation).filter_by(id=convo_id).one_or_none()
         if convo is None:
             return redirect(url_for("admin_dashboard", error="Conversation not found"))
-        messages = get_conversation_messages(db, convo.id)
+        try:
+            since_id = int(request.args["since"]) if request.args.get("since") else None
+        except ValueError:
+            since_id = None
+        limit = page_size(None)
+        messages = get_conversation_messages(db, convo.id, since_id=since_id, limit=limit + 1)
+        next_since = messages[limit - 1]["id"] if len(messages) > limit else None
 
-    return render_template("admin/conversation.html", conversation=convo, messages=messages)
+    return render_template(
+        "admin/conversation.html",
+        conversation=convo,
+        messages=messages[:limit],
+        next_since=next_since,
+    )
+
+
+def _search_args() -> tuple[str, str | None, str | None, int, int]:
+    query = request.args.get("q", "").strip()
+    campaign_id = request.args.get("campaign_id", "").strip() or None
+    brand_id = request.args.get("brand_id", "").strip() or None
+    try:
+        offset = max(0, int(request.args.get("offset") or 0))
+        limit = page_size(request.args.get("limit"), default=25)
+    except (ValueError, CursorError) as exc:
+        raise SearchError("offset and limit must be integers") from exc
+    return query, campaign_id, brand_id, offset, limit
+
+
+@app.get("/demo/admin/search")
+def admin_search():
+    results, next_offset, error = [], None, ""
+    query, campaign_id, brand_id, offset, limit = "", None, None, 0, 25
+    try:
+        query, campaign_id, brand_id, offset, limit = _search_args()
+        if query:
+            with SessionLocal() as db:
+                results, next_offset = search_messages(db, query, campaign_id, brand_id, offset, limit)
+    except SearchError as exc:
+        error = str(exc)
+
+    return render_template(
+        "admin/search.html",
+        brands=load_all_brand_configs(),
+        query=query,
+        campaign_id=campaign_id or "",
+        brand_id=brand_id or "",
+        results=results,
+        next_offset=next_offset,
+        error=error,
+    )
 
 
 @app.post("/api/v1/demo/brands/sync")
 def sync_brands_endpoint():
     with SessionLocal() as db:
-        sync_brands_table(db)
+        run_write(db, sync_brands_table)
     return jsonify({"ok": True, "request_id": g.request_id})
 
 
@@ -384,46 +544,30 @@ def create_campaign():
     except TemplateError as exc:
         return _error(str(exc), 400)
 
-    campaign_id = str(uuid.uuid4())
+    rows = []
+    for recipient in recipients:
+        email = str(recipient.get("email", "")).strip()
+        if not email:
+            return _error("Each recipient must include email", 400)
+        rows.append({"email": email, "first_name": str(recipient.get("first_name", "there"))})
 
+    campaign_id = str(uuid.uuid4())
+    fields = {
+        "id": campaign_id,
+        "brand_id": brand_id,
+        "name": str(data["name"]),
+        "subject": str(data["subject"]),
+        "from_email": str(data["from_email"]),
+        "reply_to": str(data["reply_to"]),
+    }
     with SessionLocal() as db:
-        sync_brands_table(db)
-
-        campaign = Campaign(
-            id=campaign_id,
-            brand_id=brand_id,
-            name=str(data["name"]),
-            subject=str(data["subject"]),
-            from_email=str(data["from_email"]),
-            reply_to=str(data["reply_to"]),
-            status="draft",
-        )
-        db.add(campaign)
-
-        for recipient in recipients:
-            email = str(recipient.get("email", "")).strip()
-            if not email:
-                db.rollback()
-                return _error("Each recipient must include email", 400)
-            db.add(
-                CampaignRecipient(
-                    campaign_id=campaign_id,
-                    email=email,
-                    first_name=str(recipient.get("first_name", "there")),
-                    token_id=str(uuid.uuid4()),
-                )
-            )
-
-        db.add(
-            Event(
-                campaign_id=campaign_id,
-                event_type="campaign_created",
-                payload_json=json.dumps(
-                    {"name": data["name"], "recipient_count": len(recipients), "preset_id": preset_id}
-                ),
-            )
-        )
-        db.commit()
+        prompt = run_write(db, _campaign_creator(fields, rows, preset_id, sync_brands=True))
+    cache_campaign_prompt(campaign_id, prompt)
+    emit_event(
+        "campaign_created",
+        campaign_id=campaign_id,
+        payload={"name": str(data["name"]), "recipient_count": len(recipients), "preset_id": preset_id},
+    )
 
     return (
         jsonify(
@@ -462,15 +606,27 @@ def send_campaign(campaign_id: str):
         if not recipients:
             return _error("Campaign has no recipients", 400)
 
+        # Preset content may change between sends, so cached answers are re-earned.
+        answer_cache.invalidate_campaign(campaign.id)
+        system_prompt = _store_prompt(db, campaign, preset_id)
+        warmup_questions: list[str] = []
+        if _warmup_requested(data.get("warmup")):
+            extra = data.get("warmup_questions")
+            warmup_questions = campaign_warmup_questions(preset_id, extra if isinstance(extra, list) else None)
+            start_campaign_warmup(campaign.id, campaign.brand_id, warmup_questions, system_prompt)
+
         campaign_payload = {
             "subject": campaign.subject,
             "from_email": campaign.from_email,
             "reply_to": campaign.reply_to,
         }
 
-        for recipient in recipients:
-            token = sign_token(campaign_id=campaign.id, recipient=recipient.email, token_id=recipient.token_id)
+        newly_sent = 0
+        sent_at: dict[int, datetime] = {}
+        tokens = sign_tokens_batch(campaign.id, [(recipient.email, recipient.token_id) for recipient in recipients])
+        for recipient, token in zip(recipients, tokens):
             try:
+                render_start = time.perf_counter()
                 rendered = render_campaign_templates(
                     brand_cfg,
                     campaign=_campaign_payload_with_preset(
@@ -480,7 +636,9 @@ def send_campaign(campaign_id: str):
                     recipient={"email": recipient.email, "first_name": recipient.first_name or "there"},
                     chat_endpoint=chat_endpoint,
                     token=token,
+                    open_pixel_url=open_pixel_url(base_url, campaign.id, recipient.token_id),
                 )
+                record_latency("render", (time.perf_counter() - render_start) * 1000, campaign.id, "template")
                 message_id = send_campaign_email(
                     campaign_payload,
                     recipient.email,
@@ -488,28 +646,25 @@ def send_campaign(campaign_id: str):
                     rendered["html_html"],
                     rendered["text_body"],
                 )
-                recipient.sent_at = datetime.utcnow()
+                if recipient.sent_at is None:
+                    newly_sent += 1
+                sent_at[recipient.id] = datetime.utcnow()
                 sent += 1
-                db.add(
-                    Event(
-                        campaign_id=campaign.id,
-                        event_type="campaign_send_success",
-                        payload_json=json.dumps({"email": recipient.email, "message_id": message_id}),
-                    )
+                emit_event(
+                    "campaign_send_success",
+                    campaign_id=campaign.id,
+                    payload={"email": recipient.email, "message_id": message_id},
                 )
             except (TemplateError, MailerError) as exc:
                 failures.append({"email": recipient.email, "error": str(exc)})
-                db.add(
-                    Event(
-                        campaign_id=campaign.id,
-                        event_type="campaign_send_failure",
-                        payload_json=json.dumps({"email": recipient.email, "error": str(exc)}),
-                    )
+                emit_event(
+                    "campaign_send_failure",
+                    campaign_id=campaign.id,
+                    payload={"email": recipient.email, "error": str(exc)},
                 )
 
-        campaign.status = "sent" if sent else "failed"
-        db.add(TemplateRender(campaign_id=campaign.id, brand_id=campaign.brand_id, template_version="v1"))
-        db.commit()
+        status = "sent" if sent else "failed"
+        run_write(db, _campaign_send_recorder(campaign, status, sent_at, newly_sent, len(failures)))
 
     return jsonify(
         {
@@ -517,11 +672,150 @@ def send_campaign(campaign_id: str):
             "sent": sent,
             "failed": failures,
             "status": "sent" if sent else "failed",
+            "warmup_questions": len(warmup_questions),
             "request_id": g.request_id,
         }
     )
 
 
+@app.get("/api/v1/demo/answer-cache")
+def answer_cache_stats():
+    return jsonify({"answer_cache": answer_cache.stats(), "request_id": g.request_id})
+
+
+@app.get("/api/v1/demo/campaigns/<campaign_id>/events")
+def campaign_event_counts(campaign_id: str):
+    since = None
+    if request.args.get("since"):
+        try:
+            since = datetime.fromisoformat(request.args["since"])
+        except ValueError:
+            return _error("since must be an ISO timestamp", 400)
+    by_hour = request.args.get("by_hour", "").lower() in {"1", "true", "yes"}
+
+    with SessionLocal() as db:
+        rows = rollup_counts(db, campaign_id=campaign_id, since=since, by_hour=by_hour)
+    for row in rows:
+        if "bucket_hour" in row:
+            row["bucket_hour"] = row["bucket_hour"].isoformat()
+    return jsonify({"campaign_id": campaign_id, "counts": rows, "request_id": g.request_id})
+
+
+@app.get("/api/v1/demo/campaigns/<campaign_id>/export")
+def export_campaign_conversations(campaign_id: str):
+    export_format = request.args.get("format", "ndjson").lower()
+    if export_format not in {"ndjson", "gzip"}:
+        return _error("format must be ndjson or gzip", 400)
+    cursor = request.args.get("cursor") or None
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except CursorError as exc:
+            return _error(str(exc), 400)
+
+    compress = export_format == "gzip"
+    response = Response(
+        export_stream(SessionLocal, campaign_id, cursor=cursor, compress=compress),
+        mimetype="application/gzip" if compress else "application/x-ndjson",
+    )
+    if compress:
+        response.headers["Content-Disposition"] = f'attachment; filename="{campaign_id}.ndjson.gz"'
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@app.get("/api/v1/demo/search")
+def search_conversation_messages():
+    try:
+        query, campaign_id, brand_id, offset, limit = _search_args()
+        if not query:
+            return _error("Missing q", 400)
+        with SessionLocal() as db:
+            results, next_offset = search_messages(db, query, campaign_id, brand_id, offset, limit)
+    except SearchError as exc:
+        return _error(str(exc), 400)
+    return jsonify({"query": query, "results": results, "next_offset": next_offset, "request_id": g.request_id})
+
+
+@app.get("/api/v1/demo/retention")
+def retention_stats():
+    return jsonify({"retention": retention_sweeper.stats(), "request_id": g.request_id})
+
+
+@app.post("/api/v1/demo/retention/sweep")
+def run_retention_sweep():
+    return jsonify({"sweep": retention_sweeper.run_once(), "request_id": g.request_id})
+
+
+@app.get("/api/v1/demo/latency")
+def latency_stats():
+    campaign_id = request.args.get("campaign_id") or None
+    try:
+        since_hours = float(request.args.get("since_hours", "24"))
+    except ValueError:
+        return _error("since_hours must be a number", 400)
+
+    with SessionLocal() as db:
+        rows = latency_summary(db, campaign_id=campaign_id, since_hours=since_hours)
+    return jsonify({"latency": rows, "since_hours": since_hours, "request_id": g.request_id})
+
+
+@app.get("/api/v1/demo/event-sink")
+def event_sink_stats():
+    return jsonify({"event_sink": event_sink.stats(), "open_tracker": open_tracker.stats(), "request_id": g.request_id})
+
+
+@app.get("/o/<open_id>.gif")
+def open_pixel(open_id: str):
+    # Always answer with the pixel; a bad id just is not counted. The DB write happens in open_tracker's flush.
+    try:
+        campaign_id, token_id = verify_open_id(open_id)
+    except TokenError:
+        pass
+    else:
+        open_tracker.record(campaign_id, token_id)
+    response = make_response(PIXEL_GIF)
+    response.headers["Content-Type"] = "image/gif"
+    response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
+    return response
+
+
+@app.get("/api/v1/demo/providers")
+def provider_stats():
+    return jsonify(
+        {
+            "providers": provider_pool.stats(),
+            "admission": provider_limiter.stats(),
+            "token_cache": token_cache_stats(),
+            "request_id": g.request_id,
+        }
+    )
+
+
+@app.post("/api/v1/demo/campaigns/<campaign_id>/warmup")
+def warmup_campaign(campaign_id: str):
+    data = _request_data()
+    preset_id = str(data.get("preset_id", DEFAULT_PRESET_ID)).strip() or DEFAULT_PRESET_ID
+    extra = data.get("questions")
+
+    with SessionLocal() as db:
+        campaign = db.query(Campaign).filter_by(id=campaign_id).one_or_none()
+        if campaign is None:
+            return _error("Campaign not found", 404)
+        brand_id = campaign.brand_id
+        system_prompt = system_prompt_for(db, campaign_id)
+
+    questions = campaign_warmup_questions(preset_id, extra if isinstance(extra, list) else None)
+    stats = warm_campaign_answers(campaign_id, brand_id, questions, system_prompt)
+    return jsonify({"campaign_id": campaign_id, "warmup": stats, "request_id": g.request_id})
+
+
+@app.post("/api/v1/demo/campaigns/<campaign_id>/answer-cache/invalidate")
+def invalidate_answer_cache(campaign_id: str):
+    removed = answer_cache.invalidate_campaign(campaign_id)
+    return jsonify({"campaign_id": campaign_id, "removed": removed, "request_id": g.request_id})
+
+
 @app.get("/api/v1/demo/preview/<brand_id>")
 def preview_brand(brand_id: str):
     subject = request.args.get("subject", "")
@@ -625,39 +919,90 @@ def chat_message():
     recipient = str(claims["recipient"])
     token_id = str(claims["token_id"])
 
-    with SessionLocal() as db:
+    requested_convo_id = str(convo_id) if convo_id else None
+
+    started = time.perf_counter()
+    with deadline_scope(settings.chat_deadline_sec) as deadline, latency_scope(campaign_id) as latency_labels, SessionLocal() as db:
         if not campaign_id.startswith("preview-"):
-            recipient_row = (
-                db.query(CampaignRecipient)
-                .filter_by(campaign_id=campaign_id, email=recipient, token_id=token_id)
-                .one_or_none()
-            )
-            if recipient_row is None:
+            recipient_exists = cached_recipient_exists(str(token))
+            if recipient_exists is None:
+                recipient_exists = (
+                    db.query(CampaignRecipient.id)
+                    .filter_by(campaign_id=campaign_id, email=recipient, token_id=token_id)
+                    .first()
+                    is not None
+                )
+                remember_recipient_exists(str(token), recipient_exists)
+            if not recipient_exists:
                 return _error("Token does not match a campaign recipient", 403)
 
-        try:
-            convo_id, response_text, latency_ms = handle_message(
+        owns_turn = False
+
+        def _answer() -> tuple[str, str]:
+            nonlocal owns_turn
+            stored = find_recent_reply(
                 db,
                 campaign_id=campaign_id,
                 recipient_email=recipient,
                 token_id=token_id,
                 user_message=message,
-                convo_id=str(convo_id) if convo_id else None,
+                convo_id=requested_convo_id,
+                window_sec=settings.chat_dedupe_window_sec,
             )
-            db.add(
-                Event(
-                    campaign_id=campaign_id,
-                    conversation_id=convo_id,
-                    event_type="chat_response_returned",
-                    payload_json=json.dumps({"latency_ms": latency_ms}),
-                )
+            if stored is not None:
+                return stored
+
+            owns_turn = True
+            answered_convo_id, answer, _ = handle_message(
+                db,
+                campaign_id=campaign_id,
+                recipient_email=recipient,
+                token_id=token_id,
+                user_message=message,
+                convo_id=requested_convo_id,
+                extra_events=[("chat_response_returned", {})],
+            )
+            return answered_convo_id, answer
+
+        try:
+            check_deadline("recipient lookup")
+            (convo_id, response_text), _ = chat_singleflight.do(
+                request_key(str(token), requested_convo_id, message),
+                _answer,
+                wait_timeout=deadline.remaining(),
+            )
+        except (DeadlineExceeded, TimeoutError):
+            # The AMP client has likely given up already; answer fast instead of holding the worker.
+            db.rollback()
+            if owns_turn:
+                # Singleflight followers leave the user's message to the request that ran the turn.
+                convo_id = _keep_unanswered_turn(
+                    db, campaign_id, recipient, token_id, message, requested_convo_id
+                ) or convo_id
+            record_latency("chat_e2e", (time.perf_counter() - started) * 1000, campaign_id, "fallback")
+            return jsonify(
+                {
+                    "convo_id": convo_id or "",
+                    "user_message": message,
+                    "response": deadline_fallback_reply(db, campaign_id),
+                    "degraded": True,
+                    "request_id": g.request_id,
+                }
             )
-            db.commit()
+        except Overloaded as exc:
+            db.rollback()
+            return _overloaded(exc)
+        except WriteTimeout as exc:
+            # The turn was cancelled before it was written, so the client can safely resend it.
+            db.rollback()
+            return _write_busy(exc)
         except ChatServiceError as exc:
             status_code = 404 if "not found" in str(exc).lower() else 500
             db.rollback()
             return _error(str(exc), status_code)
 
+    # No provider model noted means the answer came from the answer cache or a deduplicated retry.
+    record_latency("chat_e2e", (time.perf_counter() - started) * 1000, campaign_id, latency_labels["model"] or "cached")
     return jsonify(
         {
             "convo_id": convo_id,
@@ -684,6 +1029,12 @@ def chat_history():
     recipient = str(claims["recipient"])
     token_id = str(claims["token_id"])
     convo_id = request.args.get("convo_id")
+    try:
+        since_id = int(request.args["since"]) if request.args.get("since") else None
+        limit = int(request.args.get("limit") or settings.chat_history_max_page)
+    except ValueError:
+        return _error("since and limit must be integers", 400)
+    limit = max(1, min(limit, settings.chat_history_max_page))
 
     with SessionLocal() as db:
         query = db.query(Conversation).filter_by(
@@ -699,53 +1050,70 @@ def chat_history():
         if convo is None:
             return jsonify({"messages": [], "request_id": g.request_id})
 
-        return jsonify(
-            {
-                "convo_id": convo.id,
-                "messages": get_conversation_messages(db, convo.id),
-                "request_id": g.request_id,
-            }
-        )
+        # The URL carries since/limit, so the last message id is enough to validate each polled view.
+        etag = f"{convo.id}-{last_message_id(db, convo.id)}"
+        if request.if_none_match.contains(etag):
+            response = make_response("", 304)
+        else:
+            messages = get_conversation_messages(db, convo.id, since_id=since_id, limit=limit + 1)
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+            response = jsonify(
+                {
+                    "convo_id": convo.id,
+                    "messages": messages,
+                    "next_since": messages[-1]["id"] if messages else since_id,
+                    "has_more": has_more,
+                    "request_id": g.request_id,
+                }
+            )
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
 
 @app.get("/api/v1/demo/conversations")
 def list_conversations():
     with SessionLocal() as db:
-        rows = db.query(Conversation).order_by(Conversation.last_message_at.desc()).limit(100).all()
-        payload = []
-        for row in rows:
-            last = (
-                db.query(Message)
-                .filter(Message.conversation_id == row.id)
-                .order_by(Message.created_at.desc(), Message.id.desc())
-                .first()
-            )
-            payload.append(
-                {
-                    "convo_id": row.id,
-                    "campaign_id": row.campaign_id,
-                    "recipient_email": row.recipient_email,
-                    "last_message": last.content if last else "",
-                    "last_message_at": row.last_message_at.isoformat() if row.last_message_at else None,
-                }
+        try:
+            rows, next_cursor = list_conversation_page(
+                db,
+                campaign_id=request.args.get("campaign_id") or None,
+                recipient_email=request.args.get("recipient_email") or None,
+                cursor=request.args.get("cursor") or None,
+                limit=page_size(request.args.get("limit")),
             )
+        except CursorError as exc:
+            return _error(str(exc), 400)
 
-    return jsonify({"conversations": payload, "request_id": g.request_id})
+    payload = [
+        {**row, "last_message_at": row["last_message_at"].isoformat() if row["last_message_at"] else None}
+        for row in rows
+    ]
+    return jsonify({"conversations": payload, "next_cursor": next_cursor, "request_id": g.request_id})
 
 
 @app.get("/api/v1/conversations/<convo_id>")
 def conversation_detail(convo_id: str):
+    try:
+        since_id = int(request.args["since"]) if request.args.get("since") else None
+        limit = page_size(request.args.get("limit"))
+    except (ValueError, CursorError):
+        return _error("since and limit must be integers", 400)
+
     with SessionLocal() as db:
         convo = db.query(Conversation).filter_by(id=convo_id).one_or_none()
         if convo is None:
             return _error("Conversation not found", 404)
 
+        messages = get_conversation_messages(db, convo.id, since_id=since_id, limit=limit + 1)
         return jsonify(
             {
                 "convo_id": convo.id,
                 "campaign_id": convo.campaign_id,
                 "recipient_email": convo.recipient_email,
-                "messages": get_conversation_messages(db, convo.id),
+                "messages": messages[:limit],
+                "next_since": messages[limit - 1]["id"] if len(messages) > limit else None,
                 "request_id": g.request_id,
             }
         )
@@ -765,16 +1133,31 @@ def ganggang():
 
     convo_id = data.get("convo_id") or None
 
-    with SessionLocal() as db:
+    with deadline_scope(settings.chat_deadline_sec), SessionLocal() as db:
         try:
             convo_id, reply, _ = handle_message(
                 db,
-                campaign_id="legacy",
+                campaign_id=LEGACY_CAMPAIGN_ID,
                 recipient_email="legacy-user@example.com",
                 token_id="legacy-token",
                 user_message=message,
                 convo_id=str(convo_id) if convo_id else None,
             )
+        except DeadlineExceeded:
+            db.rollback()
+            convo_id = _keep_unanswered_turn(
+                db,
+                LEGACY_CAMPAIGN_ID,
+                "legacy-user@example.com",
+                "legacy-token",
+                message,
+                str(convo_id) if convo_id else None,
+            ) or convo_id
+            reply = deadline_fallback_reply(db, LEGACY_CAMPAIGN_ID)
+        except Overloaded as exc:
+            return _overloaded(exc)
+        except WriteTimeout as exc:
+            return _write_busy(exc)
         except ChatServiceError as exc:
             return _error(str(exc), 500)
 
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from typing import Any, Callable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "finished_at")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.finished_at: float | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key and replay the result for a short window.
+
+    The first caller (the leader) runs the function; callers arriving while it is in
+    flight block on its completion and receive the same result. Successful results
+    are kept for ``window_sec`` so late duplicates are answered without re-running.
+    Failures are not kept, so a retry after an error runs again.
+    """
+
+    def __init__(self, window_sec: float, clock: Callable[[], float] = time.monotonic):
+        self.window_sec = window_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self._leaders = 0
+        self._coalesced = 0
+        self._replayed = 0
+        self._next_purge = 0.0
+
+    def do(self, key: str, fn: Callable[[], Any], wait_timeout: float | None = None) -> tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is True when another call produced the result."""
+        with self._lock:
+            self._purge()
+            call = self._calls.get(key)
+            if call is not None and call.finished_at is not None and call.finished_at < self._clock() - self.window_sec:
+                call = None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._leaders += 1
+                leader = True
+            else:
+                leader = False
+                if call.done.is_set():
+                    self._replayed += 1
+                else:
+                    self._coalesced += 1
+
+        if not leader:
+            if not call.done.wait(wait_timeout):
+                raise TimeoutError("Timed out waiting for in-flight duplicate request")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            with self._lock:
+                self._calls.pop(key, None)
+            raise
+        finally:
+            call.finished_at = self._clock()
+            call.done.set()
+        return call.result, False
+
+    def _purge(self) -> None:
+        now = self._clock()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.window_sec / 2
+        cutoff = now - self.window_sec
+        expired = [
+            key
+            for key, call in self._calls.items()
+            if call.finished_at is not None and call.finished_at < cutoff
+        ]
+        for key in expired:
+            del self._calls[key]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "tracked": len(self._calls),
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "replayed": self._replayed,
+            }
+
+
+def request_key(*parts: str | None) -> str:
+    raw = "\x1f".join(part or "" for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import func, update
+
+from event_store import ndjson_event_counts, rollup_counts
+from models import Campaign, CampaignRecipient, CampaignStats, Conversation, StatCounter
+
+
+# Global dashboard counters kept in stat_counters; each campaign status has a "<status>_count".
+GLOBAL_COUNTERS = ("campaign_count", "draft_count", "sent_count", "failed_count", "conversation_count")
+
+
+def _bump_counter(db_session, name: str, delta: int) -> None:
+    result = db_session.execute(
+        update(StatCounter).where(StatCounter.name == name).values(value=StatCounter.value + delta)
+    )
+    if result.rowcount == 0:
+        db_session.add(StatCounter(name=name, value=delta))
+        db_session.flush()
+
+
+def _bump_campaign(db_session, campaign_id: str, **deltas: int) -> None:
+    values = {column: getattr(CampaignStats, column) + delta for column, delta in deltas.items() if delta}
+    if not values:
+        return
+    values["updated_at"] = datetime.utcnow()
+    db_session.execute(update(CampaignStats).where(CampaignStats.campaign_id == campaign_id).values(**values))
+
+
+# The record_* helpers run inside the caller's transaction; callers commit.
+
+
+def record_campaign_created(db_session, campaign_id: str, recipient_count: int, status: str = "draft") -> None:
+    db_session.add(CampaignStats(campaign_id=campaign_id, recipient_count=recipient_count))
+    _bump_counter(db_session, "campaign_count", 1)
+    _bump_counter(db_session, f"{status}_count", 1)
+
+
+def record_campaign_send(
+    db_session, campaign_id: str, previous_status: str, new_status: str, newly_sent: int, failed: int
+) -> None:
+    _bump_campaign(db_session, campaign_id, sent_count=newly_sent, failed_count=failed)
+    if previous_status != new_status:
+        _bump_counter(db_session, f"{previous_status}_count", -1)
+        _bump_counter(db_session, f"{new_status}_count", 1)
+
+
+def record_conversation_started(db_session, campaign_id: str) -> None:
+    _bump_counter(db_session, "conversation_count", 1)
+    _bump_campaign(db_session, campaign_id, conversation_count=1)
+
+
+def record_conversations_deleted(db_session, campaign_id: str, count: int) -> None:
+    _bump_counter(db_session, "conversation_count", -count)
+    _bump_campaign(db_session, campaign_id, conversation_count=-count)
+
+
+def dashboard_totals(db_session) -> dict[str, int]:
+    rows = dict(db_session.query(StatCounter.name, StatCounter.value).filter(StatCounter.name.in_(GLOBAL_COUNTERS)))
+    return {name: rows.get(name, 0) for name in GLOBAL_COUNTERS}
+
+
+def rebuild_stats(db_session) -> dict[str, int]:
+    """Recompute every counter from the base tables to repair drift; callers commit."""
+    recipients = dict(
+        db_session.query(CampaignRecipient.campaign_id, func.count(CampaignRecipient.id)).group_by(
+            CampaignRecipient.campaign_id
+        )
+    )
+    sent = dict(
+        db_session.query(CampaignRecipient.campaign_id, func.count(CampaignRecipient.id))
+        .filter(CampaignRecipient.sent_at.is_not(None))
+        .group_by(CampaignRecipient.campaign_id)
+    )
+    failed = {
+        row["campaign_id"]: row["count"]
+        for row in rollup_counts(db_session, event_types=["campaign_send_failure"])
+    }
+    if not failed:
+        # The NDJSON sink keeps no rollups; count its raw log instead.
+        failed = ndjson_event_counts(["campaign_send_failure"])
+    conversations = dict(
+        db_session.query(Conversation.campaign_id, func.count(Conversation.id)).group_by(Conversation.campaign_id)
+    )
+    statuses = dict(db_session.query(Campaign.status, func.count(Campaign.id)).group_by(Campaign.status))
+
+    db_session.query(CampaignStats).delete(synchronize_session="fetch")
+    now = datetime.utcnow()
+    campaign_ids = [row[0] for row in db_session.query(Campaign.id)]
+    db_session.add_all(
+        CampaignStats(
+            campaign_id=campaign_id,
+            recipient_count=recipients.get(campaign_id, 0),
+            sent_count=sent.get(campaign_id, 0),
+            failed_count=failed.get(campaign_id, 0),
+            conversation_count=conversations.get(campaign_id, 0),
+            updated_at=now,
+        )
+        for campaign_id in campaign_ids
+    )
+
+    totals = {f"{status}_count": count for status, count in statuses.items()}
+    totals["campaign_count"] = len(campaign_ids)
+    totals["conversation_count"] = sum(conversations.values())
+    db_session.query(StatCounter).delete(synchronize_session="fetch")
+    db_session.add_all(StatCounter(name=name, value=value) for name, value in totals.items())
+    db_session.flush()
+    return {name: totals.get(name, 0) for name in GLOBAL_COUNTERS}
+
+
+def ensure_stats(db_session) -> None:
+    """Backfill counters once for databases that predate the stats tables."""
+    if db_session.query(StatCounter.name).first() is None:
+        rebuild_stats(db_session)
+        db_session.commit()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import html
 import json
 import re
 from pathlib import Path
@@ -91,6 +92,7 @@ def load_all_brand_configs() -> list[dict[str, Any]]:
 
 
 def sync_brands_table(db_session) -> None:
+    """Upsert a Brand row per config file; callers commit."""
     configs = load_all_brand_configs()
     for cfg in configs:
         existing = db_session.query(Brand).filter_by(brand_id=cfg["brand_id"]).one_or_none()
@@ -106,7 +108,6 @@ def sync_brands_table(db_session) -> None:
         else:
             existing.name = cfg["brand_name"]
             existing.config_path = config_path
-    db_session.commit()
 
 
 def inject_chat_module(base_template: str, module_markup: str) -> str:
@@ -136,6 +137,7 @@ def render_campaign_templates(
     chat_endpoint: str,
     token: str,
     convo_id: str = "",
+    open_pixel_url: str = "",
 ) -> dict[str, str]:
     amp_base = _read_file(TEMPLATE_BASE_DIR / "amp_campaign_base.html")
     html_fallback = _read_file(TEMPLATE_BASE_DIR / "html_fallback_base.html")
@@ -185,8 +187,17 @@ def render_campaign_templates(
         "RECIPIENT_FIRST_NAME": recipient.get("first_name", "there"),
     }
 
-    amp_html = _replace_tokens(amp_with_module, token_map)
-    html_html = _replace_tokens(html_fallback, token_map)
+    # Previews pass no pixel URL so simulator loads never count as opens.
+    pixel_src = html.escape(open_pixel_url, quote=True)
+    amp_pixel = f'<amp-img src="{pixel_src}" width="1" height="1" alt=""></amp-img>' if open_pixel_url else ""
+    html_pixel = (
+        f'<img src="{pixel_src}" width="1" height="1" alt="" style="display:block;border:0;" />'
+        if open_pixel_url
+        else ""
+    )
+
+    amp_html = _replace_tokens(amp_with_module, {**token_map, "OPEN_PIXEL": amp_pixel})
+    html_html = _replace_tokens(html_fallback, {**token_map, "OPEN_PIXEL": html_pixel})
     text_body = (
         f"Hi {recipient.get('first_name', 'there')},\n\n"
         f"{campaign_content['subject']}\n\n"
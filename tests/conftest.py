@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Point the app at a throwaway SQLite file before any app module reads its settings.
+_TEST_DATA_DIR = Path(tempfile.mkdtemp(prefix="chat-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DATA_DIR / 'test.db'}"
+
+from database import SessionLocal  # noqa: E402
+from models import Campaign, CampaignRecipient, Conversation, Message  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TEST_DATA_DIR, ignore_errors=True)
+
+
+class Clock:
+    """Hand-driven stand-in for ``time.monotonic``; tests move ``now`` themselves."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def seed_campaign():
+    """``seed_campaign(campaign_id=None, recipients=[(email, token_id)], ...)`` -> campaign id.
+
+    The campaign row is only added if missing, so later calls just add recipients.
+    """
+
+    def seed(
+        campaign_id: str | None = None,
+        recipients: list[tuple[str, str]] | tuple = (),
+        brand_id: str = "acme",
+        status: str = "sent",
+        name: str = "Test Campaign",
+    ) -> str:
+        campaign_id = campaign_id or str(uuid.uuid4())
+        with SessionLocal() as db:
+            if db.get(Campaign, campaign_id) is None:
+                db.add(
+                    Campaign(
+                        id=campaign_id,
+                        brand_id=brand_id,
+                        name=name,
+                        subject="Testing",
+                        from_email="sender@example.com",
+                        reply_to="reply@example.com",
+                        status=status,
+                    )
+                )
+            for email, token_id in recipients:
+                db.add(CampaignRecipient(campaign_id=campaign_id, email=email, first_name="Test", token_id=token_id))
+            db.commit()
+        return campaign_id
+
+    return seed
+
+
+@pytest.fixture
+def seed_conversation():
+    """``seed_conversation(campaign_id, messages=[(role, content)], at=None, ...)`` -> conversation id.
+
+    The conversation and all of its messages are stamped ``at`` (default: now).
+    """
+
+    def seed(
+        campaign_id: str,
+        messages: list[tuple[str, str]] | tuple = (),
+        at: datetime | None = None,
+        recipient_email: str = "reader@example.com",
+        token_id: str | None = None,
+    ) -> str:
+        convo_id = str(uuid.uuid4())
+        at = at or datetime.utcnow()
+        with SessionLocal() as db:
+            db.add(
+                Conversation(
+                    id=convo_id,
+                    campaign_id=campaign_id,
+                    recipient_email=recipient_email,
+                    token_id=token_id or str(uuid.uuid4()),
+                    created_at=at,
+                    last_message_at=at,
+                )
+            )
+            for role, content in messages:
+                db.add(Message(conversation_id=convo_id, role=role, content=content, created_at=at))
+            db.commit()
+        return convo_id
+
+    return seed
@@ -0,0 +1,186 @@
+import threading
+import time
+import uuid
+from dataclasses import replace
+
+import pytest
+
+import admission
+import chat_service
+import provider_pool
+from admission import FairLimiter, Overloaded, admission_scope
+from deadline import DeadlineExceeded, deadline_scope
+from provider_pool import ProviderEndpoint, ProviderPool
+from server import app
+from token_service import sign_token
+
+
+def _wait_for_queue(limiter: FairLimiter, depth: int) -> None:
+    for _ in range(200):
+        if limiter.stats()["queued"] >= depth:
+            return
+        time.sleep(0.005)
+    raise AssertionError("waiters never queued")
+
+
+def test_limiter_rejects_when_queue_full():
+    limiter = FairLimiter(max_concurrent=1, max_queue_per_key=1, max_queue_total=10)
+    limiter.acquire("a")
+
+    waiter = threading.Thread(target=limiter.acquire, args=("a", 1))
+    waiter.start()
+    _wait_for_queue(limiter, 1)
+
+    with pytest.raises(Overloaded):
+        limiter.acquire("a", timeout=0.1)
+    assert limiter.stats()["rejected"] == 1
+
+    limiter.release()
+    waiter.join()
+
+
+def test_limiter_serves_keys_by_weight():
+    limiter = FairLimiter(max_concurrent=1, max_queue_per_key=10, max_queue_total=20, weights={"big": 1, "vip": 3})
+    limiter.acquire("holder")
+    order = []
+    lock = threading.Lock()
+
+    def worker(key):
+        limiter.acquire(key, timeout=2)
+        with lock:
+            order.append(key)
+        limiter.release()
+
+    threads = []
+    for key in ["big"] * 4 + ["vip"] * 4:
+        thread = threading.Thread(target=worker, args=(key,))
+        thread.start()
+        threads.append(thread)
+        _wait_for_queue(limiter, len(threads))
+
+    limiter.release()
+    for thread in threads:
+        thread.join()
+
+    assert order[:4].count("vip") >= 3
+
+
+def test_provider_slot_is_released_between_attempts(monkeypatch):
+    limiter = FairLimiter(max_concurrent=1, max_queue_per_key=1, max_queue_total=1)
+    monkeypatch.setattr(admission, "provider_limiter", limiter)
+    in_flight = []
+
+    def send(endpoint, messages, timeout):
+        in_flight.append(("call", limiter.stats()["in_flight"]))
+        if len(in_flight) == 1:
+            raise RuntimeError("provider hiccup")
+        return "ok"
+
+    def backoff(seconds):
+        in_flight.append(("backoff", limiter.stats()["in_flight"]))
+
+    monkeypatch.setattr(provider_pool.time, "sleep", backoff)
+    pool = ProviderPool([ProviderEndpoint("primary", "http://x", "m", "k")], send=send, retries=1)
+    with admission_scope("acme"):
+        assert pool.complete([{"role": "user", "content": "hi"}]).content == "ok"
+
+    assert in_flight == [("call", 1), ("backoff", 0), ("call", 1)]
+    assert limiter.stats()["in_flight"] == 0
+
+
+def _hedging_pool(send) -> ProviderPool:
+    endpoints = [ProviderEndpoint("primary", "http://x", "m", "k"), ProviderEndpoint("fallback", "http://y", "m", "k")]
+    pool = ProviderPool(endpoints, send=send, retries=0, hedge_min_ms=20)
+    for _ in range(20):
+        pool._latency["primary"].observe(20)
+    return pool
+
+
+def test_hedged_call_holds_its_own_slot_until_it_finishes(monkeypatch):
+    limiter = FairLimiter(max_concurrent=2, max_queue_per_key=1, max_queue_total=1)
+    monkeypatch.setattr(admission, "provider_limiter", limiter)
+    primary_done = threading.Event()
+
+    def send(endpoint, messages, timeout):
+        if endpoint.name == "primary":
+            primary_done.wait(2)
+            return "slow primary"
+        return "fast fallback"
+
+    with admission_scope("acme"):
+        assert _hedging_pool(send).complete([{"role": "user", "content": "hi"}]).endpoint == "fallback"
+
+    # The losing primary call is still running, so it still counts against the limit.
+    assert limiter.stats()["in_flight"] == 1
+    primary_done.set()
+    for _ in range(200):
+        if limiter.stats()["in_flight"] == 0:
+            break
+        time.sleep(0.005)
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_hedge_is_skipped_without_a_free_slot(monkeypatch):
+    limiter = FairLimiter(max_concurrent=1, max_queue_per_key=1, max_queue_total=1)
+    monkeypatch.setattr(admission, "provider_limiter", limiter)
+    seen = []
+
+    def send(endpoint, messages, timeout):
+        seen.append(endpoint.name)
+        time.sleep(0.1)
+        return endpoint.name
+
+    pool = _hedging_pool(send)
+    with admission_scope("acme"):
+        assert pool.complete([{"role": "user", "content": "hi"}]).endpoint == "primary"
+
+    assert seen == ["primary"]
+    assert pool.stats()["hedges"] == 0
+    assert limiter.stats()["timed_out"] == 0
+
+
+def test_queue_wait_cut_short_by_deadline_raises_deadline_exceeded(monkeypatch):
+    limiter = FairLimiter(max_concurrent=1, max_queue_per_key=1, max_queue_total=1)
+    monkeypatch.setattr(admission, "provider_limiter", limiter)
+    calls = []
+    pool = ProviderPool(
+        [ProviderEndpoint("primary", "http://x", "m", "k")],
+        send=lambda endpoint, messages, timeout: calls.append(endpoint) or "never sent",
+        retries=0,
+    )
+    limiter.acquire("other")
+
+    with admission_scope("acme"), deadline_scope(0.05):
+        with pytest.raises(DeadlineExceeded):
+            pool.complete([{"role": "user", "content": "hi"}])
+
+    assert calls == []
+    limiter.release()
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_chat_message_returns_503_with_retry_after(monkeypatch, seed_campaign):
+    calls = []
+    limiter = FairLimiter(max_concurrent=1, max_queue_per_key=1, max_queue_total=1, retry_after_sec=3)
+    monkeypatch.setattr(admission, "provider_limiter", limiter)
+    monkeypatch.setattr(admission, "settings", replace(admission.settings, provider_queue_timeout_sec=0.1))
+    pool = ProviderPool(
+        [ProviderEndpoint("primary", "http://x", "m", "k")],
+        send=lambda endpoint, messages, timeout: calls.append(endpoint) or "never sent",
+        retries=0,
+    )
+    monkeypatch.setattr(chat_service, "provider_pool", pool)
+    limiter.acquire("acme")  # another request holds the only slot
+
+    campaign_id, token_id, email = str(uuid.uuid4()), str(uuid.uuid4()), "busy@example.com"
+    seed_campaign(campaign_id, [(email, token_id)])
+
+    token = sign_token(campaign_id, email, token_id=token_id, ttl_seconds=600)
+    response = app.test_client().post("/api/v1/chat/message", json={"token": token, "message": "Any stock left?"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert "chat slot" in response.get_json()["error"]
+    assert calls == []
+    assert limiter.stats()["timed_out"] == 1
+    limiter.release()
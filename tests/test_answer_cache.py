@@ -0,0 +1,86 @@
+import uuid
+
+import chat_service
+from answer_cache import AnswerCache, normalize_question
+from database import SessionLocal
+from models import Message
+from server import app
+from token_service import sign_token
+
+
+def test_normalize_question_collapses_case_and_punctuation():
+    assert normalize_question("  Do you ship to CANADA?? ") == "do you ship to canada"
+    assert normalize_question("Is this on sale!") == normalize_question("is this on sale")
+
+
+def test_answer_cache_ttl_and_lru(clock):
+    cache = AnswerCache(max_entries=2, ttl_seconds=10, clock=clock)
+
+    cache.put("c1", "acme", "Shipping?", "Free over $75")
+    cache.put("c1", "acme", "Sizing?", "True to size")
+    assert cache.get("c1", "acme", "shipping") == "Free over $75"
+
+    cache.put("c1", "acme", "Returns?", "30 days")
+    assert cache.get("c1", "acme", "sizing") is None
+    assert cache.get("c1", "acme", "returns") == "30 days"
+
+    clock.now = 11
+    assert cache.get("c1", "acme", "returns") is None
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 2
+
+
+def test_answer_cache_invalidate_campaign():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60)
+    cache.put("c1", "acme", "a", "one")
+    cache.put("c2", "acme", "a", "two")
+
+    assert cache.invalidate_campaign("c1") == 1
+    assert cache.get("c1", "acme", "a") is None
+    assert cache.get("c2", "acme", "a") == "two"
+
+
+def test_answer_cache_invalidate_campaign_drops_its_preview_scope():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60)
+    cache.put("c1", "acme", "a", "live")
+    cache.put("preview-c1", "acme", "a", "simulated")
+    cache.put("preview-acme", "acme", "a", "gallery")
+
+    assert cache.invalidate_campaign("c1") == 2
+    assert cache.get("preview-c1", "acme", "a") is None
+    assert cache.get("preview-acme", "acme", "a") == "gallery"
+
+
+def test_first_turn_cache_hit_skips_provider(monkeypatch, seed_campaign):
+    calls = []
+
+    def fake_provider(messages):
+        calls.append(messages)
+        return "We ship free over $75.", 12
+
+    monkeypatch.setattr(chat_service, "_call_openrouter", fake_provider)
+    client = app.test_client()
+
+    campaign_id = str(uuid.uuid4())
+    recipients = [("cache-a@example.com", str(uuid.uuid4())), ("cache-b@example.com", str(uuid.uuid4()))]
+    seed_campaign(campaign_id, recipients)
+    tokens = [sign_token(campaign_id, email, token_id=token_id, ttl_seconds=600) for email, token_id in recipients]
+
+    first = client.post("/api/v1/chat/message", json={"token": tokens[0], "message": "Do you ship?"})
+    second = client.post("/api/v1/chat/message", json={"token": tokens[1], "message": "do you ship"})
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.get_json()["response"] == "We ship free over $75."
+    assert len(calls) == 1
+
+    with SessionLocal() as db:
+        cached = (
+            db.query(Message)
+            .filter_by(conversation_id=second.get_json()["convo_id"], role="assistant")
+            .one()
+        )
+    assert cached.provider == "answer_cache"
@@ -1,46 +1,18 @@
 import uuid
 
 import chat_service
-from database import SessionLocal
-from models import Campaign, CampaignRecipient
 from server import app
 from token_service import sign_token
 
 
-def _seed_campaign_and_recipient(campaign_id: str, email: str, token_id: str) -> None:
-    with SessionLocal() as db:
-        existing = db.query(Campaign).filter_by(id=campaign_id).one_or_none()
-        if existing is None:
-            db.add(
-                Campaign(
-                    id=campaign_id,
-                    brand_id="acme",
-                    name="Test Campaign",
-                    subject="Testing",
-                    from_email="sender@example.com",
-                    reply_to="reply@example.com",
-                    status="draft",
-                )
-            )
-        db.add(
-            CampaignRecipient(
-                campaign_id=campaign_id,
-                email=email,
-                first_name="Test",
-                token_id=token_id,
-            )
-        )
-        db.commit()
-
-
-def test_chat_message_success(monkeypatch):
+def test_chat_message_success(monkeypatch, seed_campaign):
     monkeypatch.setattr(chat_service, "_call_openrouter", lambda messages: ("stubbed", 9))
     client = app.test_client()
 
     campaign_id = str(uuid.uuid4())
     token_id = str(uuid.uuid4())
     email = "chat-success@example.com"
-    _seed_campaign_and_recipient(campaign_id, email, token_id)
+    seed_campaign(campaign_id, [(email, token_id)], status="draft")
 
     token = sign_token(campaign_id, email, token_id=token_id, ttl_seconds=600)
 
@@ -67,14 +39,14 @@ def test_chat_message_rejects_invalid_token(monkeypatch):
     assert response.status_code == 401
 
 
-def test_chat_message_rejects_expired_token(monkeypatch):
+def test_chat_message_rejects_expired_token(monkeypatch, seed_campaign):
     monkeypatch.setattr(chat_service, "_call_openrouter", lambda messages: ("stubbed", 9))
     client = app.test_client()
 
     campaign_id = str(uuid.uuid4())
     token_id = str(uuid.uuid4())
     email = "chat-expired@example.com"
-    _seed_campaign_and_recipient(campaign_id, email, token_id)
+    seed_campaign(campaign_id, [(email, token_id)], status="draft")
 
     token = sign_token(campaign_id, email, token_id=token_id, ttl_seconds=-10)
     response = client.post(
@@ -83,3 +55,43 @@ def test_chat_message_rejects_expired_token(monkeypatch):
     )
 
     assert response.status_code == 401
+
+
+def test_chat_history_since_cursor_and_etag(monkeypatch, seed_campaign):
+    monkeypatch.setattr(chat_service, "_call_openrouter", lambda messages: ("stubbed", 9))
+    client = app.test_client()
+
+    campaign_id = str(uuid.uuid4())
+    token_id = str(uuid.uuid4())
+    email = "chat-history@example.com"
+    seed_campaign(campaign_id, [(email, token_id)], status="draft")
+    token = sign_token(campaign_id, email, token_id=token_id, ttl_seconds=600)
+
+    first = client.post("/api/v1/chat/message", json={"token": token, "message": "hello"}).get_json()
+    convo_id = first["convo_id"]
+
+    full = client.get("/api/v1/chat/history", query_string={"token": token, "convo_id": convo_id})
+    assert full.status_code == 200
+    assert [m["role"] for m in full.get_json()["messages"]] == ["user", "assistant"]
+    etag = full.headers["ETag"]
+
+    unchanged = client.get(
+        "/api/v1/chat/history",
+        query_string={"token": token, "convo_id": convo_id},
+        headers={"If-None-Match": etag},
+    )
+    assert unchanged.status_code == 304
+
+    page = client.get("/api/v1/chat/history", query_string={"token": token, "convo_id": convo_id, "limit": 1})
+    assert page.get_json()["has_more"] is True
+    cursor = page.get_json()["next_since"]
+
+    client.post("/api/v1/chat/message", json={"token": token, "message": "and sizing?", "convo_id": convo_id})
+    newer = client.get(
+        "/api/v1/chat/history",
+        query_string={"token": token, "convo_id": convo_id, "since": cursor},
+        headers={"If-None-Match": etag},
+    )
+    assert newer.status_code == 200
+    assert newer.headers["ETag"] != etag
+    assert [m["content"] for m in newer.get_json()["messages"]] == ["stubbed", "and sizing?", "stubbed"]
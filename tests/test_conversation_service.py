@@ -0,0 +1,72 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from conversation_service import CursorError, last_messages, list_conversations
+from database import SessionLocal
+from server import app
+
+
+def _seed_conversations(seed_conversation, campaign_id: str, count: int) -> list[str]:
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    return [
+        seed_conversation(
+            campaign_id,
+            [("user", f"q{index}"), ("assistant", f"a{index}")],
+            # Pairs share a timestamp so the id tiebreak is exercised.
+            at=base + timedelta(minutes=index // 2),
+            recipient_email=f"r{index % 3}@example.com",
+        )
+        for index in range(count)
+    ]
+
+
+def test_keyset_pages_cover_every_conversation_once(seed_conversation):
+    campaign_id = str(uuid.uuid4())
+    ids = _seed_conversations(seed_conversation, campaign_id, 7)
+
+    seen = []
+    cursor = None
+    with SessionLocal() as db:
+        while True:
+            rows, cursor = list_conversations(db, campaign_id=campaign_id, cursor=cursor, limit=3)
+            seen.extend(rows)
+            if cursor is None:
+                break
+
+    assert sorted(row["convo_id"] for row in seen) == sorted(ids)
+    keys = [(row["last_message_at"], row["convo_id"]) for row in seen]
+    assert keys == sorted(keys, reverse=True)
+    assert all(row["last_message"].startswith("a") for row in seen)
+
+
+def test_filters_and_last_message_lookup(seed_conversation):
+    campaign_id = str(uuid.uuid4())
+    ids = _seed_conversations(seed_conversation, campaign_id, 6)
+
+    with SessionLocal() as db:
+        rows, cursor = list_conversations(db, campaign_id=campaign_id, recipient_email="r1@example.com")
+        assert {row["recipient_email"] for row in rows} == {"r1@example.com"}
+        assert len(rows) == 2 and cursor is None
+        assert last_messages(db, ids[:2]) == {ids[0]: "a0", ids[1]: "a1"}
+
+        with pytest.raises(CursorError):
+            list_conversations(db, cursor="not a cursor")
+
+
+def test_conversations_api_pages_with_cursor(seed_conversation):
+    campaign_id = str(uuid.uuid4())
+    _seed_conversations(seed_conversation, campaign_id, 4)
+    client = app.test_client()
+
+    first = client.get("/api/v1/demo/conversations", query_string={"campaign_id": campaign_id, "limit": 3}).get_json()
+    assert len(first["conversations"]) == 3
+    second = client.get(
+        "/api/v1/demo/conversations",
+        query_string={"campaign_id": campaign_id, "limit": 3, "cursor": first["next_cursor"]},
+    ).get_json()
+    assert len(second["conversations"]) == 1
+    assert second["next_cursor"] is None
+
+    assert client.get("/api/v1/demo/conversations", query_string={"cursor": "%%%"}).status_code == 400
@@ -0,0 +1,41 @@
+import logging
+
+import pytest
+from sqlalchemy.pool import QueuePool
+
+import server
+from database import describe_engine, make_engine, resolve_profile
+
+
+def test_resolve_profile_from_url():
+    assert resolve_profile("sqlite:///data/demo.db", "auto") == "sqlite"
+    assert resolve_profile("postgresql+psycopg://u:p@db/app", "auto") == "server"
+    assert resolve_profile("sqlite:///data/demo.db", "default") == "default"
+    with pytest.raises(ValueError):
+        resolve_profile("sqlite:///data/demo.db", "fast")
+
+
+def test_sqlite_profile_applies_pragmas(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'profile.db'}", "sqlite")
+    info = describe_engine(engine, "sqlite")
+
+    assert info["journal_mode"] == "wal"
+    assert info["synchronous"] == 1  # NORMAL
+    assert info["busy_timeout"] > 0
+    assert info["mmap_size"] > 0
+
+
+def test_server_profile_configures_pool(tmp_path):
+    # Any URL works for pool options; the server profile is what matters here.
+    engine = make_engine(f"sqlite:///{tmp_path / 'pooled.db'}", "server")
+
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool._pre_ping is True
+    assert engine.pool._recycle > 0
+    assert "Pool size" in describe_engine(engine, "server")["pool"]
+
+
+def test_startup_logs_engine_summary(caplog):
+    assert server.app.logger.isEnabledFor(logging.INFO)
+    server._bootstrap()
+    assert any(record.getMessage().startswith("Database engine: {'profile'") for record in caplog.records)
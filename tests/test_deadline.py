@@ -0,0 +1,77 @@
+import time
+import uuid
+from dataclasses import replace
+
+import pytest
+
+import chat_service
+import server
+from database import SessionLocal
+from deadline import Deadline, DeadlineExceeded, deadline_scope
+from models import Message
+from provider_pool import ProviderEndpoint, ProviderPool
+from server import app
+from token_service import sign_token
+
+
+def test_deadline_caps_timeouts_and_expires(clock):
+    deadline = Deadline(5, clock=clock)
+
+    assert deadline.cap(20) == 5
+    clock.now += 4
+    assert deadline.cap(20) == pytest.approx(1)
+    assert not deadline.allows(2)
+
+    clock.now += 2
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("provider call")
+
+
+def test_pool_skips_retry_without_budget():
+    calls = []
+
+    def send(endpoint, messages, timeout):
+        calls.append(timeout)
+        raise RuntimeError("provider hiccup")
+
+    pool = ProviderPool([ProviderEndpoint("primary", "http://x", "m", "k")], send=send, retries=2)
+    with deadline_scope(0.3):
+        with pytest.raises(DeadlineExceeded):
+            pool.complete([{"role": "user", "content": "hi"}], timeout=20)
+
+    assert len(calls) == 1
+    assert calls[0] <= 0.3
+
+
+def test_chat_message_returns_brand_fallback_on_deadline(monkeypatch, seed_campaign):
+    timeouts = []
+
+    def slow_send(endpoint, messages, timeout):
+        timeouts.append(timeout)
+        time.sleep(min(timeout, 2))
+        raise RuntimeError("read timeout")
+
+    pool = ProviderPool([ProviderEndpoint("slow", "http://x", "m", "k")], send=slow_send, retries=2)
+    monkeypatch.setattr(chat_service, "provider_pool", pool)
+    monkeypatch.setattr(server, "settings", replace(server.settings, chat_deadline_sec=0.3))
+    client = app.test_client()
+
+    campaign_id = str(uuid.uuid4())
+    token_id = str(uuid.uuid4())
+    email = "deadline@example.com"
+    seed_campaign(campaign_id, [(email, token_id)])
+
+    token = sign_token(campaign_id, email, token_id=token_id, ttl_seconds=600)
+    started = time.monotonic()
+    response = client.post("/api/v1/chat/message", json={"token": token, "message": "Where is my order?"})
+
+    assert time.monotonic() - started < 1.5
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["degraded"] is True
+    assert "Acme product reps" in payload["response"]
+    assert timeouts and all(timeout <= 0.3 for timeout in timeouts)
+
+    with SessionLocal() as db:
+        messages = db.query(Message).filter_by(conversation_id=payload["convo_id"]).all()
+    assert [(message.role, message.content) for message in messages] == [("user", "Where is my order?")]
@@ -0,0 +1,67 @@
+import json
+import threading
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from event_sink import EventSink, db_writer, ndjson_writer
+from event_store import partition_name, partition_table
+
+
+def test_events_are_batched_into_the_database():
+    sink = EventSink(db_writer(), batch_size=10, flush_interval_sec=0.05)
+    tag = str(uuid.uuid4())
+
+    for index in range(25):
+        assert sink.emit("sink_test", campaign_id=tag, payload={"index": index})
+    assert sink.flush(timeout=5)
+    sink.stop()
+
+    with SessionLocal() as db:
+        table = partition_table(partition_name(datetime.utcnow().date()))
+        rows = db.execute(select(table.c.payload_json).where(table.c.campaign_id == tag)).all()
+    assert sorted(json.loads(row.payload_json)["index"] for row in rows) == list(range(25))
+    stats = sink.stats()
+    assert stats["written"] == 25 and stats["batches"] >= 3 and stats["dropped"] == 0
+
+
+def test_full_buffer_drops_and_counts():
+    release = threading.Event()
+    written = []
+
+    def slow_writer(batch):
+        release.wait(5)
+        written.extend(batch)
+
+    sink = EventSink(slow_writer, max_buffer=3, batch_size=1, flush_interval_sec=0.01)
+    accepted = [sink.emit("burst") for _ in range(10)]
+    release.set()
+    sink.flush(timeout=5)
+    sink.stop()
+
+    stats = sink.stats()
+    assert accepted.count(False) == stats["dropped"] == stats["dropped_by_type"]["burst"]
+    assert stats["dropped"] > 0
+    assert len(written) == accepted.count(True)
+
+
+def test_failed_batches_are_retried_then_counted(tmp_path):
+    calls = []
+
+    def flaky_writer(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise OSError("disk hiccup")
+        ndjson_writer(tmp_path / "events.ndjson")(batch)
+
+    sink = EventSink(flaky_writer, batch_size=5, flush_interval_sec=0.01)
+    for _ in range(5):
+        sink.emit("flaky", payload={"ok": True})
+    sink.flush(timeout=5)
+    sink.stop()
+
+    lines = (tmp_path / "events.ndjson").read_text().splitlines()
+    assert len(lines) == 5 and json.loads(lines[0])["event_type"] == "flaky"
+    assert sink.stats()["write_errors"] == 0
@@ -0,0 +1,66 @@
+import gzip
+import json
+import uuid
+from datetime import date, datetime
+
+from database import SessionLocal
+from event_store import archive_expired, list_partitions, partition_name, rollup_counts, write_events
+from models import Event
+from server import app
+
+
+def _event(campaign_id: str, event_type: str, created_at: datetime) -> dict:
+    return {
+        "campaign_id": campaign_id,
+        "conversation_id": None,
+        "event_type": event_type,
+        "payload_json": "{}",
+        "created_at": created_at,
+    }
+
+
+def test_events_land_in_day_partitions_with_hourly_rollups():
+    campaign_id = str(uuid.uuid4())
+    batch = [
+        _event(campaign_id, "chat_message_completed", datetime(2001, 3, 1, 9, 5)),
+        _event(campaign_id, "chat_message_completed", datetime(2001, 3, 1, 9, 55)),
+        _event(campaign_id, "chat_message_completed", datetime(2001, 3, 1, 10, 1)),
+        _event(campaign_id, "campaign_send_failure", datetime(2001, 3, 2, 0, 0)),
+    ]
+    with SessionLocal() as db:
+        write_events(db, batch)
+        write_events(db, batch[:1])
+        db.commit()
+
+        names = [name for _, name in list_partitions(db)]
+        assert {"events_20010301", "events_20010302"} <= set(names)
+
+        hourly = rollup_counts(db, campaign_id=campaign_id, event_types=["chat_message_completed"], by_hour=True)
+        assert [(row["bucket_hour"].hour, row["count"]) for row in hourly] == [(9, 3), (10, 1)]
+        totals = {row["event_type"]: row["count"] for row in rollup_counts(db, campaign_id=campaign_id)}
+        assert totals == {"campaign_send_failure": 1, "chat_message_completed": 4}
+
+    response = app.test_client().get(f"/api/v1/demo/campaigns/{campaign_id}/events", query_string={"by_hour": "1"})
+    assert response.status_code == 200
+    assert response.get_json()["counts"][0]["bucket_hour"].startswith("2001-03-01T09")
+
+
+def test_expired_partitions_and_legacy_rows_are_archived(tmp_path):
+    campaign_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        write_events(db, [_event(campaign_id, "old_event", datetime(2001, 5, 4, 12, 0))])
+        db.add(
+            Event(campaign_id=campaign_id, event_type="legacy_event", payload_json="{}", created_at=datetime(2001, 5, 3))
+        )
+        db.commit()
+
+        archived = archive_expired(db, retention_days=30, today=date(2001, 7, 1), archive_dir=tmp_path)
+
+        assert archived[partition_name(date(2001, 5, 4))] == 1
+        assert archived["events:2001-05-03"] >= 1
+        assert partition_name(date(2001, 5, 4)) not in [name for _, name in list_partitions(db)]
+        assert db.query(Event).filter(Event.campaign_id == campaign_id).count() == 0
+
+    with gzip.open(tmp_path / "events_20010504.ndjson.gz", "rt", encoding="utf-8") as handle:
+        record = json.loads(handle.readline())
+    assert record["event_type"] == "old_event" and record["created_at"].startswith("2001-05-04")
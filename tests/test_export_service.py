@@ -0,0 +1,74 @@
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from database import SessionLocal
+from export_service import iter_campaign_conversations
+from server import app
+
+
+def _seed_exportable(seed_conversation, conversations: int = 3) -> tuple[str, list[str]]:
+    campaign_id = str(uuid.uuid4())
+    start = datetime(2026, 2, 1, 12, 0)
+    convo_ids = [
+        seed_conversation(
+            campaign_id,
+            [("user", f"question {index}"), ("assistant", f"answer {index}")],
+            at=start + timedelta(minutes=index),
+            recipient_email=f"r{index}@example.com",
+        )
+        for index in range(conversations)
+    ]
+    return campaign_id, convo_ids
+
+
+def test_export_groups_messages_and_resumes_from_cursor(seed_conversation):
+    campaign_id, convo_ids = _seed_exportable(seed_conversation)
+    with SessionLocal() as db:
+        records = list(iter_campaign_conversations(db, campaign_id))
+        assert [record["convo_id"] for record in records] == convo_ids
+        assert [message["role"] for message in records[0]["messages"]] == ["user", "assistant"]
+
+        resumed = list(iter_campaign_conversations(db, campaign_id, cursor=records[0]["cursor"]))
+        assert [record["convo_id"] for record in resumed] == convo_ids[1:]
+
+
+def test_export_query_walks_the_export_index_without_sorting():
+    with SessionLocal() as db:
+        plan = " | ".join(
+            row[-1]
+            for row in db.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT conversations.id, messages.id FROM conversations "
+                    "LEFT OUTER JOIN messages ON messages.conversation_id = conversations.id "
+                    "WHERE conversations.campaign_id = 'c' "
+                    "ORDER BY conversations.created_at, conversations.id, messages.created_at, messages.id"
+                )
+            )
+        )
+    assert "ix_conversations_export" in plan
+    # Only messages within one conversation get sorted ("RIGHT PART"); the export never sorts the whole campaign.
+    assert "TEMP B-TREE FOR ORDER BY" not in plan
+
+
+def test_export_endpoint_streams_ndjson_and_gzip(seed_conversation):
+    campaign_id, convo_ids = _seed_exportable(seed_conversation)
+    client = app.test_client()
+
+    response = client.get(f"/api/v1/demo/campaigns/{campaign_id}/export")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.decode("utf-8").splitlines()]
+    assert [line["convo_id"] for line in lines] == convo_ids
+
+    zipped = client.get(f"/api/v1/demo/campaigns/{campaign_id}/export?format=gzip&cursor={lines[1]['cursor']}")
+    assert zipped.mimetype == "application/gzip"
+    resumed = [json.loads(line) for line in gzip.decompress(zipped.data).decode("utf-8").splitlines()]
+    assert [line["convo_id"] for line in resumed] == convo_ids[2:]
+
+    assert client.get(f"/api/v1/demo/campaigns/{campaign_id}/export?cursor=@@").status_code == 400
+    assert client.get(f"/api/v1/demo/campaigns/{campaign_id}/export?format=csv").status_code == 400
@@ -0,0 +1,45 @@
+import importlib.util
+import threading
+from pathlib import Path
+
+import pytest
+
+from provider_pool import ProviderEndpoint, ProviderError, _post_chat_completion
+
+
+_SPEC = importlib.util.spec_from_file_location(
+    "fake_provider", Path(__file__).resolve().parents[1] / "scripts" / "fake_provider.py"
+)
+fake_provider = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(fake_provider)
+
+
+def _serve(config):
+    server = fake_provider.make_server("127.0.0.1", 0, config, seed=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, ProviderEndpoint("fake", f"http://{host}:{port}/api/v1/chat/completions", "fake/model", "k")
+
+
+def test_fake_provider_answers_chat_completions():
+    server, endpoint = _serve(fake_provider.FakeProviderConfig(latency="fixed:1", reply="stub reply"))
+    try:
+        assert _post_chat_completion(endpoint, [{"role": "user", "content": "hi"}], timeout=5) == "stub reply"
+    finally:
+        server.shutdown()
+
+
+def test_fake_provider_injects_errors():
+    server, endpoint = _serve(fake_provider.FakeProviderConfig(latency="fixed:1", error_rate=1.0, error_codes=(503,)))
+    try:
+        with pytest.raises(ProviderError, match="503"):
+            _post_chat_completion(endpoint, [{"role": "user", "content": "hi"}], timeout=5)
+    finally:
+        server.shutdown()
+
+
+def test_latency_distributions():
+    rng = fake_provider.random.Random(0)
+    assert fake_provider.sample_latency_ms("fixed:250", rng) == 250
+    assert 100 <= fake_provider.sample_latency_ms("uniform:100:200", rng) <= 200
+    assert fake_provider.sample_latency_ms("lognormal:300:0.4", rng) > 0
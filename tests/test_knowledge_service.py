@@ -0,0 +1,44 @@
+import chat_service
+import knowledge_service
+from knowledge_service import KnowledgeIndex, chunk_text, relevant_snippets
+
+
+def test_chunk_text_packs_paragraphs():
+    text = "# Title\n\nFirst paragraph.\n\nSecond paragraph is here.\n\n" + "x" * 50
+    chunks = chunk_text(text, max_chars=40)
+
+    assert chunks[0] == "Title First paragraph."
+    assert all(len(chunk) <= 40 for chunk in chunks)
+
+
+def test_index_rebuilds_only_changed_files(tmp_path):
+    source = tmp_path / "src"
+    source.mkdir()
+    (source / "a.md").write_text("Waterproof jackets keep you dry.", encoding="utf-8")
+    (source / "b.md").write_text("Backpacks carry gear.", encoding="utf-8")
+    index = KnowledgeIndex("test", source, tmp_path / "idx.sqlite")
+
+    assert index.refresh(force=True) == {"added": 2, "updated": 0, "removed": 0}
+    assert index.refresh(force=True) == {"added": 0, "updated": 0, "removed": 0}
+
+    (source / "a.md").write_text("Insulated jackets keep you warm.", encoding="utf-8")
+    (source / "b.md").unlink()
+    assert index.refresh(force=True) == {"added": 0, "updated": 1, "removed": 1}
+    assert index.search("warm jacket", k=3) == ["Insulated jackets keep you warm."]
+    assert index.search("backpacks", k=3) == []
+
+
+def test_relevant_snippets_injected_before_user_turn(monkeypatch, tmp_path):
+    monkeypatch.setattr(knowledge_service, "INDEX_DIR", tmp_path)
+    monkeypatch.setattr(knowledge_service, "_indexes", {})
+    assert any("Canada" in snippet for snippet in relevant_snippets("acme", "Do you ship to Canada?"))
+
+    seen = []
+    monkeypatch.setattr(chat_service, "_call_openrouter", lambda messages: (seen.append(messages) or "ok", 1))
+    chat_service.answer_first_turn("Do you ship to Canada?", "Be brief.", brand_id="acme")
+
+    messages = seen[0]
+    assert messages[0]["content"] == "Be brief."
+    assert messages[1]["role"] == "system" and "Canada" in messages[1]["content"]
+    assert messages[-1] == {"role": "user", "content": "Do you ship to Canada?"}
+    assert (tmp_path / "acme.sqlite").exists()
@@ -0,0 +1,70 @@
+import random
+import uuid
+
+from database import SessionLocal
+from latency_stats import LogHistogram, latency_registry, latency_scope, latency_summary, record_latency
+from server import app
+
+
+def test_histogram_quantiles_stay_within_bucket_error():
+    rng = random.Random(7)
+    samples = sorted(rng.lognormvariate(6, 0.8) for _ in range(20000))
+    histogram = LogHistogram()
+    for value in samples:
+        histogram.record(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = samples[int(q * len(samples)) - 1]
+        assert abs(histogram.quantile(q) - exact) / exact < 0.03
+    assert histogram.quantile(1.0) == samples[-1]
+
+
+def test_histograms_merge_like_one_stream():
+    left, right, both = LogHistogram(), LogHistogram(), LogHistogram()
+    for value in range(1, 500):
+        (left if value % 2 else right).record(value)
+        both.record(value)
+    left.merge(right)
+    assert left.buckets == both.buckets
+    assert left.summary() == both.summary()
+
+
+def test_scoped_samples_are_labelled_and_survive_flush():
+    campaign_id = str(uuid.uuid4())
+    with latency_scope(campaign_id) as labels:
+        record_latency("provider", 120, model="test/model")
+        record_latency("provider", 480, model="test/model")
+        assert labels["model"] == "test/model"
+    record_latency("render", 3, campaign_id, "template")
+
+    with SessionLocal() as db:
+        before_flush = latency_summary(db, campaign_id=campaign_id)
+    latency_registry.flush()
+    record_latency("provider", 200, campaign_id, "test/model")
+    with SessionLocal() as db:
+        after_flush = {row["metric"]: row for row in latency_summary(db, campaign_id=campaign_id)}
+
+    assert [(row["metric"], row["model"], row["count"]) for row in before_flush] == [
+        ("provider", "test/model", 2),
+        ("render", "template", 1),
+    ]
+    assert after_flush["provider"]["count"] == 3
+    assert after_flush["provider"]["max"] == 480
+
+    latency_registry.flush()
+    with SessionLocal() as db:
+        stored = {row["metric"]: row for row in latency_summary(db, campaign_id=campaign_id)}
+    assert stored["provider"]["count"] == 3
+
+
+def test_latency_endpoint_filters_by_campaign():
+    campaign_id = str(uuid.uuid4())
+    record_latency("chat_e2e", 250, campaign_id, "cached")
+
+    client = app.test_client()
+    response = client.get(f"/api/v1/demo/latency?campaign_id={campaign_id}")
+    assert response.status_code == 200
+    rows = response.get_json()["latency"]
+    assert [(row["metric"], row["model"], row["p50"]) for row in rows] == [("chat_e2e", "cached", 250)]
+
+    assert client.get("/api/v1/demo/latency?since_hours=soon").status_code == 400
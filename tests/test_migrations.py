@@ -0,0 +1,121 @@
+import re
+from datetime import datetime
+
+from sqlalchemy import create_engine, desc, event, text, tuple_
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401
+from chat_service import _provider_messages, find_recent_reply, get_conversation_messages
+from database import Base
+from migrations import MIGRATIONS, applied_versions, run_migrations
+from models import CampaignRecipient, Conversation
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}", future=True)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _plan(session: Session, query) -> str:
+    compiled = query.statement.compile(session.bind, compile_kwargs={"literal_binds": True})
+    rows = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def _captured_message_plans(engine, session: Session, *calls) -> list[str]:
+    """EXPLAIN the messages queries the given calls actually issue, one plan per call."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM messages" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for call in calls:
+            call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert len(statements) == len(calls)
+    plans = []
+    for statement, parameters in statements:
+        rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        plans.append(" | ".join(row[-1] for row in rows))
+    return plans
+
+
+def test_migrations_restore_indexes_on_existing_database(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_campaign_recipients_lookup"))
+        conn.execute(text("DROP INDEX ix_messages_conversation_order"))
+
+    assert run_migrations(engine) == [version for version, _, _ in MIGRATIONS]
+    assert run_migrations(engine) == []
+    assert applied_versions(engine) == {version for version, _, _ in MIGRATIONS}
+    with engine.connect() as conn:
+        names = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert {"ix_campaign_recipients_lookup", "ix_messages_conversation_order"} <= names
+
+
+def test_hot_queries_use_composite_indexes(tmp_path):
+    engine = _engine(tmp_path)
+    run_migrations(engine)
+    now = datetime(2026, 1, 1)
+
+    with Session(engine) as db:
+        recipient_plan = _plan(
+            db,
+            db.query(CampaignRecipient.id).filter_by(campaign_id="c", email="e@example.com", token_id="t"),
+        )
+        assert "ix_campaign_recipients_lookup" in recipient_plan
+
+        history_plan = _plan(
+            db,
+            db.query(Conversation)
+            .filter_by(campaign_id="c", recipient_email="e@example.com", token_id="t")
+            .order_by(Conversation.last_message_at.desc())
+            .limit(1),
+        )
+        assert "ix_conversations_owner" in history_plan
+        assert "TEMP B-TREE" not in history_plan
+
+        db.add(Conversation(id="x", campaign_id="c", recipient_email="e@example.com", token_id="t"))
+        db.commit()
+        # Rowid order: the conversation_id index already yields messages by id, no sort needed.
+        for plan in _captured_message_plans(
+            engine, db, lambda: get_conversation_messages(db, "x"), lambda: get_conversation_messages(db, "x", 5, 50)
+        ):
+            assert re.search(r"USING (COVERING )?INDEX ix_messages_conversation_id\b", plan)
+            assert "TEMP B-TREE" not in plan
+        # (created_at, id) order, both directions: only the composite index avoids a sort.
+        for plan in _captured_message_plans(
+            engine,
+            db,
+            lambda: _provider_messages(db, "x", "c", "hi"),
+            lambda: find_recent_reply(db, "c", "e@example.com", "t", "hi", "x", window_sec=60),
+        ):
+            assert re.search(r"USING (COVERING )?INDEX ix_messages_conversation_order\b", plan)
+            assert "TEMP B-TREE" not in plan
+
+        recent_plan = _plan(
+            db,
+            db.query(Conversation)
+            .filter(tuple_(Conversation.last_message_at, Conversation.id) < tuple_(now, "cursor-id"))
+            .order_by(desc(Conversation.last_message_at), desc(Conversation.id))
+            .limit(25),
+        )
+        assert "ix_conversations_recent" in recent_plan
+        assert "TEMP B-TREE" not in recent_plan
+
+
+def test_open_count_column_is_added_to_existing_recipients_table(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE campaign_recipients DROP COLUMN open_count"))
+
+    run_migrations(engine)
+    with engine.connect() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(campaign_recipients)"))}
+    assert "open_count" in columns
@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import SessionLocal
+from models import CampaignRecipient
+from open_tracker import PIXEL_GIF, OpenTracker, open_tracker
+from server import app
+from token_service import TokenError, sign_open_id, sign_token, verify_open_id
+
+
+def _seed_recipients(seed_campaign, count: int = 2) -> tuple[str, list[str]]:
+    token_ids = [str(uuid.uuid4()) for _ in range(count)]
+    recipients = [(f"o{index}@example.com", token_id) for index, token_id in enumerate(token_ids)]
+    return seed_campaign(recipients=recipients), token_ids
+
+
+def _recipient(campaign_id: str, token_id: str) -> CampaignRecipient:
+    with SessionLocal() as db:
+        return db.query(CampaignRecipient).filter_by(campaign_id=campaign_id, token_id=token_id).one()
+
+
+def test_open_ids_are_compact_and_signed():
+    campaign_id, token_id = str(uuid.uuid4()), str(uuid.uuid4())
+    open_id = sign_open_id(campaign_id, token_id)
+    assert len(open_id) <= 60
+    assert verify_open_id(open_id) == (campaign_id, token_id)
+
+    with pytest.raises(TokenError):
+        verify_open_id(open_id[:-2] + ("AA" if open_id[-2:] != "AA" else "BB"))
+    with pytest.raises(TokenError):
+        verify_open_id(sign_token(campaign_id, "x@example.com", token_id=token_id))
+
+
+def test_tracker_coalesces_opens_and_keeps_the_first(seed_campaign):
+    campaign_id, (first, second) = _seed_recipients(seed_campaign)
+    tracker = OpenTracker(SessionLocal, flush_interval_sec=60)
+    opened = datetime(2026, 3, 1, 8, 0)
+
+    tracker.record(campaign_id, first, opened + timedelta(minutes=5))
+    tracker.record(campaign_id, first, opened)
+    tracker.record(campaign_id, second, opened)
+    assert tracker.flush() == 2
+    tracker.record(campaign_id, first, opened + timedelta(days=1))
+    assert tracker.flush() == 1
+
+    row = _recipient(campaign_id, first)
+    assert (row.opened_at, row.open_count) == (opened, 3)
+    assert _recipient(campaign_id, second).open_count == 1
+    assert tracker.stats()["coalesced"] == 1
+
+
+def test_tracker_drops_new_recipients_when_full():
+    tracker = OpenTracker(SessionLocal, flush_interval_sec=60, max_pending=1)
+    assert tracker.record("c", "a")
+    assert tracker.record("c", "a")
+    assert not tracker.record("c", "b")
+    assert tracker.stats()["dropped"] == 1
+
+
+def test_pixel_endpoint_answers_without_writing(seed_campaign):
+    campaign_id, (token_id, _) = _seed_recipients(seed_campaign)
+    client = app.test_client()
+
+    response = client.get(f"/o/{sign_open_id(campaign_id, token_id)}.gif")
+    assert response.status_code == 200
+    assert response.mimetype == "image/gif"
+    assert response.data == PIXEL_GIF
+    assert "no-store" in response.headers["Cache-Control"]
+    assert _recipient(campaign_id, token_id).opened_at is None
+
+    open_tracker.flush()
+    assert _recipient(campaign_id, token_id).open_count == 1
+
+    forged = client.get("/o/not-a-real-id.gif")
+    assert forged.status_code == 200
+    assert forged.data == PIXEL_GIF
@@ -0,0 +1,87 @@
+import uuid
+from dataclasses import replace
+
+import chat_service
+import prompt_service
+from campaign_presets import get_preset
+from database import SessionLocal
+from models import CampaignPrompt
+from prompt_service import build_system_prompt, cache_campaign_prompt, store_campaign_prompt, system_prompt_for
+from provider_pool import with_cache_hints
+from template_service import load_brand_config
+
+
+def test_build_system_prompt_is_deterministic_and_campaign_aware():
+    brand = load_brand_config("aurora")
+    preset = get_preset("clearance_event")
+
+    first = build_system_prompt(brand, preset)
+    assert first == build_system_prompt(brand, preset)
+    assert "Aurora Beauty" in first
+    assert "Up to 60% Off" in first
+
+
+def test_stored_prompt_is_used_as_stable_prefix(monkeypatch):
+    seen = []
+
+    def fake_provider(messages):
+        seen.append(messages)
+        return "ok", 3
+
+    monkeypatch.setattr(chat_service, "_call_openrouter", fake_provider)
+    campaign_id = str(uuid.uuid4())
+
+    with SessionLocal() as db:
+        prompt = store_campaign_prompt(db, campaign_id, "meridian", "vip_launch")
+        db.commit()
+        convo_id, _, _ = chat_service.handle_message(db, campaign_id, "p@example.com", "tok", "Hi there")
+        chat_service.handle_message(db, campaign_id, "p@example.com", "tok", "And sizing?", convo_id=convo_id)
+        assert system_prompt_for(db, f"preview-{campaign_id}") == prompt
+
+    assert seen[0][0] == seen[1][0] == {"role": "system", "content": prompt}
+    assert "Meridian Home" in prompt
+
+
+def test_cache_hints_wrap_only_system_prefix():
+    messages = [{"role": "system", "content": "prefix"}, {"role": "user", "content": "hi"}]
+    hinted = with_cache_hints(messages)
+
+    assert hinted[0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    assert hinted[1] == messages[1]
+
+
+def test_prompt_cache_expires_and_stays_bounded(monkeypatch):
+    monkeypatch.setattr(prompt_service, "settings", replace(prompt_service.settings, prompt_cache_ttl_sec=0))
+    campaign_id = str(uuid.uuid4())
+
+    with SessionLocal() as db:
+        store_campaign_prompt(db, campaign_id, "meridian", "vip_launch")
+        db.commit()
+        # Another worker rewrites the stored prompt; this worker's cached copy must not outlive the TTL.
+        db.get(CampaignPrompt, campaign_id).system_prompt = "updated elsewhere"
+        db.commit()
+        assert system_prompt_for(db, campaign_id) == "updated elsewhere"
+
+        bounded = replace(prompt_service.settings, prompt_cache_ttl_sec=60, prompt_cache_max_entries=2)
+        monkeypatch.setattr(prompt_service, "settings", bounded)
+        for scope in ("preview-aurora", "preview-meridian", campaign_id):
+            system_prompt_for(db, scope)
+
+    assert list(prompt_service._prompt_cache) == ["preview-meridian", campaign_id]
+
+
+def test_prompt_cache_only_sees_committed_prompts():
+    campaign_id = str(uuid.uuid4())
+
+    with SessionLocal() as db:
+        store_campaign_prompt(db, campaign_id, "meridian", "vip_launch")
+        db.rollback()
+        assert campaign_id not in prompt_service._prompt_cache
+
+        system_prompt_for(db, f"preview-{campaign_id}")
+        prompt = store_campaign_prompt(db, campaign_id, "meridian", "vip_launch")
+        db.commit()
+        cache_campaign_prompt(campaign_id, prompt)
+
+    assert prompt_service._cache_get(campaign_id) == prompt
+    assert f"preview-{campaign_id}" not in prompt_service._prompt_cache
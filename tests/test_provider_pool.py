@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from provider_pool import CircuitBreaker, ProviderEndpoint, ProviderError, ProviderPool
+
+
+PRIMARY = ProviderEndpoint(name="primary", url="http://primary", model="m1", api_key="k")
+FALLBACK = ProviderEndpoint(name="fallback", url="http://fallback", model="m2", api_key="k")
+
+
+def test_circuit_breaker_opens_and_half_opens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_sec=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    clock.now = 11
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_pool_fails_over_to_next_endpoint():
+    def send(endpoint, messages, timeout):
+        if endpoint.name == "primary":
+            raise RuntimeError("boom")
+        return "from fallback"
+
+    pool = ProviderPool([PRIMARY, FALLBACK], send=send, retries=0)
+    reply = pool.complete([{"role": "user", "content": "hi"}])
+
+    assert reply.content == "from fallback"
+    assert reply.model == "m2"
+
+
+def test_pool_hedges_slow_primary():
+    def send(endpoint, messages, timeout):
+        if endpoint.name == "primary":
+            time.sleep(0.5)
+            return "slow primary"
+        return "fast fallback"
+
+    pool = ProviderPool([PRIMARY, FALLBACK], send=send, retries=0, hedge_min_ms=20)
+    for _ in range(20):
+        pool._latency["primary"].observe(20)
+
+    start = time.monotonic()
+    reply = pool.complete([{"role": "user", "content": "hi"}])
+
+    assert reply.endpoint == "fallback"
+    assert time.monotonic() - start < 0.4
+    assert pool.stats()["hedge_wins"] == 1
+
+
+def test_pool_raises_when_all_endpoints_fail():
+    def send(endpoint, messages, timeout):
+        raise RuntimeError("down")
+
+    pool = ProviderPool([PRIMARY], send=send, retries=0)
+    with pytest.raises(ProviderError):
+        pool.complete([{"role": "user", "content": "hi"}])
+
+
+def test_half_open_fallback_is_not_reserved_when_primary_answers(clock):
+    pool = ProviderPool([PRIMARY, FALLBACK], send=lambda endpoint, messages, timeout: "ok", retries=0)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_sec=10, clock=clock)
+    pool._breakers["fallback"] = breaker
+    breaker.record_failure()
+    clock.now = 11
+    assert breaker.state == "half_open"
+
+    for _ in range(3):
+        assert pool.complete([{"role": "user", "content": "hi"}]).endpoint == "primary"
+
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
@@ -0,0 +1,99 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import Base, SessionLocal, make_engine
+from models import CampaignStats, Conversation, Message, StatCounter
+from retention_service import compact_database, sweep
+from server import app
+from stats_service import record_conversation_started
+
+
+@pytest.fixture
+def seed_expiring(seed_conversation):
+    """Seed a conversation last active at ``last_message_at`` and count it in the stats."""
+
+    def seed(campaign_id: str, last_message_at: datetime, messages: int = 2) -> str:
+        convo_id = seed_conversation(
+            campaign_id,
+            [("user", f"retention {index}") for index in range(messages)],
+            at=last_message_at,
+            recipient_email="keep-or-sweep@example.com",
+            token_id="retention-token",
+        )
+        with SessionLocal() as db:
+            record_conversation_started(db, campaign_id)
+            db.commit()
+        return convo_id
+
+    return seed
+
+
+def _exists(convo_id: str) -> bool:
+    with SessionLocal() as db:
+        return db.get(Conversation, convo_id) is not None
+
+
+def test_sweep_deletes_expired_conversations_per_class_in_batches(seed_expiring):
+    now = datetime(2001, 6, 1, 12, 0)
+    old = datetime(2001, 5, 1)
+    real_campaign = str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.add(CampaignStats(campaign_id=real_campaign))
+        db.commit()
+
+    old_previews = [seed_expiring(f"preview-{uuid.uuid4()}", old) for _ in range(3)]
+    fresh_preview = seed_expiring(f"preview-{uuid.uuid4()}", datetime(2001, 6, 1, 11, 0))
+    old_legacy = seed_expiring("legacy", old)
+    old_real = seed_expiring(real_campaign, old, messages=1)
+    kept_real = seed_expiring(real_campaign, datetime(2001, 5, 31, 13, 0))
+
+    with SessionLocal() as db:
+        before = db.get(StatCounter, "conversation_count").value
+        result = sweep(db, now=now, days={"preview": 1, "legacy": 1, "real": 1}, batch_size=2, pause_sec=0)
+
+        assert result["classes"]["preview"]["conversations"] == 3
+        assert result["classes"]["preview"]["batches"] == 2
+        assert result["classes"]["legacy"]["conversations"] == 1
+        assert result["classes"]["real"]["messages"] == 1
+        assert result["messages"] == 9
+        assert "optimize" in result["maintenance"]
+
+        db.expire_all()
+        assert db.get(StatCounter, "conversation_count").value == before - 5
+        assert db.get(CampaignStats, real_campaign).conversation_count == 1
+        assert db.query(Message).filter(Message.conversation_id.in_(old_previews)).count() == 0
+
+    assert not any(_exists(convo_id) for convo_id in old_previews + [old_legacy, old_real])
+    assert _exists(fresh_preview) and _exists(kept_real)
+
+
+def test_zero_ttl_keeps_everything(seed_expiring):
+    convo_id = seed_expiring("legacy", datetime(2001, 1, 1))
+    with SessionLocal() as db:
+        result = sweep(db, now=datetime(2001, 6, 1), days={"preview": 0, "legacy": 0, "real": 0})
+    assert result["classes"] == {} and result["maintenance"] == []
+    assert _exists(convo_id)
+
+    with SessionLocal() as db:
+        sweep(db, now=datetime(2001, 6, 1), days={"legacy": 1})
+    assert not _exists(convo_id)
+
+
+def test_retention_stats_endpoint():
+    payload = app.test_client().get("/api/v1/demo/retention").get_json()["retention"]
+    assert set(payload["retention_days"]) == {"preview", "legacy", "real"}
+    assert payload["runs"] >= 0
+
+
+def test_compact_database_vacuums_a_new_incremental_database(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'fresh.db'}", "sqlite")
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as db:
+        assert db.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+        assert compact_database(db) == ["incremental_vacuum", "optimize"]
+    engine.dispose()
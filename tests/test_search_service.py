@@ -0,0 +1,67 @@
+import uuid
+
+import pytest
+
+from database import SessionLocal
+from models import Message
+from search_service import SearchError, fts_query, search_messages
+from server import app
+
+
+@pytest.fixture
+def seed_searchable(seed_campaign, seed_conversation):
+    """``seed_searchable(brand_id, contents)`` -> (campaign id, conversation id); roles alternate user/assistant."""
+
+    def seed(brand_id: str, contents: list[str]) -> tuple[str, str]:
+        campaign_id = seed_campaign(brand_id=brand_id)
+        messages = [("user" if index % 2 == 0 else "assistant", content) for index, content in enumerate(contents)]
+        return campaign_id, seed_conversation(campaign_id, messages, recipient_email="finder@example.com")
+
+    return seed
+
+
+def test_fts_query_quotes_user_input():
+    assert fts_query('refund OR "broken" zip*') == '"refund" "OR" "broken" "zip"*'
+    assert fts_query("a* refu*") == '"a" "refu"*'
+    with pytest.raises(SearchError):
+        fts_query("  -- ** ")
+
+
+def test_new_messages_are_searchable_and_ranked(seed_searchable):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    campaign_id, convo_id = seed_searchable(
+        "acme", [f"my {word} arrived broken", f"{word} {word} {word} refund please", "unrelated"]
+    )
+
+    with SessionLocal() as db:
+        results, next_offset = search_messages(db, word, campaign_id=campaign_id)
+        assert len(results) == 2 and next_offset is None
+        assert results[0]["snippet_html"].count("<mark>") == 3
+        assert results[0]["convo_id"] == convo_id
+        assert results[0]["score"] >= results[1]["score"]
+
+        first_page, next_offset = search_messages(db, word, campaign_id=campaign_id, limit=1)
+        second_page, _ = search_messages(db, word, campaign_id=campaign_id, offset=next_offset, limit=1)
+        assert [first_page[0]["message_id"], second_page[0]["message_id"]] == [r["message_id"] for r in results]
+
+        assert search_messages(db, f"{word} broken", brand_id="acme")[0][0]["brand_id"] == "acme"
+        assert search_messages(db, word, brand_id="no-such-brand")[0] == []
+
+        db.query(Message).filter(Message.conversation_id == convo_id).delete()
+        db.commit()
+        assert search_messages(db, word)[0] == []
+
+
+def test_search_api_and_admin_page(seed_searchable):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    seed_searchable("acme", [f"where is my <b>{word}</b> order"])
+    client = app.test_client()
+
+    payload = client.get(f"/api/v1/demo/search?q={word}").get_json()
+    assert "&lt;b&gt;<mark>" in payload["results"][0]["snippet_html"]
+    assert client.get("/api/v1/demo/search").status_code == 400
+    assert client.get(f"/api/v1/demo/search?q={word}&offset=x").status_code == 400
+
+    page = client.get(f"/demo/admin/search?q={word}&brand_id=acme")
+    assert page.status_code == 200
+    assert f"<mark>{word}</mark>" in page.get_data(as_text=True)
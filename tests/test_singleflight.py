@@ -0,0 +1,83 @@
+import threading
+import time
+import uuid
+
+import chat_service
+import server
+from database import SessionLocal
+from models import Message
+from singleflight import SingleFlight
+from token_service import sign_token
+
+
+def test_singleflight_coalesces_concurrent_calls():
+    flight = SingleFlight(window_sec=5)
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert flight.do("k", slow) == ("value", True)
+
+
+def test_singleflight_does_not_keep_failures():
+    flight = SingleFlight(window_sec=5)
+
+    def boom():
+        raise ValueError("nope")
+
+    try:
+        flight.do("k", boom)
+    except ValueError:
+        pass
+    assert flight.do("k", lambda: "ok") == ("ok", False)
+
+
+def test_duplicate_chat_submits_share_one_provider_call(monkeypatch, seed_campaign):
+    calls = []
+
+    def slow_provider(messages):
+        calls.append(messages)
+        time.sleep(0.2)
+        return "Sizing runs true.", 200
+
+    monkeypatch.setattr(chat_service, "_call_openrouter", slow_provider)
+    campaign_id, token_id, email = str(uuid.uuid4()), str(uuid.uuid4()), "dedupe@example.com"
+    seed_campaign(campaign_id, [(email, token_id)])
+    token = sign_token(campaign_id, email, token_id=token_id, ttl_seconds=600)
+    body = {"token": token, "message": "How does the jacket fit on broad shoulders?"}
+
+    responses = []
+
+    def submit():
+        responses.append(server.app.test_client().post("/api/v1/chat/message", json=body).get_json())
+
+    threads = [threading.Thread(target=submit) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({r["convo_id"] for r in responses}) == 1
+
+    # A late duplicate handled by a fresh process still gets the stored reply.
+    monkeypatch.setattr(server, "chat_singleflight", SingleFlight(window_sec=5))
+    late = server.app.test_client().post("/api/v1/chat/message", json=body).get_json()
+    assert late["response"] == "Sizing runs true."
+    assert len(calls) == 1
+
+    with SessionLocal() as db:
+        count = db.query(Message).filter_by(conversation_id=late["convo_id"]).count()
+    assert count == 2
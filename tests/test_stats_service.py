@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+import chat_service
+import event_store
+import server
+from database import Base, SessionLocal, make_engine
+from event_sink import event_sink, ndjson_writer
+from mailer_service import MailerError
+from models import Campaign, CampaignRecipient, CampaignStats
+from server import app
+from stats_service import dashboard_totals, rebuild_stats
+from token_service import sign_token
+
+
+def test_stats_follow_create_send_and_chat(monkeypatch):
+    client = app.test_client()
+    with SessionLocal() as db:
+        before = dashboard_totals(db)
+
+    created = client.post(
+        "/api/v1/demo/campaigns",
+        json={
+            "brand_id": "acme",
+            "name": "Stats",
+            "subject": "Stats",
+            "from_email": "sender@example.com",
+            "reply_to": "reply@example.com",
+            "recipients": [{"email": "ok@example.com"}, {"email": "bounce@example.com"}],
+        },
+    ).get_json()
+    campaign_id = created["campaign_id"]
+
+    def fake_send(campaign, to_email, *bodies):
+        if to_email.startswith("bounce"):
+            raise MailerError("bounced")
+        return "msg-1"
+
+    monkeypatch.setattr(server, "send_campaign_email", fake_send)
+    assert client.post(f"/api/v1/demo/campaigns/{campaign_id}/send", json={}).get_json()["sent"] == 1
+
+    monkeypatch.setattr(chat_service, "_call_openrouter", lambda messages: ("stubbed", 9))
+    with SessionLocal() as db:
+        recipient = db.query(CampaignRecipient).filter_by(campaign_id=campaign_id, email="ok@example.com").one()
+        token = sign_token(campaign_id, recipient.email, token_id=recipient.token_id, ttl_seconds=600)
+    assert client.post("/api/v1/chat/message", json={"token": token, "message": "hi"}).status_code == 200
+
+    with SessionLocal() as db:
+        row = db.get(CampaignStats, campaign_id)
+        assert (row.recipient_count, row.sent_count, row.failed_count, row.conversation_count) == (2, 1, 1, 1)
+        after = dashboard_totals(db)
+        assert after["campaign_count"] == before["campaign_count"] + 1
+        assert after["sent_count"] == before["sent_count"] + 1
+        assert after["draft_count"] == before["draft_count"]
+        assert after["conversation_count"] == before["conversation_count"] + 1
+
+        assert event_sink.flush()
+        db.query(CampaignStats).filter_by(campaign_id=campaign_id).update({"sent_count": 99})
+        rebuild_stats(db)
+        db.commit()
+        assert db.get(CampaignStats, campaign_id).sent_count == 1
+
+
+def test_rebuild_stats_counts_send_failures_from_the_ndjson_log(tmp_path, monkeypatch):
+    engine = make_engine(f"sqlite:///{tmp_path / 'ndjson.db'}", "sqlite")
+    Base.metadata.create_all(engine)
+    log = tmp_path / "events.ndjson"
+    monkeypatch.setattr(event_store, "EVENTS_NDJSON", log)
+    failure = {"event_type": "campaign_send_failure", "campaign_id": "c1", "conversation_id": None}
+    ndjson_writer(log)([{**failure, "payload_json": "{}", "created_at": datetime.utcnow()} for _ in range(2)])
+
+    with Session(engine) as db:
+        db.add(
+            Campaign(
+                id="c1", brand_id="acme", name="N", subject="S", from_email="f@example.com", reply_to="r@example.com"
+            )
+        )
+        db.commit()
+        rebuild_stats(db)
+        db.commit()
+        assert db.get(CampaignStats, "c1").failed_count == 2
@@ -22,3 +22,19 @@ def test_render_campaign_templates_no_unresolved_tokens():
 def test_injection_fails_without_slot():
     with pytest.raises(TemplateError):
         inject_chat_module("<html><body>No slot</body></html>", "<div>chat</div>")
+
+
+def test_open_pixel_is_embedded_only_when_requested():
+    brand = load_brand_config("acme")
+    kwargs = dict(
+        campaign={"subject": "Spring Sale"},
+        recipient={"email": "demo@example.com", "first_name": "Sam"},
+        chat_endpoint="https://example.com/api/v1/chat/message",
+        token="token-123",
+    )
+    tracked = render_campaign_templates(brand, open_pixel_url="https://example.com/o/abc.gif", **kwargs)
+    assert '<amp-img src="https://example.com/o/abc.gif" width="1" height="1"' in tracked["amp_html"]
+    assert '<img src="https://example.com/o/abc.gif" width="1" height="1"' in tracked["html_html"]
+
+    preview = render_campaign_templates(brand, **kwargs)
+    assert "/o/" not in preview["amp_html"] and "/o/" not in preview["html_html"]
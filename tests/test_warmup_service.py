@@ -0,0 +1,46 @@
+import uuid
+
+import chat_service
+from answer_cache import answer_cache
+from database import SessionLocal
+from latency_stats import latency_summary
+from provider_pool import ProviderReply
+from warmup_service import campaign_warmup_questions, warm_campaign_answers
+
+
+def test_campaign_warmup_questions_dedupes_and_includes_preset():
+    questions = campaign_warmup_questions("vip_launch", extra=["Is this on sale?", "Do VIPs get free returns?"])
+
+    assert "What do VIP members get?" in questions
+    assert "Do VIPs get free returns?" in questions
+    assert sum(1 for q in questions if q.lower().startswith("is this on sale")) == 1
+
+
+def test_warm_campaign_answers_populates_cache(monkeypatch):
+    def fake_provider(messages):
+        return f"answer to {messages[-1]['content']}", 5
+
+    monkeypatch.setattr(chat_service, "_call_openrouter", fake_provider)
+    campaign_id = str(uuid.uuid4())
+
+    stats = warm_campaign_answers(
+        campaign_id, "acme", ["Do you ship?", "How does sizing run?"], system_prompt="Be brief.", max_workers=2
+    )
+    assert stats == {"requested": 2, "skipped": 0, "generated": 2, "failed": 0}
+    assert answer_cache.get(campaign_id, "acme", "do you ship") == "answer to Do you ship?"
+
+    again = warm_campaign_answers(campaign_id, "acme", ["Do you ship?"], system_prompt="Be brief.")
+    assert again["skipped"] == 1
+
+
+def test_warmup_provider_latency_is_kept_apart_from_chat_latency(monkeypatch):
+    reply = ProviderReply(content="We ship worldwide.", latency_ms=40, endpoint="test", model="test/model")
+    monkeypatch.setattr(chat_service.provider_pool, "has_credentials", lambda: True)
+    monkeypatch.setattr(chat_service.provider_pool, "complete", lambda messages: reply)
+    campaign_id = str(uuid.uuid4())
+
+    warm_campaign_answers(campaign_id, "acme", ["Do you ship?"], system_prompt="Be brief.")
+
+    with SessionLocal() as db:
+        rows = latency_summary(db, campaign_id=campaign_id)
+    assert [(row["metric"], row["model"]) for row in rows] == [("provider_warmup", "test/model")]
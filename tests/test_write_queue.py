@@ -0,0 +1,155 @@
+import dataclasses
+import threading
+import uuid
+
+import pytest
+
+import chat_service
+import server
+import write_queue as write_queue_module
+from app_config import settings
+from database import SessionLocal
+from models import Campaign, CampaignRecipient, CampaignStats, Event, Message
+from open_tracker import OpenTracker
+from server import app
+from token_service import sign_token
+from write_queue import WriteQueue, WriteTimeout
+
+
+def _event_intent(tag: str):
+    def intent(db):
+        row = Event(campaign_id=tag, event_type="write_queue_test", payload_json="{}")
+        db.add(row)
+        db.flush()
+        return row.id
+
+    return intent
+
+
+def test_concurrent_intents_share_group_commits():
+    queue = WriteQueue(SessionLocal, max_batch=64, max_wait_ms=20)
+    tag = str(uuid.uuid4())
+    futures = []
+    lock = threading.Lock()
+
+    def submit_many():
+        for _ in range(20):
+            future = queue.submit(_event_intent(tag))
+            with lock:
+                futures.append(future)
+
+    threads = [threading.Thread(target=submit_many) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [future.result(timeout=5) for future in futures]
+    queue.stop()
+
+    assert len(set(ids)) == 100
+    stats = queue.stats()
+    assert stats["intents"] == 100
+    assert stats["batches"] < 100
+    with SessionLocal() as db:
+        assert db.query(Event).filter_by(campaign_id=tag).count() == 100
+
+
+def test_failing_intent_only_fails_its_own_future():
+    queue = WriteQueue(SessionLocal, max_batch=8, max_wait_ms=50)
+    tag = str(uuid.uuid4())
+
+    def broken(db):
+        raise RuntimeError("bad intent")
+
+    good_before = queue.submit(_event_intent(tag))
+    bad = queue.submit(broken)
+    good_after = queue.submit(_event_intent(tag))
+
+    assert good_before.result(timeout=5) and good_after.result(timeout=5)
+    with pytest.raises(RuntimeError):
+        bad.result(timeout=5)
+    queue.stop()
+    assert queue.stats()["failed"] == 1
+
+
+def test_chat_turn_persists_through_writer(monkeypatch):
+    monkeypatch.setattr(chat_service, "_call_openrouter", lambda messages: ("queued reply", 4))
+    monkeypatch.setattr(write_queue_module, "settings", dataclasses.replace(settings, db_write_queue=True))
+    client = app.test_client()
+
+    response = client.post("/ganggang", json={"auth": settings.legacy_auth_key, "message": f"hi {uuid.uuid4()}"})
+    convo_id = response.get_json()["convo_id"]
+
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        roles = [row.role for row in db.query(Message).filter_by(conversation_id=convo_id).order_by(Message.id)]
+    assert roles == ["user", "assistant"]
+    assert write_queue_module.write_queue.stats()["intents"] >= 1
+
+
+def test_campaign_create_send_and_open_flush_go_through_writer(monkeypatch):
+    monkeypatch.setattr(write_queue_module, "settings", dataclasses.replace(settings, db_write_queue=True))
+    monkeypatch.setattr(server, "send_campaign_email", lambda *args, **kwargs: "message-1")
+    client = app.test_client()
+    before = write_queue_module.write_queue.stats()["intents"]
+
+    created = client.post(
+        "/api/v1/demo/campaigns",
+        json={
+            "brand_id": "acme",
+            "name": "Queued",
+            "subject": "Queued send",
+            "from_email": "sender@example.com",
+            "reply_to": "reply@example.com",
+            "recipients": [{"email": "queued@example.com", "first_name": "Q"}],
+        },
+    )
+    campaign_id = created.get_json()["campaign_id"]
+    sent = client.post(f"/api/v1/demo/campaigns/{campaign_id}/send", json={"warmup": False})
+    assert (created.status_code, sent.status_code) == (201, 200)
+
+    with SessionLocal() as db:
+        token_id = db.query(CampaignRecipient.token_id).filter_by(campaign_id=campaign_id).scalar()
+    tracker = OpenTracker(SessionLocal)
+    tracker.record(campaign_id, token_id)
+    assert tracker.flush() == 1
+    tracker.stop()
+
+    # Create, prompt store, send bookkeeping and the open flush: one intent each.
+    assert write_queue_module.write_queue.stats()["intents"] - before >= 4
+    with SessionLocal() as db:
+        recipient = db.query(CampaignRecipient).filter_by(campaign_id=campaign_id).one()
+        assert db.get(Campaign, campaign_id).status == "sent"
+        assert recipient.sent_at is not None and recipient.open_count == 1
+        assert db.get(CampaignStats, campaign_id).sent_count == 1
+
+
+def test_timed_out_write_is_cancelled_not_applied_later():
+    queue = WriteQueue(SessionLocal, max_batch=1, max_wait_ms=0)
+    release = threading.Event()
+    ran = []
+
+    blocker = queue.submit(lambda db: release.wait(5))
+    with pytest.raises(WriteTimeout):
+        queue.run(lambda db: ran.append("late"), timeout=0.05)
+    release.set()
+    assert blocker.result(timeout=5)
+    queue.stop()
+
+    assert ran == []
+
+
+def test_chat_answers_503_when_the_writer_times_out(monkeypatch):
+    def busy(db_session, intent):
+        raise WriteTimeout("Write not started within 0.01s")
+
+    monkeypatch.setattr(chat_service, "_call_openrouter", lambda messages: ("never stored", 4))
+    monkeypatch.setattr(chat_service, "run_write", busy)
+    token = sign_token(campaign_id=f"preview-{uuid.uuid4()}", recipient="busy@example.com", token_id="busy-token")
+
+    response = app.test_client().post("/api/v1/chat/message", json={"token": token, "message": "are you there?"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "degraded" not in response.get_json()
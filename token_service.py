@@ -1,10 +1,13 @@
 import base64
+import binascii
 import hashlib
 import hmac
 import json
+import threading
 import time
 import uuid
-from typing import Any
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator
 
 from app_config import settings
 
@@ -13,6 +16,21 @@ class TokenError(Exception):
     pass
 
 
+# Compact tokens: base64url(version | campaign_id | recipient | token_id | iat | ttl | mac).
+# Each id field is a varint header: 1 means 16 raw UUID bytes follow, otherwise
+# header >> 1 is the length of the UTF-8 string that follows. iat is a varint and
+# ttl a zigzag varint (so already-expired test tokens still encode). The MAC is
+# HMAC-SHA256 over everything before it, truncated to 16 bytes. Legacy
+# "<json>.<sig>" tokens always contain a "." and compact tokens never do.
+COMPACT_VERSION = 1
+COMPACT_MAC_BYTES = 16
+_URLSAFE = bytes.maketrans(b"+/", b"-_")
+
+
+def _secret_key() -> bytes:
+    return settings.app_secret.encode("utf-8")
+
+
 def _b64_encode(raw: bytes) -> str:
     return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
 
@@ -22,21 +40,195 @@ def _b64_decode(data: str) -> bytes:
     return base64.urlsafe_b64decode(data + pad)
 
 
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(raw: bytes, pos: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(raw) or shift > 63:
+            raise TokenError("Malformed token")
+        byte = raw[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _uuid_bytes(value: str) -> bytes | None:
+    """Raw bytes for a 36-char canonical lowercase UUID string, else None (so decoding round-trips)."""
+    if value[8] != "-" or value[13] != "-" or value[18] != "-" or value[23] != "-":
+        return None
+    hex_digits = value.replace("-", "")
+    try:
+        raw = bytes.fromhex(hex_digits)
+    except ValueError:
+        return None
+    return raw if len(raw) == 16 and raw.hex() == hex_digits else None
+
+
+def _encode_field(value: str) -> bytes:
+    if len(value) == 36:
+        packed = _uuid_bytes(value)
+        if packed is not None:
+            return b"\x01" + packed
+    raw = value.encode("utf-8")
+    return _varint(len(raw) << 1) + raw
+
+
+def _read_field(raw: bytes, pos: int) -> tuple[str, int]:
+    header, pos = _read_varint(raw, pos)
+    if header == 1:
+        end = pos + 16
+        if end > len(raw):
+            raise TokenError("Malformed token")
+        return str(uuid.UUID(bytes=raw[pos:end])), end
+    if header & 1:
+        raise TokenError("Malformed token")
+    end = pos + (header >> 1)
+    if end > len(raw):
+        raise TokenError("Malformed token")
+    return raw[pos:end].decode("utf-8"), end
+
+
+def _compact_body(campaign_id: str, recipient: str, token_id: str, iat: int, ttl_seconds: int) -> bytes:
+    zigzag_ttl = (ttl_seconds << 1) if ttl_seconds >= 0 else ((-ttl_seconds << 1) - 1)
+    return b"".join(
+        (
+            bytes((COMPACT_VERSION,)),
+            _encode_field(campaign_id),
+            _encode_field(recipient),
+            _encode_field(token_id),
+            _varint(iat),
+            _varint(zigzag_ttl),
+        )
+    )
+
+
 def sign_token(campaign_id: str, recipient: str, token_id: str | None = None, ttl_seconds: int = 86400) -> str:
+    body = _compact_body(campaign_id, recipient, token_id or str(uuid.uuid4()), int(time.time()), ttl_seconds)
+    mac = hmac.new(_secret_key(), body, hashlib.sha256).digest()[:COMPACT_MAC_BYTES]
+    return _b64_encode(body + mac)
+
+
+def iter_signed_tokens(
+    campaign_id: str, recipients: Iterable[tuple[str, str]], ttl_seconds: int = 86400
+) -> Iterator[str]:
+    """Yield compact tokens for ``(email, token_id)`` pairs sharing one campaign, iat and exp.
+
+    The HMAC is keyed once with the campaign prefix already absorbed; each token
+    ``.copy()``s that state, so per-recipient work is just the two id fields and
+    one MAC update.
+    """
+    prefix = bytes((COMPACT_VERSION,)) + _encode_field(campaign_id)
+    zigzag_ttl = (ttl_seconds << 1) if ttl_seconds >= 0 else ((-ttl_seconds << 1) - 1)
+    suffix = _varint(int(time.time())) + _varint(zigzag_ttl)
+    proto = hmac.new(_secret_key(), prefix, hashlib.sha256)
+
+    b2a = binascii.b2a_base64
+    for recipient, token_id in recipients:
+        middle = _encode_field(recipient) + _encode_field(token_id) + suffix
+        mac = proto.copy()
+        mac.update(middle)
+        raw = b2a(prefix + middle + mac.digest()[:COMPACT_MAC_BYTES], newline=False)
+        yield raw.translate(_URLSAFE).rstrip(b"=").decode("ascii")
+
+
+def sign_tokens_batch(campaign_id: str, recipients: Iterable[tuple[str, str]], ttl_seconds: int = 86400) -> list[str]:
+    return list(iter_signed_tokens(campaign_id, recipients, ttl_seconds))
+
+
+def _sign_legacy(campaign_id: str, recipient: str, token_id: str, ttl_seconds: int = 86400) -> str:
+    """The original JSON token format; kept so tests can mint tokens already sitting in sent emails."""
     now = int(time.time())
     payload = {
         "campaign_id": campaign_id,
         "recipient": recipient,
-        "token_id": token_id or str(uuid.uuid4()),
+        "token_id": token_id,
         "iat": now,
         "exp": now + ttl_seconds,
     }
     payload_raw = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    signature = hmac.new(settings.app_secret.encode("utf-8"), payload_raw, hashlib.sha256).digest()
+    signature = hmac.new(_secret_key(), payload_raw, hashlib.sha256).digest()
     return f"{_b64_encode(payload_raw)}.{_b64_encode(signature)}"
 
 
-def verify_token(token: str) -> dict[str, Any]:
+def _verify_compact(token: str) -> dict[str, Any]:
+    try:
+        raw = _b64_decode(token)
+    except Exception as exc:  # noqa: BLE001
+        raise TokenError("Malformed token") from exc
+    if len(raw) <= COMPACT_MAC_BYTES or raw[0] != COMPACT_VERSION:
+        raise TokenError("Malformed token")
+
+    body, actual_mac = raw[:-COMPACT_MAC_BYTES], raw[-COMPACT_MAC_BYTES:]
+    expected_mac = hmac.new(_secret_key(), body, hashlib.sha256).digest()[:COMPACT_MAC_BYTES]
+    if not hmac.compare_digest(actual_mac, expected_mac):
+        raise TokenError("Invalid signature")
+
+    try:
+        campaign_id, pos = _read_field(body, 1)
+        recipient, pos = _read_field(body, pos)
+        token_id, pos = _read_field(body, pos)
+        iat, pos = _read_varint(body, pos)
+        zigzag_ttl, pos = _read_varint(body, pos)
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise TokenError("Invalid payload") from exc
+    if pos != len(body):
+        raise TokenError("Invalid payload")
+
+    exp = iat + ((zigzag_ttl >> 1) ^ -(zigzag_ttl & 1))
+    if int(time.time()) >= exp:
+        raise TokenError("Token expired")
+    return {"campaign_id": campaign_id, "recipient": recipient, "token_id": token_id, "iat": iat, "exp": exp}
+
+
+# Open-tracking ids: base64url(version | campaign_id | token_id | mac). They never
+# expire (emails get opened weeks later) and only identify a recipient, so a
+# 10-byte MAC is plenty; the distinct version byte keeps them from passing as chat tokens.
+OPEN_ID_VERSION = 2
+OPEN_ID_MAC_BYTES = 10
+
+
+def sign_open_id(campaign_id: str, token_id: str) -> str:
+    body = bytes((OPEN_ID_VERSION,)) + _encode_field(campaign_id) + _encode_field(token_id)
+    mac = hmac.new(_secret_key(), body, hashlib.sha256).digest()[:OPEN_ID_MAC_BYTES]
+    return _b64_encode(body + mac)
+
+
+def verify_open_id(open_id: str) -> tuple[str, str]:
+    """Return ``(campaign_id, token_id)`` for an id minted by ``sign_open_id``."""
+    try:
+        raw = _b64_decode(open_id)
+    except Exception as exc:  # noqa: BLE001
+        raise TokenError("Malformed open id") from exc
+    if len(raw) <= OPEN_ID_MAC_BYTES or raw[0] != OPEN_ID_VERSION:
+        raise TokenError("Malformed open id")
+
+    body, actual_mac = raw[:-OPEN_ID_MAC_BYTES], raw[-OPEN_ID_MAC_BYTES:]
+    expected_mac = hmac.new(_secret_key(), body, hashlib.sha256).digest()[:OPEN_ID_MAC_BYTES]
+    if not hmac.compare_digest(actual_mac, expected_mac):
+        raise TokenError("Invalid signature")
+
+    try:
+        campaign_id, pos = _read_field(body, 1)
+        token_id, pos = _read_field(body, pos)
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise TokenError("Invalid payload") from exc
+    if pos != len(body):
+        raise TokenError("Invalid payload")
+    return campaign_id, token_id
+
+
+def _verify_legacy(token: str) -> dict[str, Any]:
     try:
         payload_part, sig_part = token.split(".", 1)
         payload_raw = _b64_decode(payload_part)
@@ -44,7 +236,7 @@ def verify_token(token: str) -> dict[str, Any]:
     except Exception as exc:  # noqa: BLE001
         raise TokenError("Malformed token") from exc
 
-    expected_sig = hmac.new(settings.app_secret.encode("utf-8"), payload_raw, hashlib.sha256).digest()
+    expected_sig = hmac.new(_secret_key(), payload_raw, hashlib.sha256).digest()
     if not hmac.compare_digest(actual_sig, expected_sig):
         raise TokenError("Invalid signature")
 
@@ -62,3 +254,129 @@ def verify_token(token: str) -> dict[str, Any]:
         raise TokenError("Missing required claims")
 
     return payload
+
+
+def _verify_uncached(token: str) -> dict[str, Any]:
+    if "." in token:
+        return _verify_legacy(token)
+    return _verify_compact(token)
+
+
+class _VerifiedTokenCache:
+    """Bounded LRU of verified token digests -> claims, plus a short-lived negative cache.
+
+    Positive entries never outlive the token's ``exp``; they also remember whether
+    the token's campaign recipient row exists so repeat turns skip that query.
+    """
+
+    def __init__(self, max_entries: int, negative_ttl_sec: float):
+        self.max_entries = max(1, max_entries)
+        self.negative_ttl_sec = negative_ttl_sec
+        self._lock = threading.Lock()
+        self._valid: OrderedDict[bytes, list[Any]] = OrderedDict()
+        self._invalid: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def lookup(self, key: bytes, now: float) -> tuple[dict[str, Any] | None, str | None]:
+        with self._lock:
+            entry = self._valid.get(key)
+            if entry is not None:
+                if now < entry[0]["exp"]:
+                    self._valid.move_to_end(key)
+                    self._hits += 1
+                    return entry[0], None
+                del self._valid[key]
+                self._store_invalid(key, now, "Token expired")
+                self._hits += 1
+                return None, "Token expired"
+
+            failure = self._invalid.get(key)
+            if failure is not None:
+                if now < failure[0]:
+                    self._hits += 1
+                    return None, failure[1]
+                del self._invalid[key]
+
+            self._misses += 1
+            return None, None
+
+    def store_valid(self, key: bytes, claims: dict[str, Any]) -> None:
+        with self._lock:
+            self._valid[key] = [claims, None]
+            self._valid.move_to_end(key)
+            while len(self._valid) > self.max_entries:
+                self._valid.popitem(last=False)
+
+    def store_invalid(self, key: bytes, now: float, message: str) -> None:
+        with self._lock:
+            self._store_invalid(key, now, message)
+
+    def _store_invalid(self, key: bytes, now: float, message: str) -> None:
+        self._invalid[key] = (now + self.negative_ttl_sec, message)
+        self._invalid.move_to_end(key)
+        while len(self._invalid) > self.max_entries:
+            self._invalid.popitem(last=False)
+
+    def recipient_exists(self, key: bytes) -> bool | None:
+        with self._lock:
+            entry = self._valid.get(key)
+            return None if entry is None else entry[1]
+
+    def set_recipient_exists(self, key: bytes, exists: bool) -> None:
+        with self._lock:
+            entry = self._valid.get(key)
+            if entry is not None:
+                entry[1] = exists
+
+    def clear(self) -> None:
+        with self._lock:
+            self._valid.clear()
+            self._invalid.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "valid_entries": len(self._valid),
+                "invalid_entries": len(self._invalid),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+_token_cache = _VerifiedTokenCache(settings.token_cache_max_entries, settings.token_negative_ttl_sec)
+
+
+def verify_token(token: str) -> dict[str, Any]:
+    key = _token_cache.digest(token)
+    now = time.time()
+    claims, failure = _token_cache.lookup(key, now)
+    if claims is not None:
+        return dict(claims)
+    if failure is not None:
+        raise TokenError(failure)
+
+    try:
+        claims = _verify_uncached(token)
+    except TokenError as exc:
+        _token_cache.store_invalid(key, now, str(exc))
+        raise
+    _token_cache.store_valid(key, claims)
+    return dict(claims)
+
+
+def cached_recipient_exists(token: str) -> bool | None:
+    """Whether the token's recipient row was already confirmed (None if not yet checked)."""
+    return _token_cache.recipient_exists(_token_cache.digest(token))
+
+
+def remember_recipient_exists(token: str, exists: bool) -> None:
+    _token_cache.set_recipient_exists(_token_cache.digest(token), exists)
+
+
+def token_cache_stats() -> dict[str, int]:
+    return _token_cache.stats()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import chat_service
+from admission import Overloaded
+from answer_cache import answer_cache, normalize_question
+from app_config import settings
+from campaign_presets import get_warmup_questions
+
+
+logger = logging.getLogger(__name__)
+
+
+def campaign_warmup_questions(preset_id: str | None, extra: list[str] | None = None) -> list[str]:
+    """Configured defaults plus preset-specific questions, deduplicated by normalized text."""
+    questions: list[str] = []
+    seen: set[str] = set()
+    for question in [*settings.warmup_questions, *get_warmup_questions(preset_id), *(extra or [])]:
+        key = normalize_question(question)
+        if key and key not in seen:
+            seen.add(key)
+            questions.append(question)
+    return questions
+
+
+def warm_campaign_answers(
+    campaign_id: str,
+    brand_id: str,
+    questions: list[str],
+    system_prompt: str,
+    max_workers: int | None = None,
+) -> dict[str, int]:
+    """Generate answers for likely opening questions in parallel and store them in the answer cache."""
+    pending = [q for q in questions if not answer_cache.contains(campaign_id, brand_id, q)]
+    stats = {"requested": len(questions), "skipped": len(questions) - len(pending), "generated": 0, "failed": 0}
+    if not pending:
+        return stats
+
+    def _warm(question: str) -> bool:
+        try:
+            reply, _ = chat_service.answer_first_turn(question, system_prompt, brand_id, campaign_id)
+        except (chat_service.ChatServiceError, Overloaded) as exc:
+            logger.warning("Warm-up failed for campaign %s question %r: %s", campaign_id, question, exc)
+            return False
+        answer_cache.put(campaign_id, brand_id, question, reply)
+        return True
+
+    workers = max(1, min(max_workers or settings.warmup_max_workers, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warmup") as pool:
+        for ok in pool.map(_warm, pending):
+            stats["generated" if ok else "failed"] += 1
+
+    logger.info("Warm-up for campaign %s: %s", campaign_id, stats)
+    return stats
+
+
+def start_campaign_warmup(
+    campaign_id: str,
+    brand_id: str,
+    questions: list[str],
+    system_prompt: str,
+) -> threading.Thread:
+    """Run the warm-up in the background so it overlaps the send loop."""
+    thread = threading.Thread(
+        target=warm_campaign_answers,
+        args=(campaign_id, brand_id, questions, system_prompt),
+        name=f"warmup-{campaign_id[:8]}",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable
+
+from app_config import settings
+from database import SessionLocal
+
+
+WriteIntent = Callable[[Any], Any]
+
+
+class WriteTimeout(Exception):
+    """The writer did not reach an intent in time; it was cancelled and nothing was written."""
+
+
+class WriteQueue:
+    """One writer thread applies write intents from request threads in group commits.
+
+    An intent is a function taking a session; it adds/updates rows and may return a
+    value (for example a new conversation id). The writer drains up to ``max_batch``
+    intents, runs them in one transaction and commits once, then resolves each
+    intent's future. If the batch fails, it is replayed one intent per transaction
+    so a single bad intent only fails its own future.
+    """
+
+    def __init__(self, session_factory: Callable[[], Any], max_batch: int = 128, max_wait_ms: float = 2.0):
+        self.session_factory = session_factory
+        self.max_batch = max(1, max_batch)
+        self.max_wait_sec = max(0.0, max_wait_ms) / 1000
+        self._queue: queue.SimpleQueue[tuple[WriteIntent, Future] | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._batches = 0
+        self._intents = 0
+        self._failed = 0
+        self._largest_batch = 0
+
+    def submit(self, intent: WriteIntent) -> Future:
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((intent, future))
+        return future
+
+    def run(self, intent: WriteIntent, timeout: float | None = None) -> Any:
+        future = self.submit(intent)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise WriteTimeout(f"Write not started within {timeout}s") from None
+            # Already picked up by the writer: its commit (or failure) is the real outcome.
+            return future.result()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Apply everything already queued, then stop the writer."""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def _collect(self, first: tuple[WriteIntent, Future]) -> tuple[list[tuple[WriteIntent, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_sec
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            self._apply(batch)
+            if stopping:
+                return
+
+    def _apply(self, batch: list[tuple[WriteIntent, Future]]) -> None:
+        batch = [(intent, future) for intent, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        results: list[Any] = []
+        try:
+            with self.session_factory() as db:
+                for intent, _ in batch:
+                    results.append(intent(db))
+                db.commit()
+        except Exception as exc:  # noqa: BLE001
+            if len(batch) == 1:
+                self._fail(batch[0][1], exc)
+            else:
+                for item in batch:
+                    self._apply_one(item)
+            return
+        self._record(len(batch))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _apply_one(self, item: tuple[WriteIntent, Future]) -> None:
+        intent, future = item
+        try:
+            with self.session_factory() as db:
+                result = intent(db)
+                db.commit()
+        except Exception as exc:  # noqa: BLE001
+            self._fail(future, exc)
+            return
+        self._record(1)
+        future.set_result(result)
+
+    def _record(self, size: int) -> None:
+        with self._lock:
+            self._batches += 1
+            self._intents += size
+            self._largest_batch = max(self._largest_batch, size)
+
+    def _fail(self, future: Future, exc: Exception) -> None:
+        with self._lock:
+            self._failed += 1
+        future.set_exception(exc)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "intents": self._intents,
+                "failed": self._failed,
+                "largest_batch": self._largest_batch,
+            }
+
+
+write_queue = WriteQueue(
+    SessionLocal,
+    max_batch=settings.db_write_batch_max,
+    max_wait_ms=settings.db_write_batch_wait_ms,
+)
+atexit.register(write_queue.stop)
+
+
+def run_write(db_session, intent: WriteIntent) -> Any:
+    """Apply ``intent`` and commit: through the writer thread when enabled, else on ``db_session``.
+
+    Chat turns, campaign create/send, retention sweeps and the event, open and
+    latency flushers all write this way. Startup bootstrap and the CLI scripts
+    commit directly.
+
+    Raises ``WriteTimeout`` if the writer has not started the intent within DB_WRITE_TIMEOUT_SEC.
+    """
+    if settings.db_write_queue:
+        return write_queue.run(intent, timeout=settings.db_write_timeout_sec)
+    result = intent(db_session)
+    db_session.commit()
+    return result
+
+
+def run_write_in(session_factory: Callable[[], Any], intent: WriteIntent) -> Any:
+    """``run_write`` for background flushers, which have no request session.
+
+    The session comes from ``session_factory`` only when the queue is off; queued
+    intents run on the writer's own session.
+    """
+    if settings.db_write_queue:
+        return write_queue.run(intent, timeout=settings.db_write_timeout_sec)
+    with session_factory() as db:
+        return run_write(db, intent)
+